@@ -2,12 +2,15 @@
 
 """Tasks for Read the Docs' analytics."""
 
+import atexit
+
 from django.conf import settings
 
 import readthedocs
+from readthedocs.core.utils.buffer import BatchBuffer
 from readthedocs.worker import app
 
-from .utils import send_to_analytics
+from .utils import send_batch_to_analytics
 
 
 DEFAULT_PARAMETERS = {
@@ -25,11 +28,32 @@ DEFAULT_PARAMETERS = {
 }
 
 
+@app.task(queue='web')
+def send_analytics_batch(hits):
+    """
+    Send a batch of hits to Google Analytics.
+
+    :param hits: the data of the hits, as buffered by ``analytics_buffer``
+    """
+    send_batch_to_analytics(hits)
+
+
+analytics_buffer = BatchBuffer(
+    send_analytics_batch.delay,
+    size=settings.ANALYTICS_BUFFER_SIZE,
+    timeout=settings.ANALYTICS_BUFFER_TIME,
+)
+atexit.register(analytics_buffer.flush)
+
+
 @app.task(queue='web')
 def analytics_pageview(url, title=None, **kwargs):
     """
     Send a pageview to Google Analytics.
 
+    The pageview is buffered by the process running the task and sent with
+    the following ones, call the task directly to avoid a message per hit.
+
     :see: https://developers.google.com/analytics/devguides/collection/protocol/v1/parameters
     :param url: the URL of the pageview
     :param title: the title of the page being viewed
@@ -42,7 +66,7 @@ def analytics_pageview(url, title=None, **kwargs):
     }
     data.update(DEFAULT_PARAMETERS)
     data.update(kwargs)
-    send_to_analytics(data)
+    analytics_buffer.add(data)
 
 
 @app.task(queue='web')
@@ -53,6 +77,9 @@ def analytics_event(
     """
     Send an analytics event to Google Analytics.
 
+    The event is buffered by the process running the task and sent with the
+    following ones, call the task directly to avoid a message per hit.
+
     :see: https://developers.google.com/analytics/devguides/collection/protocol/v1/devguide#event
     :param event_category: the category of the event
     :param event_action: the action of the event (use action words like "click")
@@ -69,4 +96,4 @@ def analytics_event(
     }
     data.update(DEFAULT_PARAMETERS)
     data.update(kwargs)
-    send_to_analytics(data)
+    analytics_buffer.add(data)
@@ -1,10 +1,16 @@
 # -*- coding: utf-8 -*-
-from django.test import TestCase, RequestFactory
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from django.test import TestCase, RequestFactory, override_settings
+
+from readthedocs.core.utils.buffer import BatchBuffer
 
 from .utils import (
     anonymize_ip_address,
     anonymize_user_agent,
     get_client_ip,
+    send_batch_to_analytics,
 )
 
 
@@ -87,3 +93,62 @@ class UtilsTests(TestCase):
         request.META['REMOTE_ADDR'] = '203.0.113.195'
         client_ip = get_client_ip(request)
         self.assertEqual(client_ip, '203.0.113.195')
+
+
+class AnalyticsBufferTests(TestCase):
+
+    def setUp(self):
+        bodies = self.bodies = []
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_POST(self):
+                length = int(self.headers['Content-Length'])
+                bodies.append(self.rfile.read(length).decode())
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        # a local stand-in for the batch endpoint
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = 'http://127.0.0.1:{}/batch'.format(server.server_port)
+
+    def test_hits_are_sent_in_batches(self):
+        flushed = []
+
+        def flush(hits):
+            flushed.append(len(hits))
+            send_batch_to_analytics(hits)
+
+        buffer = BatchBuffer(flush, size=50, timeout=60)
+        with override_settings(ANALYTICS_BATCH_URL=self.url):
+            for i in range(120):
+                buffer.add({
+                    't': 'pageview',
+                    'dl': 'http://example.com/{}'.format(i),
+                    'dt': None,
+                })
+            self.assertEqual(flushed, [50, 50])
+            buffer.flush()
+
+        self.assertEqual(flushed, [50, 50, 20])
+        # the batch endpoint takes up to 20 hits per request
+        self.assertEqual(
+            [len(body.split('\n')) for body in self.bodies],
+            [20, 20, 10, 20, 20, 10, 20],
+        )
+        self.assertEqual(
+            self.bodies[0].split('\n')[0],
+            't=pageview&dl=http%3A%2F%2Fexample.com%2F0',
+        )
+
+    def test_hits_are_flushed_after_the_time_limit(self):
+        flushed = threading.Event()
+        buffer = BatchBuffer(lambda hits: flushed.set(), size=50, timeout=0.1)
+        buffer.add({'t': 'pageview', 'dl': 'http://example.com/'})
+        self.assertTrue(flushed.wait(timeout=5))
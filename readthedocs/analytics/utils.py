@@ -5,6 +5,7 @@
 import hashlib
 import ipaddress
 import logging
+from urllib.parse import urlencode
 
 import requests
 from django.conf import settings
@@ -65,8 +66,12 @@ def anonymize_user_agent(user_agent):
     return user_agent
 
 
-def send_to_analytics(data):
-    """Sends data to Google Analytics."""
+# The measurement protocol accepts up to 20 hits per batch request
+ANALYTICS_BATCH_SIZE = 20
+
+
+def prepare_analytics_data(data):
+    """Adds the client ID to the data of a hit and anonymizes it."""
     if data.get('uip') and data.get('ua'):
         data['cid'] = generate_client_id(data['uip'], data['ua'])
 
@@ -78,19 +83,36 @@ def send_to_analytics(data):
         # Anonymize user agent if it is rare
         data['ua'] = anonymize_user_agent(data['ua'])
 
-    resp = None
-    log.debug('Sending data to analytics: %s', data)
-    try:
-        resp = requests.post(
-            'https://www.google-analytics.com/collect',
-            data=data,
-            timeout=3,  # seconds
-        )
-    except requests.Timeout:
-        log.warning('Timeout sending to Google Analytics')
-
-    if resp and not resp.ok:
-        log.warning('Unknown error sending to Google Analytics')
+    return data
+
+
+def send_batch_to_analytics(hits):
+    """Sends a list of hits to Google Analytics with the batch endpoint."""
+    payloads = [
+        urlencode({
+            key: value
+            for key, value in prepare_analytics_data(data).items()
+            if value is not None
+        })
+        for data in hits
+    ]
+
+    log.debug('Sending %s hits to analytics', len(payloads))
+    for start in range(0, len(payloads), ANALYTICS_BATCH_SIZE):
+        resp = None
+        try:
+            resp = requests.post(
+                settings.ANALYTICS_BATCH_URL,
+                data='\n'.join(payloads[start:start + ANALYTICS_BATCH_SIZE]),
+                timeout=3,  # seconds
+            )
+        except requests.Timeout:
+            log.warning('Timeout sending to Google Analytics')
+        except requests.RequestException:
+            log.warning('Error sending to Google Analytics', exc_info=True)
+
+        if resp is not None and not resp.ok:
+            log.warning('Unknown error sending to Google Analytics')
 
 
 def generate_client_id(ip_address, user_agent):
@@ -90,7 +90,16 @@ class VersionSerializer(serializers.ModelSerializer):
             'built',
             'downloads',
             'type',
+            'has_pdf',
+            'has_epub',
+            'has_htmlzip',
         )
+        # the downloads are written by the builders, and read as ``downloads``
+        extra_kwargs = {
+            'has_pdf': {'write_only': True},
+            'has_epub': {'write_only': True},
+            'has_htmlzip': {'write_only': True},
+        }
 
 
 class VersionAdminSerializer(VersionSerializer):
@@ -100,6 +109,16 @@ class VersionAdminSerializer(VersionSerializer):
     project = ProjectAdminSerializer()
 
 
+class BuildCommandListSerializer(serializers.ListSerializer):
+
+    """Create a batch of build commands with a single query."""
+
+    def create(self, validated_data):
+        return BuildCommandResult.objects.bulk_create([
+            BuildCommandResult(**attrs) for attrs in validated_data
+        ])
+
+
 class BuildCommandSerializer(serializers.ModelSerializer):
 
     run_time = serializers.ReadOnlyField()
@@ -107,6 +126,7 @@ class BuildCommandSerializer(serializers.ModelSerializer):
     class Meta:
         model = BuildCommandResult
         exclude = ('')
+        list_serializer_class = BuildCommandListSerializer
 
 
 class BuildSerializer(serializers.ModelSerializer):
@@ -122,11 +142,23 @@ class BuildSerializer(serializers.ModelSerializer):
     # Jsonfield needs an explicit serializer
     # https://github.com/dmkoch/django-jsonfield/issues/188#issuecomment-300439829
     config = serializers.JSONField(required=False)
+    phases = serializers.JSONField(required=False)
 
     class Meta:
         model = Build
         # `_config` should be excluded to avoid conflicts with `config`
-        exclude = ('builder', '_config')
+        exclude = ('builder', 'fingerprint', '_config')
+
+    def update(self, instance, validated_data):
+        # Builders only know about their own phases, keep the ones recorded
+        # by the web servers (e.g. ``indexing``)
+        if 'phases' in validated_data:
+            names = {phase['name'] for phase in validated_data['phases']}
+            validated_data['phases'] = validated_data['phases'] + [
+                phase for phase in instance.phases
+                if phase['name'] not in names
+            ]
+        return super().update(instance, validated_data)
 
 
 class BuildAdminSerializer(BuildSerializer):
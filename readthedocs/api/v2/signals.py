@@ -1,4 +1,4 @@
-"""We define custom Django signals to trigger when a footer is rendered."""
+"""We define custom Django signals to trigger when a footer or a build context is rendered."""
 
 import django.dispatch
 
@@ -6,3 +6,7 @@ import django.dispatch
 footer_response = django.dispatch.Signal(
     providing_args=['request', 'context', 'response_data'],
 )
+
+build_context_response = django.dispatch.Signal(
+    providing_args=['request', 'version', 'resp_data'],
+)
@@ -10,7 +10,14 @@ from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.response import Response
 
-from readthedocs.builds.constants import BRANCH, TAG, INTERNAL
+from readthedocs.api.v2.signals import build_context_response
+from readthedocs.builds.constants import (
+    BRANCH,
+    BUILD_STATE_CLONING,
+    BUILD_STATE_TRIGGERED,
+    INTERNAL,
+    TAG,
+)
 from readthedocs.builds.models import Build, BuildCommandResult, Version
 from readthedocs.core.utils import trigger_build
 from readthedocs.core.utils.extend import SettingsOverrideObject
@@ -267,6 +274,55 @@ class VersionViewSet(UserSelectViewSet):
         'project__slug',
     )
 
+    @decorators.action(
+        detail=True,
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def build_context(self, request, **kwargs):
+        """
+        Return everything a builder needs to build the version in one response.
+
+        The response includes the version with the admin project data, the
+        build passed with the ``build`` query parameter, the active versions
+        and the subprojects of the project.
+        """
+        version = get_object_or_404(
+            Version.objects.select_related('project').prefetch_related(
+                'project__environmentvariable_set',
+            ),
+            pk=kwargs['pk'],
+        )
+        project = version.project
+        build = None
+        if request.query_params.get('build'):
+            build = get_object_or_404(
+                project.builds.all(),
+                pk=request.query_params['build'],
+            )
+        active_versions = project.versions(manager=INTERNAL).filter(
+            active=True,
+        ).select_related('project')
+        subprojects = Project.objects.filter(
+            superprojects__parent=project,
+        ).prefetch_related('users')
+
+        resp_data = {
+            'version': VersionAdminSerializer(version).data,
+            'build': BuildAdminSerializer(build).data if build else {},
+            'active_versions': VersionSerializer(active_versions, many=True).data,
+            'subprojects': ProjectSerializer(subprojects, many=True).data,
+        }
+
+        # Allow folks to add to the build context the data of their apps
+        build_context_response.send(
+            sender=None,
+            request=request,
+            version=version,
+            resp_data=resp_data,
+        )
+
+        return Response(resp_data)
+
 
 class BuildViewSetBase(UserSelectViewSet):
     permission_classes = [APIRestrictedPermission]
@@ -276,6 +332,31 @@ class BuildViewSetBase(UserSelectViewSet):
     model = Build
     filterset_fields = ('project__slug', 'commit')
 
+    @decorators.action(
+        detail=True,
+        methods=['post'],
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def claim(self, request, **kwargs):
+        """
+        Move the build out of the queue when its task starts.
+
+        The state is changed with a conditional update, so a build can't be
+        started and cancelled at the same time
+        (see ``readthedocs.core.utils.cancel_queued_builds``). ``claimed`` is
+        false when the build wasn't waiting in the queue anymore.
+        """
+        build = self.get_object()
+        claimed = Build.objects.filter(
+            pk=build.pk,
+            state=BUILD_STATE_TRIGGERED,
+        ).update(state=BUILD_STATE_CLONING)
+        build.refresh_from_db()
+        return Response({
+            'claimed': bool(claimed),
+            'build': BuildAdminSerializer(build).data,
+        })
+
 
 class BuildViewSet(SettingsOverrideObject):
 
@@ -291,6 +372,12 @@ class BuildCommandViewSet(UserSelectViewSet):
     serializer_class = BuildCommandSerializer
     model = BuildCommandResult
 
+    def get_serializer(self, *args, **kwargs):
+        # Builders post the commands in batches, as a list
+        if isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
+
 
 class DomainViewSet(UserSelectViewSet):
     permission_classes = [APIRestrictedPermission]
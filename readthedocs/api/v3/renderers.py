@@ -1,4 +1,5 @@
 import json
+import re
 
 from rest_framework.compat import (
     INDENT_SEPARATORS,
@@ -7,6 +8,17 @@ from rest_framework.compat import (
 )
 from rest_framework.renderers import JSONRenderer
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# the floats rendered by orjson differently from the json module, ``1e16``
+# instead of ``1e+16`` and ``0.00001`` instead of ``1e-05``; they may be matched
+# inside a string too, the output is just rendered again in that case
+FLOAT_EXPONENT_RE = re.compile(rb'(?:^|[:\[,])\s*-?(?:\d+(?:\.\d+)?e|0\.0000)')
+
 
 class AlphabeticalSortedJSONRenderer(JSONRenderer):
 
@@ -56,3 +68,48 @@ class AlphabeticalSortedJSONRenderer(JSONRenderer):
             ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
             return bytes(ret.encode('utf-8'))
         return ret
+
+
+class FastAlphabeticalSortedJSONRenderer(AlphabeticalSortedJSONRenderer):
+
+    """
+    Renderer that sort the keys from the JSON alphabetically using ``orjson``.
+
+    The output is the same of ``AlphabeticalSortedJSONRenderer``, which is used
+    when ``orjson`` isn't installed or can't render the same bytes: with
+    indentations other than 2 spaces, ASCII only or non strict output, integers
+    over 64 bits, keys that aren't strings and very large or small floats.
+    Out of range floats are rendered as ``null`` instead of raising an error.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or orjson is None or self.ensure_ascii or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is None and self.compact:
+            option = orjson.OPT_SORT_KEYS
+        elif indent == 2:
+            option = orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2
+        else:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=option | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except TypeError:
+            # orjson.JSONEncodeError is a TypeError
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if FLOAT_EXPONENT_RE.search(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # See ``AlphabeticalSortedJSONRenderer.render``
+        return ret.replace(
+            '\u2028'.encode('utf-8'), b'\\u2028',
+        ).replace(
+            '\u2029'.encode('utf-8'), b'\\u2029',
+        )
@@ -96,6 +96,17 @@ class BuildConfigSerializer(FlexFieldsSerializerMixin, serializers.Serializer):
         return instance
 
 
+class BuildPhaseSerializer(serializers.Serializer):
+
+    """Timing and resource usage of one phase of the build."""
+
+    name = serializers.CharField()
+    started = serializers.DateTimeField(source='start')
+    duration = serializers.FloatField(source='length')
+    cpu = serializers.FloatField(allow_null=True)
+    memory = serializers.IntegerField(allow_null=True)
+
+
 class BuildStateSerializer(serializers.Serializer):
     code = serializers.CharField(source='state')
     name = serializers.SerializerMethodField()
@@ -132,7 +143,8 @@ class BuildSerializer(FlexFieldsModelSerializer):
         ]
 
         expandable_fields = {
-            'config': (BuildConfigSerializer, {'source': 'config'})
+            'config': (BuildConfigSerializer, {'source': 'config'}),
+            'phases': (BuildPhaseSerializer, {'source': 'phases', 'many': True}),
         }
 
     def get_finished(self, obj):
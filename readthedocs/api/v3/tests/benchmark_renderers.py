@@ -0,0 +1,70 @@
+"""
+Micro-benchmark of the APIv3 JSON renderers.
+
+The payloads are lists of the projects and of the versions from the test
+responses. Run it with::
+
+    DJANGO_SETTINGS_MODULE=readthedocs.docsitalia.settings.testdocsitalia \
+        python -m readthedocs.api.v3.tests.benchmark_renderers
+"""
+
+import copy
+import json
+import timeit
+from pathlib import Path
+
+import django
+
+
+def get_payloads(size=500):
+    """Return the listings of ``size`` projects and versions, by name."""
+    responses = Path(__file__).absolute().parent / 'responses'
+    payloads = {}
+    for name, view_name in (
+            ('projects', 'projects-detail'),
+            ('versions', 'projects-versions-detail'),
+    ):
+        obj = json.load(open(responses / f'{view_name}.json'))
+        results = []
+        for number in range(size):
+            result = copy.deepcopy(obj)
+            result['id'] = number
+            result['slug'] = f'{obj["slug"]}-{number}'
+            results.append(result)
+        payloads[name] = {
+            'count': size,
+            'next': None,
+            'previous': None,
+            'results': results,
+        }
+    return payloads
+
+
+def main(number=20):
+    django.setup()
+    # pylint: disable=import-outside-toplevel
+    from readthedocs.api.v3.renderers import (
+        AlphabeticalSortedJSONRenderer,
+        FastAlphabeticalSortedJSONRenderer,
+        orjson,
+    )
+
+    if orjson is None:
+        print('orjson is not installed, the fast renderer uses the json module')
+
+    for name, payload in get_payloads().items():
+        for renderer_class in (
+                AlphabeticalSortedJSONRenderer,
+                FastAlphabeticalSortedJSONRenderer,
+        ):
+            renderer = renderer_class()
+            seconds = min(timeit.repeat(
+                lambda: renderer.render(payload),  # pylint: disable=cell-var-from-loop
+                number=number,
+                repeat=5,
+            )) / number
+            print(f'{name} {renderer_class.__name__}: {seconds * 1000:.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
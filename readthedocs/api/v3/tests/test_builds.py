@@ -32,6 +32,41 @@ class BuildsEndpointTests(APIEndpointMixin):
             self._get_response_dict('projects-builds-detail'),
         )
 
+    def test_projects_builds_detail_expand_phases(self):
+        self.build.phases = [
+            {
+                'name': 'html',
+                'start': '2019-04-29T10:00:05',
+                'length': 42.5,
+                'cpu': 30.25,
+                'memory': 104857600,
+            },
+        ]
+        self.build.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.get(
+            reverse(
+                'projects-builds-detail',
+                kwargs={
+                    'parent_lookup_project__slug': self.project.slug,
+                    'build_pk': self.build.pk,
+                }),
+            {'expand': 'phases'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['phases'],
+            [
+                {
+                    'name': 'html',
+                    'started': '2019-04-29T10:00:05',
+                    'duration': 42.5,
+                    'cpu': 30.25,
+                    'memory': 104857600,
+                },
+            ],
+        )
+
     def test_projects_versions_builds_list_post(self):
         self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
         self.assertEqual(self.project.builds.count(), 1)
@@ -0,0 +1,59 @@
+import datetime
+from unittest import skipIf
+
+import mock
+from django.test import TestCase
+from django.utils.timezone import make_aware
+
+from readthedocs.api.v3.renderers import (
+    AlphabeticalSortedJSONRenderer,
+    FastAlphabeticalSortedJSONRenderer,
+    orjson,
+)
+
+from .benchmark_renderers import get_payloads
+
+
+@skipIf(orjson is None, 'orjson is not installed')
+class FastAlphabeticalSortedJSONRendererTests(TestCase):
+
+    def setUp(self):
+        self.renderer = FastAlphabeticalSortedJSONRenderer()
+        self.stdlib_renderer = AlphabeticalSortedJSONRenderer()
+
+    def assertRenderedAsStdlib(self, data, accepted_media_type=None, renderer_context=None):
+        self.assertEqual(
+            self.renderer.render(data, accepted_media_type, renderer_context),
+            self.stdlib_renderer.render(data, accepted_media_type, renderer_context),
+        )
+
+    def test_render_listings(self):
+        for payload in get_payloads(size=10).values():
+            self.assertRenderedAsStdlib(payload)
+            self.assertRenderedAsStdlib(payload, 'application/json; indent=2')
+            self.assertRenderedAsStdlib(payload, 'application/json; indent=4')
+
+    def test_render_python_objects(self):
+        data = {
+            'created': make_aware(datetime.datetime(2019, 4, 29, 10, 0, 0, 123456)),
+            'day': datetime.date(2019, 4, 29),
+            'text': 'caff\xe8 \u2028\u2029 "\x00"',
+            'numbers': [0, -1, 2 ** 70, 3.6, 1e16, 1e-05, 0.0001],
+            'nested': {'b': [], 'a': {}},
+        }
+        self.assertRenderedAsStdlib(data)
+        self.assertRenderedAsStdlib(data, 'application/json; indent=2')
+        self.assertIn(b'\\u2028', self.renderer.render(data))
+
+    def test_render_with_orjson(self):
+        payload = get_payloads(size=1)['versions']
+        with mock.patch.object(orjson, 'dumps', wraps=orjson.dumps) as dumps:
+            self.assertRenderedAsStdlib(payload)
+            self.assertRenderedAsStdlib({'float': 1e16})
+        self.assertEqual(dumps.call_count, 2)
+
+    def test_render_without_orjson(self):
+        payload = get_payloads(size=1)['projects']
+        rendered = self.renderer.render(payload)
+        with mock.patch('readthedocs.api.v3.renderers.orjson', None):
+            self.assertEqual(self.renderer.render(payload), rendered)
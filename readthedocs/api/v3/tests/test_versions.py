@@ -2,6 +2,7 @@ from .mixins import APIEndpointMixin
 from django.urls import reverse
 
 import django_dynamic_fixture as fixture
+import mock
 
 from readthedocs.builds.constants import TAG
 from readthedocs.builds.models import Version
@@ -95,3 +96,39 @@ class VerionsEndpointTests(APIEndpointMixin):
             ),
         )
         self.assertEqual(response.status_code, 200)
+
+    def test_projects_versions_list_downloads_without_storage(self):
+        for number in range(100):
+            fixture.get(
+                Version,
+                slug=f'v2.{number}',
+                verbose_name=f'v2.{number}',
+                identifier='a1b2c3',
+                project=self.project,
+                active=True,
+                built=True,
+                type=TAG,
+            )
+        # the downloads recorded by the builds
+        self.project.versions.update(has_pdf=True, has_epub=False, has_htmlzip=True)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        with mock.patch.object(Project, 'has_media') as has_media, \
+                mock.patch('readthedocs.projects.models.get_storage_class') as storage:
+            response = self.client.get(
+                reverse(
+                    'projects-versions-list',
+                    kwargs={
+                        'parent_lookup_project__slug': self.project.slug,
+                    },
+                ),
+                {'limit': 200},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(has_media.call_count, 0)
+        self.assertEqual(storage.call_count, 0)
+
+        results = response.json()['results']
+        self.assertEqual(len(results), 101)
+        for version in results:
+            self.assertEqual(sorted(version['downloads']), ['htmlzip', 'pdf'])
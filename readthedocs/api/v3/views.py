@@ -29,7 +29,7 @@ from readthedocs.redirects.models import Redirect
 from .filters import BuildFilter, ProjectFilter, VersionFilter
 from .mixins import ProjectQuerySetMixin
 from .permissions import PublicDetailPrivateListing, IsProjectAdmin
-from .renderers import AlphabeticalSortedJSONRenderer
+from .renderers import FastAlphabeticalSortedJSONRenderer
 from .serializers import (
     BuildCreateSerializer,
     BuildSerializer,
@@ -65,7 +65,7 @@ class APIv3Settings:
     pagination_class = LimitOffsetPagination
     LimitOffsetPagination.default_limit = 10
 
-    renderer_classes = (AlphabeticalSortedJSONRenderer, BrowsableAPIRenderer)
+    renderer_classes = (FastAlphabeticalSortedJSONRenderer, BrowsableAPIRenderer)
     throttle_classes = (UserRateThrottle, AnonRateThrottle)
     filter_backends = (filters.DjangoFilterBackend,)
     metadata_class = SimpleMetadata
@@ -323,6 +323,7 @@ class BuildsViewSet(APIv3Settings, NestedViewSetMixin, ProjectQuerySetMixin,
     queryset = Build.internal.all()
     permit_list_expands = [
         'config',
+        'phases',
     ]
 
 
@@ -1,7 +1,13 @@
 """Django admin interface for `~builds.models.Build` and related models."""
 
+import datetime
 import json
+from collections import defaultdict
+
+from django.conf.urls import url
 from django.contrib import admin, messages
+from django.template.response import TemplateResponse
+from django.utils import timezone
 from django.utils.safestring import mark_safe
 from polymorphic.admin import (
     PolymorphicChildModelAdmin,
@@ -84,6 +90,9 @@ class BuildAdmin(admin.ModelAdmin):
     inlines = (BuildCommandResultInline,)
     search_fields = ('project__slug', 'version__slug')
 
+    phases_report_days = 7
+    phases_report_size = 50
+
     def version_name(self, obj):
         return obj.version.verbose_name
 
@@ -92,6 +101,57 @@ class BuildAdmin(admin.ModelAdmin):
 
     pretty_config.short_description = 'Config File'
 
+    def get_urls(self):
+        urls = [
+            url(
+                r'^phases-report/$',
+                self.admin_site.admin_view(self.phases_report),
+                name='builds_build_phases_report',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def phases_report(self, request):
+        """Report the slowest build phases per project of the last days."""
+        since = timezone.now() - datetime.timedelta(days=self.phases_report_days)
+        builds = (
+            Build.objects
+            .filter(date__gte=since)
+            .exclude(phases=[])
+            .values_list('project__slug', 'phases')
+        )
+        stats = defaultdict(lambda: {'count': 0, 'total': 0, 'max': 0, 'cpu': 0})
+        for project, phases in builds.iterator():
+            for phase in phases:
+                stat = stats[(project, phase['name'])]
+                stat['count'] += 1
+                stat['total'] += phase['length']
+                stat['max'] = max(stat['max'], phase['length'])
+                stat['cpu'] += phase['cpu'] or 0
+
+        rows = [
+            {
+                'project': project,
+                'phase': name,
+                'count': stat['count'],
+                'average': stat['total'] / stat['count'],
+                'max': stat['max'],
+                'total': stat['total'],
+                'cpu': stat['cpu'],
+            }
+            for (project, name), stat in stats.items()
+        ]
+        rows.sort(key=lambda row: row['total'], reverse=True)
+
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.model._meta,
+            title='Slowest build phases',
+            days=self.phases_report_days,
+            rows=rows[:self.phases_report_size],
+        )
+        return TemplateResponse(request, 'builds/admin/phases_report.html', context)
+
 
 class VersionAdmin(admin.ModelAdmin):
 
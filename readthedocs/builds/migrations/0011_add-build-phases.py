@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+import jsonfield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0010_add-description-field-to-automation-rule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='build',
+            name='phases',
+            field=jsonfield.fields.JSONField(blank=True, default=list, verbose_name='Build phases'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0011_add-build-phases'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='has_epub',
+            field=models.NullBooleanField(default=None, verbose_name='Has ePub'),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='has_htmlzip',
+            field=models.NullBooleanField(default=None, verbose_name='Has HTML Zip'),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='has_pdf',
+            field=models.NullBooleanField(default=None, verbose_name='Has PDF'),
+        ),
+    ]
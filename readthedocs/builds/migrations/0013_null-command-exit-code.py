@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0012_add-version-downloads'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='buildcommandresult',
+            name='exit_code',
+            field=models.IntegerField(null=True, verbose_name='Command exit code'),
+        ),
+    ]
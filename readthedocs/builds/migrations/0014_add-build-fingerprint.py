@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0013_null-command-exit-code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='build',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Fingerprint'),
+        ),
+    ]
@@ -133,6 +133,12 @@ class Version(models.Model):
     )
     machine = models.BooleanField(_('Machine Created'), default=False)
 
+    #: The downloads produced by the last build, ``None`` when they are unknown
+    #: because the version wasn't built since these fields were added.
+    has_pdf = models.NullBooleanField(_('Has PDF'), default=None)
+    has_epub = models.NullBooleanField(_('Has ePub'), default=None)
+    has_htmlzip = models.NullBooleanField(_('Has HTML Zip'), default=None)
+
     objects = VersionManager.from_queryset(VersionQuerySet)()
     # Only include BRANCH, TAG, UNKNOWN type Versions.
     internal = InternalVersionManager.from_queryset(VersionQuerySet)()
@@ -366,23 +372,39 @@ class Version(models.Model):
         )
 
     def get_downloads(self, pretty=False):
+        """
+        Return the URLs of the downloads of the version.
+
+        The downloads recorded by the last build are trusted, the storage is
+        checked only for the versions not built since they are recorded.
+        """
         project = self.project
         data = {}
 
         def prettify(k):
             return k if pretty else k.lower()
 
-        if project.has_pdf(self.slug, version_type=self.type):
+        has_pdf = self.has_pdf
+        if has_pdf is None:
+            has_pdf = project.has_pdf(self.slug, version_type=self.type)
+        has_htmlzip = self.has_htmlzip
+        if has_htmlzip is None:
+            has_htmlzip = project.has_htmlzip(self.slug, version_type=self.type)
+        has_epub = self.has_epub
+        if has_epub is None:
+            has_epub = project.has_epub(self.slug, version_type=self.type)
+
+        if has_pdf:
             data[prettify('PDF')] = project.get_production_media_url(
                 'pdf',
                 self.slug,
             )
-        if project.has_htmlzip(self.slug, version_type=self.type):
+        if has_htmlzip:
             data[prettify('HTML')] = project.get_production_media_url(
                 'htmlzip',
                 self.slug,
             )
-        if project.has_epub(self.slug, version_type=self.type):
+        if has_epub:
             data[prettify('Epub')] = project.get_production_media_url(
                 'epub',
                 self.slug,
@@ -596,9 +618,10 @@ class APIVersion(Version):
 
     def __init__(self, *args, **kwargs):
         self.project = APIProject(**kwargs.pop('project', {}))
+        self.downloads = kwargs.pop('downloads', None)
         # These fields only exist on the API return, not on the model, so we'll
         # remove them to avoid throwing exceptions due to unexpected fields
-        for key in ['resource_uri', 'absolute_url', 'downloads']:
+        for key in ['resource_uri', 'absolute_url']:
             try:
                 del kwargs[key]
             except KeyError:
@@ -653,6 +676,9 @@ class Build(models.Model):
     _config = JSONField(_('Configuration used in the build'), default=dict)
 
     length = models.IntegerField(_('Build Length'), null=True, blank=True)
+    #: Timing and resource usage of each phase of the build, as a list of
+    #: ``{'name', 'start', 'length', 'cpu', 'memory'}`` dictionaries
+    phases = JSONField(_('Build phases'), default=list, blank=True)
 
     builder = models.CharField(
         _('Builder'),
@@ -660,6 +686,13 @@ class Build(models.Model):
         null=True,
         blank=True,
     )
+    #: Theme and image the build was triggered for by ``rebuild_projects``
+    fingerprint = models.CharField(
+        _('Fingerprint'),
+        max_length=255,
+        blank=True,
+        default='',
+    )
 
     cold_storage = models.NullBooleanField(
         _('Cold Storage'),
@@ -917,7 +950,8 @@ class BuildCommandResult(BuildCommandResultMixin, models.Model):
     command = models.TextField(_('Command'))
     description = models.TextField(_('Description'), blank=True)
     output = models.TextField(_('Command output'), blank=True)
-    exit_code = models.IntegerField(_('Command exit code'))
+    # The exit code is null while the command is still running
+    exit_code = models.IntegerField(_('Command exit code'), null=True)
 
     start_time = models.DateTimeField(_('Start time'))
     end_time = models.DateTimeField(_('End time'))
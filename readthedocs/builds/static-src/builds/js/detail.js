@@ -85,6 +85,9 @@ function BuildDetailView(instance) {
                 );
                 if (!match) {
                     self.commands.push(command);
+                } else if (match.output !== command.output) {
+                    // The output of running commands is updated as it grows
+                    self.commands.replace(match, command);
                 }
             }
         });
@@ -10,6 +10,7 @@ from django.utils.deprecation import MiddlewareMixin
 from django.utils.translation import ugettext_lazy as _
 from django.shortcuts import render
 
+from readthedocs.core.resolver import resolver_memo
 from readthedocs.projects.models import Domain, Project
 
 
@@ -218,3 +219,20 @@ class FooterNoSessionMiddleware(SessionMiddleware):
             ):
                 return response
         return super().process_response(request, response)
+
+
+class ResolverMemoMiddleware:
+
+    """
+    Middleware memoizing the relations and the domains looked up by the resolver.
+
+    The URLs of the same projects are resolved many times by a request, from
+    the templates, the footer and the serializers.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with resolver_memo():
+            return self.get_response(request)
@@ -1,6 +1,8 @@
 """URL resolver for documentation."""
 
 import logging
+import threading
+from contextlib import contextmanager
 from urllib.parse import urlunparse
 
 from django.conf import settings
@@ -10,6 +12,35 @@ from readthedocs.projects.constants import PRIVATE, PUBLIC
 
 log = logging.getLogger(__name__)
 
+_memo = threading.local()
+
+
+@contextmanager
+def resolver_memo():
+    """
+    Memoize the relations and the domains looked up by the resolver.
+
+    Inside the block the canonical project, the main language project, the
+    parent relationship and the canonical domain of a project are looked up
+    once, the following URLs of the project are resolved without queries.
+    The memo is cleared whenever a project, a domain or a relationship is
+    saved or deleted.
+    """
+    active = getattr(_memo, 'values', None) is not None
+    if not active:
+        _memo.values = {}
+    try:
+        yield
+    finally:
+        if not active:
+            _memo.values = None
+
+
+def clear_resolver_memo():
+    """Forget what was memoized by the active ``resolver_memo``, if any."""
+    if getattr(_memo, 'values', None):
+        _memo.values = {}
+
 
 class ResolverBase:
 
@@ -102,7 +133,7 @@ class ResolverBase:
             private=None,
     ):
         """Resolve a URL with a subset of fields defined."""
-        cname = cname or project.get_canonical_custom_domain()
+        cname = cname or self._get_canonical_domain(project)
         version_slug = version_slug or project.get_default_version()
         language = language or project.language
 
@@ -117,8 +148,8 @@ class ResolverBase:
         # We currently support more than 2 levels of nesting subprojects and
         # translations, only loop twice to avoid sticking in the loop
         for _ in range(0, 2):
-            main_language_project = current_project.main_language_project
-            relation = current_project.get_parent_relationship()
+            main_language_project = self._get_main_language_project(current_project)
+            relation = self._get_parent_relationship(current_project)
 
             if main_language_project:
                 current_project = main_language_project
@@ -129,7 +160,7 @@ class ResolverBase:
                 current_project = relation.parent
                 project_slug = relation.parent.slug
                 subproject_slug = relation.alias
-                cname = relation.parent.domains.filter(canonical=True).first()
+                cname = self._get_canonical_domain(relation.parent)
             else:
                 break
 
@@ -150,7 +181,7 @@ class ResolverBase:
     def resolve_domain(self, project, private=None):
         # pylint: disable=unused-argument
         canonical_project = self._get_canonical_project(project)
-        domain = canonical_project.get_canonical_custom_domain()
+        domain = self._get_canonical_domain(canonical_project)
         if domain:
             return domain.domain
 
@@ -170,7 +201,7 @@ class ResolverBase:
             private = self._get_private(project, version_slug)
 
         canonical_project = self._get_canonical_project(project)
-        custom_domain = canonical_project.get_canonical_custom_domain()
+        custom_domain = self._get_canonical_domain(canonical_project)
         use_custom_domain = self._use_custom_domain(custom_domain)
 
         if use_custom_domain:
@@ -212,20 +243,60 @@ class ResolverBase:
         # recursion. We can't determine a root project well here, so you get
         # what you get if you have configured your project in a strange manner
         if projects is None:
-            projects = [project]
-        else:
-            projects.append(project)
+            return self._memoize(
+                'canonical_project',
+                project,
+                lambda: self._get_canonical_project(project, []),
+            )
+        projects.append(project)
 
         next_project = None
-        relation = project.get_parent_relationship()
-        if project.main_language_project:
-            next_project = project.main_language_project
+        relation = self._get_parent_relationship(project)
+        main_language_project = self._get_main_language_project(project)
+        if main_language_project:
+            next_project = main_language_project
         elif relation:
             next_project = relation.parent
         if next_project and next_project not in projects:
             return self._get_canonical_project(next_project, projects)
         return project
 
+    def _get_main_language_project(self, project):
+        return self._memoize(
+            'main_language_project',
+            project,
+            lambda: project.main_language_project,
+        )
+
+    def _get_parent_relationship(self, project):
+        return self._memoize(
+            'parent_relationship',
+            project,
+            project.get_parent_relationship,
+        )
+
+    def _get_canonical_domain(self, project):
+        return self._memoize(
+            'canonical_domain',
+            project,
+            project.get_canonical_custom_domain,
+        )
+
+    def _memoize(self, name, project, func):
+        """
+        Return ``func()``, memoized by ``resolver_memo`` for ``project``.
+
+        Outside ``resolver_memo`` and for unsaved projects ``func`` is always
+        called.
+        """
+        values = getattr(_memo, 'values', None)
+        if values is None or project.pk is None:
+            return func()
+        key = (name, project.pk)
+        if key not in values:
+            values[key] = func()
+        return values[key]
+
     def _get_project_subdomain(self, project):
         """Determine canonical project domain as subdomain."""
         if self._use_subdomain():
@@ -8,12 +8,23 @@ from urllib.parse import urlparse
 from corsheaders import signals
 from django.conf import settings
 from django.db.models import Count, Q
-from django.db.models.signals import pre_delete
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
 from django.dispatch import Signal, receiver
 from rest_framework.permissions import SAFE_METHODS
 
+from readthedocs.core.resolver import clear_resolver_memo
 from readthedocs.oauth.models import RemoteOrganization
-from readthedocs.projects.models import Domain, Project
+from readthedocs.projects.models import (
+    Domain,
+    Feature,
+    Project,
+    ProjectRelationship,
+)
 
 
 log = logging.getLogger(__name__)
@@ -107,4 +118,23 @@ def delete_projects_and_organizations(sender, instance, *args, **kwargs):
     oauth_organizations.delete()
 
 
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+@receiver(post_save, sender=ProjectRelationship)
+@receiver(post_delete, sender=ProjectRelationship)
+def clear_resolver_memo_on_change(sender, **kwargs):  # pylint: disable=unused-argument
+    """Forget the relations and the domains memoized by the resolver."""
+    clear_resolver_memo()
+
+
+@receiver(post_save, sender=Feature)
+@receiver(post_delete, sender=Feature)
+@receiver(m2m_changed, sender=Feature.projects.through)
+def reload_project_features(sender, **kwargs):  # pylint: disable=unused-argument
+    """Make the projects load their features again on the next check."""
+    Feature.generation += 1
+
+
 signals.check_request_enabled.connect(decide_if_cors)
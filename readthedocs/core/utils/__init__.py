@@ -7,11 +7,14 @@ import re
 
 from celery import chord, group
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.functional import keep_lazy
 from django.utils.safestring import SafeText, mark_safe
 from django.utils.text import slugify as slugify_base
+from django.utils.translation import ugettext_lazy as _
 
 from readthedocs.builds.constants import (
+    BUILD_STATE_FINISHED,
     BUILD_STATE_TRIGGERED,
     BUILD_STATUS_PENDING,
 )
@@ -20,6 +23,8 @@ from readthedocs.doc_builder.constants import DOCKER_LIMITS
 
 log = logging.getLogger(__name__)
 
+COALESCED_BUILDS_CACHE_KEY = 'builds:coalesced'
+
 
 def broadcast(type, task, args, kwargs=None, callback=None):  # pylint: disable=redefined-builtin
     """
@@ -108,6 +113,7 @@ def prepare_build(
     }
 
     if record:
+        cancel_queued_builds(version)
         build = Build.objects.create(
             project=project,
             version=version,
@@ -135,6 +141,11 @@ def prepare_build(
     options['soft_time_limit'] = time_limit
     options['time_limit'] = int(time_limit * 1.2)
 
+    # Delay the task a bit so triggers arriving in a burst (e.g. several
+    # webhooks for the same push) supersede this build before it starts
+    if record and settings.RTD_BUILD_COALESCE_DEBOUNCE:
+        options['countdown'] = settings.RTD_BUILD_COALESCE_DEBOUNCE
+
     if build and commit:
         # Send pending Build Status using Git Status API for External Builds.
         send_external_build_status(
@@ -153,6 +164,48 @@ def prepare_build(
     )
 
 
+def cancel_queued_builds(version):
+    """
+    Cancel the builds of ``version`` that are still waiting to be picked up.
+
+    Only builds in ``triggered`` state are cancelled: a build already running
+    is left untouched, so there is at most one queued and one running build
+    per version. The cancelled builds are marked as ``finished`` and their
+    Celery task exits as soon as it starts
+    (see ``UpdateDocsTaskStep.run``).
+
+    :param version: version whose queued builds are superseded
+    :returns: number of cancelled builds
+    :rtype: int
+    """
+    # Avoid circular import
+    from readthedocs.builds.models import Build
+
+    cancelled = Build.objects.filter(
+        version=version,
+        state=BUILD_STATE_TRIGGERED,
+    ).update(
+        state=BUILD_STATE_FINISHED,
+        success=False,
+        error=_(
+            'This build was cancelled because a newer build '
+            'of the same version was triggered.',
+        ),
+    )
+    if cancelled:
+        log.info(
+            'Coalesced queued builds: project=%s version=%s builds=%s',
+            version.project.slug,
+            version.slug,
+            cancelled,
+        )
+        # ``add`` is a no-op when the key exists, ``incr`` is atomic on the
+        # shared cache backends
+        cache.add(COALESCED_BUILDS_CACHE_KEY, 0, timeout=None)
+        cache.incr(COALESCED_BUILDS_CACHE_KEY, cancelled)
+    return cancelled
+
+
 def trigger_build(project, version=None, commit=None, record=True, force=False):
     """
     Trigger a Build.
@@ -0,0 +1,48 @@
+"""Buffer collecting items to process them in batches."""
+
+import threading
+
+
+class BatchBuffer:
+
+    """
+    Buffers the items added by the process to pass them to a function in batches.
+
+    The buffered items are passed to ``flush_func`` when there are ``size`` of
+    them, or ``timeout`` seconds after the first of them was buffered.
+    """
+
+    def __init__(self, flush_func, size, timeout):
+        self.flush_func = flush_func
+        self.size = size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._items = []
+        self._timer = None
+
+    def add(self, item):
+        """Buffers an item, flushing the buffer if it is full."""
+        with self._lock:
+            self._items.append(item)
+            if len(self._items) < self.size:
+                if self._timer is None:
+                    self._timer = threading.Timer(self.timeout, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+            items = self._take()
+        self.flush_func(items)
+
+    def flush(self):
+        """Passes the buffered items, if any, to ``flush_func``."""
+        with self._lock:
+            items = self._take()
+        if items:
+            self.flush_func(items)
+
+    def _take(self):
+        items, self._items = self._items, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return items
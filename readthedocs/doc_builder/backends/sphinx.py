@@ -116,7 +116,9 @@ class BaseSphinx(BaseBuilder):
             downloads = self.version.get_downloads(pretty=True)
         else:
             versions = self.project.api_versions()
-            downloads = api.version(self.version.pk).get()['downloads']
+            downloads = getattr(self.version, 'downloads', None)
+            if downloads is None:
+                downloads = api.version(self.version.pk).get()['downloads']
 
         data = {
             'html_theme': 'sphinx_rtd_theme',
@@ -29,6 +29,11 @@ DOCKER_LIMITS = {'memory': '200m', 'time': 600}
 DOCKER_LIMITS.update(settings.DOCKER_LIMITS)
 
 DOCKER_TIMEOUT_EXIT_CODE = 42
+# Exit code of ``timeout`` when the command it runs times out
+DOCKER_COMMAND_TIMEOUT_EXIT_CODE = 124
 DOCKER_OOM_EXIT_CODE = 137
 
 DOCKER_HOSTNAME_MAX_LEN = 64
+
+# Seconds to wait for the thread sampling the container stats to stop
+DOCKER_STATS_JOIN_TIMEOUT = 5
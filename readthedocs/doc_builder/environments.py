@@ -1,20 +1,33 @@
 """Documentation Builder Environments."""
 
+import gzip
+import hashlib
+import json
 import logging
 import os
 import re
+import resource
 import socket
 import subprocess
 import sys
+import tempfile
+import threading
+import time
 import traceback
+import uuid
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
+from functools import partial
 
 from django.conf import settings
+from django.core.files.storage import get_storage_class
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.translation import ugettext_lazy as _
 from docker import APIClient
 from docker.errors import APIError as DockerAPIError
 from docker.errors import DockerException
-from requests.exceptions import ConnectionError
+from requests.exceptions import ConnectionError, RequestException
 from requests_toolbelt.multipart.encoder import MultipartEncoder
 from slumber.exceptions import HttpClientError
 
@@ -26,11 +39,13 @@ from readthedocs.projects.constants import LOG_TEMPLATE
 from readthedocs.projects.models import Feature
 
 from .constants import (
+    DOCKER_COMMAND_TIMEOUT_EXIT_CODE,
     DOCKER_HOSTNAME_MAX_LEN,
     DOCKER_IMAGE,
     DOCKER_LIMITS,
     DOCKER_OOM_EXIT_CODE,
     DOCKER_SOCKET,
+    DOCKER_STATS_JOIN_TIMEOUT,
     DOCKER_TIMEOUT_EXIT_CODE,
     DOCKER_VERSION,
 )
@@ -51,13 +66,83 @@ log = logging.getLogger(__name__)
 
 __all__ = (
     'api_v2',
+    'BuildCommandOutput',
     'BuildCommand',
     'DockerBuildCommand',
     'LocalEnvironment',
     'LocalBuildEnvironment',
+    'DockerContainerPool',
     'DockerBuildEnvironment',
 )
 
+# Docker image hashes by image name, with their expiration time
+_image_hashes = {}
+
+
+class BuildCommandOutput:
+
+    """
+    Bounded buffer for the output of a running command.
+
+    Only the last ``tail_size`` bytes are kept in memory, the whole output is
+    written gzip compressed to a temporary file so it can be stored outside
+    the database once the command finishes.
+
+    :param tail_size: number of bytes of output to keep in memory
+    """
+
+    CHUNK_SIZE = 4096
+
+    def __init__(self, tail_size):
+        self.tail_size = tail_size
+        self.chunks = deque()
+        self.tail_length = 0
+        self.length = 0
+        self.file = tempfile.TemporaryFile()
+        self.compressed = gzip.GzipFile(fileobj=self.file, mode='wb')
+
+    def write(self, data):
+        """Append ``data`` to the output, dropping the oldest chunks."""
+        if not data:
+            return
+        self.compressed.write(data)
+        self.length += len(data)
+        self.chunks.append(data)
+        self.tail_length += len(data)
+        while self.tail_length - len(self.chunks[0]) >= self.tail_size:
+            self.tail_length -= len(self.chunks.popleft())
+
+    @property
+    def truncated(self):
+        """Whether the output doesn't fit in the tail."""
+        return self.length > self.tail_size
+
+    def tail(self):
+        """Return the last ``tail_size`` bytes of the output."""
+        return b''.join(self.chunks)[-self.tail_size:]
+
+    def close(self):
+        """
+        Finish the compressed output.
+
+        The temporary file is kept only when the output doesn't fit in the
+        tail, the only case it has to be stored.
+
+        :returns: the compressed output file, ready to be read, or ``None``
+        """
+        if not self.compressed.closed:
+            self.compressed.close()
+            if self.truncated:
+                self.file.seek(0)
+            else:
+                self.file.close()
+        return None if self.file.closed else self.file
+
+    def discard(self):
+        """Finish the compressed output and remove it."""
+        self.close()
+        self.file.close()
+
 
 class BuildCommand(BuildCommandResultMixin):
 
@@ -81,6 +166,8 @@ class BuildCommand(BuildCommandResultMixin):
     :param build_env: build environment to use to execute commands
     :param bin_path: binary path to add to PATH resolution
     :param description: a more grokable description of the command being run
+    :param stream_output: read the output incrementally through a bounded
+        buffer instead of holding it all in memory
     :param kwargs: allow to subclass this class and extend it
     """
 
@@ -96,6 +183,7 @@ class BuildCommand(BuildCommandResultMixin):
             bin_path=None,
             description=None,
             record_as_success=False,
+            stream_output=False,
             **kwargs,
     ):
         self.command = command
@@ -123,6 +211,16 @@ class BuildCommand(BuildCommandResultMixin):
             self.description = description
         self.record_as_success = record_as_success
         self.exit_code = None
+        # Id of the API result, once the output is saved while still running
+        self.pk = None
+
+        # Stream the output through a bounded buffer instead of holding it
+        # all in memory until the command exits
+        self.output_buffer = None
+        if stream_output:
+            self.output_buffer = BuildCommandOutput(
+                settings.RTD_BUILD_COMMAND_OUTPUT_TAIL,
+            )
 
     def __str__(self):
         # TODO do we want to expose the full command here?
@@ -149,6 +247,9 @@ class BuildCommand(BuildCommandResultMixin):
             stdin = subprocess.PIPE
         if self.combine_output:
             stderr = subprocess.STDOUT
+        elif self.output_buffer is not None:
+            # Reading from two pipes could deadlock, spool STDERR to a file
+            stderr = tempfile.TemporaryFile()
 
         environment = {}
         environment.update(self.environment)
@@ -191,10 +292,14 @@ class BuildCommand(BuildCommandResultMixin):
                 cmd_input_bytes = cmd_input.encode('utf-8')
             else:
                 cmd_input_bytes = cmd_input
-            cmd_output = proc.communicate(input=cmd_input_bytes)
-            (cmd_stdout, cmd_stderr) = cmd_output
-            self.output = self.sanitize_output(cmd_stdout)
-            self.error = self.sanitize_output(cmd_stderr)
+
+            if self.output_buffer is not None:
+                self.run_streamed(proc, cmd_input_bytes, stderr)
+            else:
+                cmd_output = proc.communicate(input=cmd_input_bytes)
+                (cmd_stdout, cmd_stderr) = cmd_output
+                self.output = self.sanitize_output(cmd_stdout)
+                self.error = self.sanitize_output(cmd_stderr)
             self.exit_code = proc.returncode
         except OSError:
             self.error = traceback.format_exc()
@@ -202,6 +307,61 @@ class BuildCommand(BuildCommandResultMixin):
             self.exit_code = -1
         finally:
             self.end_time = datetime.utcnow()
+            if self.output_buffer is not None:
+                self.output_buffer.close()
+            if not isinstance(stderr, int):
+                stderr.close()
+
+    def run_streamed(self, proc, cmd_input_bytes, stderr):
+        """
+        Read the output of ``proc`` incrementally while it runs.
+
+        Each chunk goes through ``output_buffer`` and gives the build
+        environment a chance to flush the recorded commands to the API.
+        """
+        writer = None
+        if cmd_input_bytes is not None:
+            # The command could fill the output pipe before reading all its
+            # input, the input is written while the output is read
+            writer = threading.Thread(
+                target=self.write_input,
+                args=(proc.stdin, cmd_input_bytes),
+                daemon=True,
+            )
+            writer.start()
+        read = partial(proc.stdout.read1, BuildCommandOutput.CHUNK_SIZE)
+        for chunk in iter(read, b''):
+            self.output_buffer.write(chunk)
+            if self.build_env is not None:
+                self.build_env.flush_commands(running=self)
+        proc.wait()
+        if writer is not None:
+            writer.join()
+        self.output = self.sanitize_output(self.get_output_tail())
+        if not self.combine_output:
+            stderr.seek(0)
+            self.error = self.sanitize_output(stderr.read())
+
+    @staticmethod
+    def write_input(stdin, data):
+        """Write ``data`` to the command, which may exit without reading it."""
+        try:
+            stdin.write(data)
+            stdin.close()
+        except BrokenPipeError:
+            pass
+
+    def get_output_tail(self):
+        """Return the tail of the streamed output, noting any truncation."""
+        tail = self.output_buffer.tail()
+        if self.output_buffer.truncated:
+            tail = (
+                'Output is too long, showing only the last {} bytes. '
+                'The full output is kept in the build storage.\n\n'.format(
+                    self.output_buffer.tail_size,
+                ).encode('utf-8') + tail
+            )
+        return tail
 
     def sanitize_output(self, output):
         r"""
@@ -255,8 +415,8 @@ class BuildCommand(BuildCommandResultMixin):
             return ' '.join(self.command)
         return self.command
 
-    def save(self):
-        """Save this command and result via the API."""
+    def get_data(self):
+        """Return the API representation of this command and result."""
         # Force record this command as success to avoid Build reporting errors
         # on commands that are just for checking purposes and do not interferes
         # in the Build
@@ -264,7 +424,7 @@ class BuildCommand(BuildCommandResultMixin):
             log.warning('Recording command exit_code as success')
             self.exit_code = 0
 
-        data = {
+        return {
             'build': self.build_env.build.get('id'),
             'command': self.get_command(),
             'description': self.description,
@@ -274,24 +434,65 @@ class BuildCommand(BuildCommandResultMixin):
             'end_time': self.end_time,
         }
 
+    def get_partial_data(self):
+        """Return the API representation of this command while it's running."""
+        return {
+            'build': self.build_env.build.get('id'),
+            'command': self.get_command(),
+            'description': self.description,
+            'output': self.sanitize_output(self.get_output_tail()),
+            'exit_code': None,
+            'start_time': self.start_time,
+            'end_time': datetime.utcnow(),
+        }
+
+    def save(self):
+        """Save this command and result via the API."""
+        self.post_data(self.get_data())
+
+    def save_partial(self):
+        """Save the output of this command so far, while it's running."""
+        resp = self.post_data(self.get_partial_data())
+        if self.pk is None:
+            self.pk = resp.get('id')
+
+    def post_data(self, data):
+        """
+        Post ``data`` to the API.
+
+        The API result is updated if the output of the command was already
+        saved while it was running.
+
+        :returns: the decoded response
+        """
+        url = '/'
+        if self.pk is not None:
+            url = '/{}/'.format(self.pk)
         if self.build_env.project.has_feature(Feature.API_LARGE_DATA):
             # Don't use slumber directly here. Slumber tries to enforce a string,
             # which will break our multipart encoding here.
-            encoder = MultipartEncoder(
-                {key: str(value) for key, value in data.items()}
-            )
+            encoder = MultipartEncoder({
+                key: str(value)
+                for key, value in data.items() if value is not None
+            })
             resource = api_v2.command
-            resp = resource._store['session'].post(
-                resource._store['base_url'] + '/',
+            resp = resource._store['session'].request(
+                'POST' if self.pk is None else 'PATCH',
+                resource._store['base_url'] + url,
                 data=encoder,
                 headers={
                     'Content-Type': encoder.content_type,
                 }
             )
             log.debug('Post response via multipart form: %s', resp)
-        else:
+            return resp.json() if resp.ok else {}
+
+        if self.pk is None:
             resp = api_v2.command.post(data)
-            log.debug('Post response via JSON encoded data: %s', resp)
+        else:
+            resp = api_v2.command(self.pk).patch(data)
+        log.debug('Post response via JSON encoded data: %s', resp)
+        return resp
 
 
 class DockerBuildCommand(BuildCommand):
@@ -302,7 +503,7 @@ class DockerBuildCommand(BuildCommand):
     Build command to execute in docker container
     """
 
-    def __init__(self, *args, escape_command=True, **kwargs):
+    def __init__(self, *args, escape_command=True, deadline=None, **kwargs):
         """
         Override default to extend behavior.
 
@@ -310,8 +511,11 @@ class DockerBuildCommand(BuildCommand):
             executing it in the container. This should only be disabled on
             trusted or internal commands.
         :type escape_command: bool
+        :param deadline: ``time.monotonic()`` value the command is killed at,
+            for containers that outlive the build time limit
         """
         self.escape_command = escape_command
+        self.deadline = deadline
         super(DockerBuildCommand, self).__init__(*args, **kwargs)
 
     def run(self):
@@ -325,19 +529,42 @@ class DockerBuildCommand(BuildCommand):
 
         self.start_time = datetime.utcnow()
         client = self.build_env.get_client()
+        cmd = self.get_wrapped_command()
+        if self.deadline is not None:
+            # ``timeout 0`` would never kill the command
+            cmd = 'timeout {} {}'.format(
+                max(1, int(self.deadline - time.monotonic())),
+                cmd,
+            )
         try:
             exec_cmd = client.exec_create(
                 container=self.build_env.container_id,
-                cmd=self.get_wrapped_command(),
+                cmd=cmd,
                 stdout=True,
                 stderr=True,
             )
 
-            cmd_output = client.exec_start(exec_id=exec_cmd['Id'], stream=False)
-            self.output = self.sanitize_output(cmd_output)
+            if self.output_buffer is not None:
+                for chunk in client.exec_start(exec_id=exec_cmd['Id'], stream=True):
+                    self.output_buffer.write(chunk)
+                    self.build_env.flush_commands(running=self)
+                self.output = self.sanitize_output(self.get_output_tail())
+            else:
+                cmd_output = client.exec_start(exec_id=exec_cmd['Id'], stream=False)
+                self.output = self.sanitize_output(cmd_output)
             cmd_ret = client.exec_inspect(exec_id=exec_cmd['Id'])
             self.exit_code = cmd_ret['ExitCode']
 
+            if (
+                self.deadline is not None and
+                self.exit_code == DOCKER_COMMAND_TIMEOUT_EXIT_CODE and
+                time.monotonic() >= self.deadline
+            ):
+                # Report it as the time out of a container that isn't reused
+                self.exit_code = DOCKER_TIMEOUT_EXIT_CODE
+                self.build_env.timed_out = True
+                self.output += str(_('\n\nCommand killed due to time out\n'))
+
             # Docker will exit with a special exit code to signify the command
             # was killed due to memory usage, make the error code
             # nicer. Sometimes the kernel kills the command and Docker doesn't
@@ -361,6 +588,8 @@ class DockerBuildCommand(BuildCommand):
                 self.output = _('Command exited abnormally')
         finally:
             self.end_time = datetime.utcnow()
+            if self.output_buffer is not None:
+                self.output_buffer.close()
 
     def get_wrapped_command(self):
         """
@@ -459,6 +688,10 @@ class BaseEnvironment:
         build_cmd = cls(cmd, **kwargs)
         build_cmd.run()
 
+        if not record and getattr(build_cmd, 'output_buffer', None) is not None:
+            # The full output is only stored for the recorded commands
+            build_cmd.output_buffer.discard()
+
         if record:
             # TODO: I don't like how it's handled this entry point here since
             # this class should know nothing about a BuildCommand (which are the
@@ -561,11 +794,20 @@ class BuildEnvironment(BaseEnvironment):
         self.failure = None
         self.start_time = datetime.utcnow()
 
+        # Commands are posted in batches when streaming their output
+        self.stream_output = (
+            self.project is not None and
+            self.project.has_feature(Feature.STREAM_BUILD_OUTPUT)
+        )
+        self.pending_commands = []
+        self.last_flush = time.monotonic()
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, tb):
         ret = self.handle_exception(exc_type, exc_value, tb)
+        self.flush_commands(force=True)
         self.update_build(BUILD_STATE_FINISHED)
         log.info(
             LOG_TEMPLATE,
@@ -622,8 +864,176 @@ class BuildEnvironment(BaseEnvironment):
             )
             return True
 
+    @contextmanager
+    def phase(self, name):
+        """
+        Record the wall time and resource usage of a build phase.
+
+        The record is appended to ``build['phases']`` and saved with the next
+        ``update_build``::
+
+            with build_env.phase('html'):
+                builder.build()
+
+        :param name: name of the phase, e.g. ``vcs`` or ``html``
+        """
+        start = datetime.utcnow()
+        usage = self.get_resource_usage()
+        try:
+            yield
+        finally:
+            end_usage = self.get_resource_usage()
+            record = {
+                'name': name,
+                'start': start.isoformat(),
+                'length': (datetime.utcnow() - start).total_seconds(),
+                'cpu': None,
+                'memory': None,
+            }
+            if usage is not None and end_usage is not None:
+                record['cpu'] = round(end_usage['cpu'] - usage['cpu'], 3)
+                record['memory'] = end_usage['memory']
+            if self.build is not None:
+                self.build.setdefault('phases', []).append(record)
+
+    def get_resource_usage(self):
+        """
+        Return the resources used so far by the build commands.
+
+        :returns: a dict with the CPU time in seconds (``cpu``) and the peak
+            memory in bytes (``memory``), ``None`` when it's not available
+        """
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        # Peak memory of the children is not tied to this build, skip it
+        return {
+            'cpu': usage.ru_utime + usage.ru_stime,
+            'memory': None,
+        }
+
     def record_command(self, command):
-        command.save()
+        if self.stream_output:
+            self.store_command_output(command, index=len(self.commands))
+            self.pending_commands.append(command)
+            self.flush_commands()
+        else:
+            command.save()
+
+    def flush_commands(self, force=False, running=None):
+        """
+        Post the pending commands to the API.
+
+        Commands are flushed at most every
+        ``RTD_BUILD_COMMANDS_FLUSH_INTERVAL`` seconds, unless ``force`` is
+        passed. The output of the ``running`` command so far is saved too, so
+        it's shown while the build runs. The full output of the commands that
+        didn't fit in the database is stored compressed in the build storage.
+
+        :param running: command still running, flushing while it reads its output
+        """
+        if not self.pending_commands and running is None:
+            return
+        interval = settings.RTD_BUILD_COMMANDS_FLUSH_INTERVAL
+        if not force and time.monotonic() - self.last_flush < interval:
+            return
+
+        commands = self.pending_commands
+        self.pending_commands = []
+        self.last_flush = time.monotonic()
+        self.post_commands(commands)
+        if running is not None:
+            self.save_command(running, partial=True)
+
+    def post_commands(self, commands):
+        """
+        Post the finished ``commands`` to the API in batches.
+
+        Every batch is kept under ``DATA_UPLOAD_MAX_MEMORY_SIZE``, and if a
+        batch fails its commands are posted one at a time. The commands saved
+        while running, and all of them with the ``API_LARGE_DATA`` feature,
+        are posted one at a time.
+        """
+        large_data = self.project.has_feature(Feature.API_LARGE_DATA)
+        batch = []
+        batch_size = 0
+        for command in commands:
+            if large_data or command.pk is not None:
+                self.save_command(command)
+                continue
+            data = command.get_data()
+            # The list separators of the request body are counted too
+            size = len(json.dumps(data, cls=DjangoJSONEncoder)) + 2
+            if batch and batch_size + size > settings.DATA_UPLOAD_MAX_MEMORY_SIZE:
+                self.post_command_batch(batch)
+                batch = []
+                batch_size = 0
+            batch.append((command, data))
+            batch_size += size
+        if batch:
+            self.post_command_batch(batch)
+
+    def post_command_batch(self, batch):
+        """Post a batch of ``(command, data)`` pairs in a single request."""
+        try:
+            api_v2.command.post([data for _, data in batch])
+        except Exception:
+            log.warning(
+                'Unable to save build commands in batch, saving them one at a time: build=%s',
+                self.build.get('id'),
+                exc_info=True,
+            )
+            for command, _ in batch:
+                self.save_command(command)
+
+    def save_command(self, command, partial=False):
+        """
+        Save a single command, logging the failure.
+
+        :param partial: save the output of the command while it's running
+        """
+        try:
+            if partial:
+                command.save_partial()
+            else:
+                command.save()
+        except Exception:
+            log.exception(
+                'Unable to save build command: build=%s command=%s',
+                self.build.get('id'),
+                command.get_command(),
+            )
+
+    def store_command_output(self, command, index):
+        """
+        Store the full output of ``command`` in the build storage.
+
+        Only the output that doesn't fit in the database is stored.
+
+        :param command: the command that just finished
+        :param index: position of the command in the build
+        """
+        output = command.output_buffer
+        if output is None:
+            return
+        output_file = output.close()
+        if output_file is None:
+            return
+        try:
+            if settings.RTD_BUILD_MEDIA_STORAGE:
+                storage = get_storage_class(settings.RTD_BUILD_MEDIA_STORAGE)()
+                path = os.path.join(
+                    'build_logs',
+                    self.project.slug,
+                    str(self.build.get('id')),
+                    '{}.log.gz'.format(index),
+                )
+                storage.save(path, output_file)
+        except Exception:
+            log.exception(
+                'Unable to store build command output: build=%s',
+                self.build.get('id'),
+            )
+        finally:
+            output_file.close()
 
     def run(self, *cmd, **kwargs):
         kwargs.update({
@@ -634,6 +1044,7 @@ class BuildEnvironment(BaseEnvironment):
     def run_command_class(self, *cmd, **kwargs):  # pylint: disable=arguments-differ
         kwargs.update({
             'build_env': self,
+            'stream_output': self.stream_output,
         })
         return super().run_command_class(*cmd, **kwargs)
 
@@ -768,6 +1179,95 @@ class LocalBuildEnvironment(BuildEnvironment):
     command_class = BuildCommand
 
 
+class DockerContainerPool:
+
+    """
+    Idle build containers kept on the builder to reuse them in later builds.
+
+    Bind mounts and environment of a container can't change once it's
+    created, so a container is only reused by builds with the same image,
+    memory limit, mounts and environment (e.g. another build of the same
+    project version). Idle containers are recognized by their name,
+    ``pool-<key>-<id>``. A build claims an idle container by renaming it,
+    which is atomic in the Docker daemon, so all the workers of a builder
+    share the same pool.
+
+    :param client: Docker API client
+    :param config: dict with the parameters used to create the containers
+    """
+
+    EXPIRES_LABEL = 'org.readthedocs.pool.expires'
+
+    def __init__(self, client, config):
+        self.client = client
+        key = hashlib.sha1(
+            json.dumps(config, sort_keys=True, default=str).encode('utf-8'),
+        ).hexdigest()[:12]
+        self.prefix = 'pool-{}-'.format(key)
+
+    def containers(self, status):
+        """Return the pool containers with ``status``, as Docker reports them."""
+        containers = self.client.containers(
+            all=True,
+            filters={'name': self.prefix, 'status': status},
+        )
+        return [
+            container for container in containers
+            if any(
+                name.lstrip('/').startswith(self.prefix)
+                for name in container.get('Names', [])
+            )
+        ]
+
+    def acquire(self, name, min_lifetime):
+        """
+        Claim an idle container and rename it to ``name``.
+
+        :param name: name of the container for the build
+        :param min_lifetime: seconds the container has to keep running
+        :returns: whether an idle container was claimed
+        """
+        now = time.time()
+        for container in self.containers('running'):
+            expires = int(container.get('Labels', {}).get(self.EXPIRES_LABEL, 0))
+            if expires - now < min_lifetime:
+                # It would exit in the middle of the build
+                continue
+            try:
+                self.client.rename(container['Id'], name)
+            except DockerAPIError:
+                # Another build claimed it first
+                continue
+            log.info('Reusing pooled container: id=%s', container['Id'])
+            return True
+        return False
+
+    def release(self, name):
+        """
+        Put the container ``name`` back into the pool.
+
+        :returns: whether the container was added to the pool, if it wasn't
+            the caller should remove it
+        """
+        self.prune()
+        if len(self.containers('running')) >= settings.DOCKER_CONTAINER_POOL_SIZE:
+            return False
+        try:
+            self.client.rename(name, self.prefix + uuid.uuid4().hex[:8])
+        except DockerAPIError:
+            log.exception('Unable to pool container: id=%s', name)
+            return False
+        return True
+
+    def prune(self):
+        """Remove the pool containers that exited after their lifetime."""
+        for container in self.containers('exited'):
+            try:
+                self.client.remove_container(container['Id'])
+            except DockerAPIError:
+                log.warning('Unable to remove pooled container: id=%s', container['Id'])
+
+
 class DockerBuildEnvironment(BuildEnvironment):
 
     """
@@ -794,6 +1294,16 @@ class DockerBuildEnvironment(BuildEnvironment):
         super().__init__(*args, **kwargs)
         self.client = None
         self.container = None
+        self.pool = None
+        self.reused = False
+        self.stats = None
+        self.memory_peak = None
+        self.stats_stop = threading.Event()
+        self.stats_thread = None
+        # Pooled containers outlive the build, its time limit is enforced on
+        # every command instead
+        self.deadline = None
+        self.timed_out = False
         self.container_name = slugify(
             'build-{build}-project-{project_id}-{project_name}'.format(
                 build=self.build.get('id'),
@@ -867,19 +1377,49 @@ class DockerBuildEnvironment(BuildEnvironment):
             os.makedirs(self.project.doc_path)
 
         try:
-            self.create_container()
+            if settings.DOCKER_CONTAINER_POOL_SIZE:
+                self.pool = DockerContainerPool(
+                    self.get_client(),
+                    self.get_container_pool_config(),
+                )
+                self.deadline = time.monotonic() + int(self.container_time_limit)
+            self.reused = self.pool is not None and self.pool.acquire(
+                self.container_id,
+                int(self.container_time_limit),
+            )
+            if not self.reused:
+                self.create_container()
         except:  # noqa
             self.__exit__(*sys.exc_info())
             raise
+        self.stats_thread = threading.Thread(target=self.sample_stats, daemon=True)
+        self.stats_thread.start()
         return self
 
     def __exit__(self, exc_type, exc_value, tb):
         """End of environment context."""
+        self.stats_stop.set()
+        if self.stats_thread is not None:
+            # Docker streams the stats every second, the thread stops at the
+            # next sample or when the container is removed
+            self.stats_thread.join(timeout=DOCKER_STATS_JOIN_TIMEOUT)
+            self.stats_thread = None
         try:
             # Update buildenv state given any container error states first
             self.update_build_from_container_state()
 
             client = self.get_client()
+            # Only containers of builds without top level failures are reused,
+            # a failure could have left the container in a broken state
+            if (
+                self.pool is not None and
+                exc_type is None and
+                self.failure is None and
+                self.pool.release(self.container_id)
+            ):
+                self.container = None
+                return super().__exit__(exc_type, exc_value, tb)
+
             try:
                 client.kill(self.container_id)
             except DockerAPIError:
@@ -912,6 +1452,11 @@ class DockerBuildEnvironment(BuildEnvironment):
 
         return super().__exit__(exc_type, exc_value, tb)
 
+    def run_command_class(self, *cmd, **kwargs):  # pylint: disable=arguments-differ
+        if self.deadline is not None:
+            kwargs['deadline'] = self.deadline
+        return super().run_command_class(*cmd, **kwargs)
+
     def get_client(self):
         """Create Docker client connection."""
         try:
@@ -951,6 +1496,13 @@ class DockerBuildEnvironment(BuildEnvironment):
         The object returned is passed to Docker function
         ``client.create_container``.
         """
+        return self.get_client().create_host_config(
+            binds=self.get_container_binds(),
+            mem_limit=self.container_mem_limit,
+        )
+
+    def get_container_binds(self):
+        """Return the host paths mounted in the container."""
         binds = {
             self.project.doc_path: {
                 'bind': self.project.doc_path,
@@ -965,17 +1517,77 @@ class DockerBuildEnvironment(BuildEnvironment):
                     'mode': 'rw',
                 },
             })
-        return self.get_client().create_host_config(
-            binds=binds,
-            mem_limit=self.container_mem_limit,
-        )
+        return binds
+
+    def sample_stats(self):
+        """
+        Keep the latest stats of the container, streamed by Docker every second.
+
+        A single sample takes Docker a couple of seconds, so the phases read
+        the stats sampled in background instead of asking for them.
+        """
+        client = None
+        try:
+            # The client of the build commands isn't shared with this thread
+            client = APIClient(base_url=self.docker_socket, version=DOCKER_VERSION)
+            for stats in client.stats(self.container_id, decode=True, stream=True):
+                if self.stats_stop.is_set():
+                    break
+                usage = stats.get('memory_stats', {}).get('usage')
+                if usage is not None:
+                    self.memory_peak = max(self.memory_peak or 0, usage)
+                self.stats = stats
+        except (DockerException, RequestException):
+            log.warning('Unable to get container stats: id=%s', self.container_id)
+        finally:
+            if client is not None:
+                client.close()
+
+    def get_resource_usage(self):
+        """Return the resources used by the container from the latest stats sampled."""
+        stats = self.stats
+        if stats is None:
+            return None
+        cpu_usage = stats.get('cpu_stats', {}).get('cpu_usage', {})
+        memory_stats = stats.get('memory_stats', {})
+        memory = memory_stats.get('max_usage', memory_stats.get('usage'))
+        if self.reused:
+            # The peak recorded by Docker includes the builds that ran
+            # earlier in the pooled container, use the one sampled instead
+            memory = self.memory_peak
+        return {
+            # Docker reports the CPU time in nanoseconds
+            'cpu': cpu_usage.get('total_usage', 0) / 10 ** 9,
+            'memory': memory,
+        }
+
+    def get_container_pool_config(self):
+        """Return the parameters that make a pooled container reusable."""
+        return {
+            'image': self.container_image,
+            'binds': self.get_container_binds(),
+            'mem_limit': self.container_mem_limit,
+            'environment': self.environment,
+        }
 
     @property
     def image_hash(self):
-        """Return the hash of the Docker image."""
-        client = self.get_client()
-        image_metadata = client.inspect_image(self.container_image)
-        return image_metadata.get('Id')
+        """
+        Return the hash of the Docker image.
+
+        The hash is cached for ``DOCKER_IMAGE_HASH_CACHE_TIME`` seconds, images
+        are only re-tagged when the builders are updated.
+        """
+        image_hash, expires = _image_hashes.get(self.container_image, (None, 0))
+        if expires < time.monotonic():
+            client = self.get_client()
+            image_metadata = client.inspect_image(self.container_image)
+            image_hash = image_metadata.get('Id')
+            _image_hashes[self.container_image] = (
+                image_hash,
+                time.monotonic() + settings.DOCKER_IMAGE_HASH_CACHE_TIME,
+            )
+        return image_hash
 
     @property
     def container_id(self):
@@ -1002,8 +1614,14 @@ class DockerBuildEnvironment(BuildEnvironment):
         In the case of the parent command exiting before the exec commands
         finish and the container is destroyed, or in the case of OOM on the
         container, set a failure state and error message explaining the failure
-        on the buildenv.
+        on the buildenv. Pooled containers keep running, a command killed at
+        the build deadline sets the same failure as the container time out.
         """
+        if self.timed_out:
+            self.failure = BuildEnvironmentError(
+                _('Build exited due to time out'),
+            )
+            return
         state = self.container_state()
         if state is not None and state.get('Running') is False:
             if state.get('ExitCode') == DOCKER_TIMEOUT_EXIT_CODE:
@@ -1029,11 +1647,20 @@ class DockerBuildEnvironment(BuildEnvironment):
                 'Creating Docker container: image=%s',
                 self.container_image,
             )
+            time_limit = self.container_time_limit
+            labels = None
+            if self.pool is not None:
+                # Pooled containers outlive the build, the build time limit
+                # is enforced by the commands instead
+                time_limit = settings.DOCKER_CONTAINER_POOL_LIFETIME
+                labels = {
+                    DockerContainerPool.EXPIRES_LABEL: str(int(time.time() + time_limit)),
+                }
             self.container = client.create_container(
                 image=self.container_image,
                 command=(
                     '/bin/sh -c "sleep {time}; exit {exit}"'.format(
-                        time=self.container_time_limit,
+                        time=time_limit,
                         exit=DOCKER_TIMEOUT_EXIT_CODE,
                     )
                 ),
@@ -1042,6 +1669,7 @@ class DockerBuildEnvironment(BuildEnvironment):
                 host_config=self.get_container_host_config(),
                 detach=True,
                 environment=self.environment,
+                labels=labels,
             )
             client.start(container=self.container_id)
         except ConnectionError:
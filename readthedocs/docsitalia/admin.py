@@ -5,7 +5,7 @@ from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
 from .forms import PublisherAdminForm
-from .models import AllowedTag, Publisher, PublisherProject, ProjectOrder
+from .models import AllowedTag, Publisher, PublisherProject, ProjectOrder, PublishedDocument
 
 
 class PublisherAdmin(admin.ModelAdmin):
@@ -69,7 +69,21 @@ class ProjectOrderAdmin(admin.ModelAdmin):
     list_editable = ('priority', )
 
 
+class PublishedDocumentAdmin(admin.ModelAdmin):
+
+    """Read only admin view for :py:class:`PublishedDocument`."""
+
+    list_display = ('project', 'publisher', 'publisher_project', 'priority', 'modified_date')
+    list_filter = ('publisher',)
+    raw_id_fields = ('project', 'build')
+    readonly_fields = (
+        'project', 'publisher', 'publisher_project', 'build', 'priority',
+        'priority_date', 'tags',
+    )
+
+
 admin.site.register(ProjectOrder, ProjectOrderAdmin)
+admin.site.register(PublishedDocument, PublishedDocumentAdmin)
 admin.site.register(Publisher, PublisherAdmin)
 admin.site.register(PublisherProject, PublisherProjectAdmin)
 admin.site.register(AllowedTag, AllowedTagAdmin)
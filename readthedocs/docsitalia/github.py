@@ -2,27 +2,88 @@
 
 from __future__ import absolute_import
 
+import hashlib
 from urllib.parse import urlparse
 
 import requests
+from django.core.cache import cache
 from django.utils.encoding import force_text
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
 
 from readthedocs.docsitalia.metadata import (
     SETTINGS_VALIDATORS, DOCUMENT_SETTINGS, InvalidMetadata
 )
+from readthedocs.docsitalia.utils import get_allowed_tags_version
 
 
 RAW_GITHUB_BASE_URL = (
     'https://raw.githubusercontent.com/{org}/{repo}/master/{path}'
 )
+METADATA_CACHE_KEY = 'docsitalia:metadata:{}'
+METADATA_CACHE_TIME = 60 * 60 * 24 * 7
+# seconds to wait for GitHub and retries of failed requests
+METADATA_TIMEOUT = 10
+METADATA_RETRIES = 3
+
+_session = None
+
+
+def get_session():
+    """Return the session used to fetch metadata when no session is given."""
+    global _session  # pylint: disable=global-statement
+    if _session is None:
+        retries = Retry(
+            total=METADATA_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=(500, 502, 503, 504),
+        )
+        _session = requests.Session()
+        _session.mount('https://', HTTPAdapter(max_retries=retries))
+    return _session
+
+
+def fetch_metadata_file(url, session=None):
+    """
+    Fetch a metadata file, returning its cache entry.
+
+    Requests are conditional on the ETag and Last-Modified of the last
+    response, so an unchanged file is served from the cache together with
+    the metadata already validated from it, see :py:func:`parse_metadata_file`.
+
+    :returns: dict with ``text``, ``etag``, ``last_modified``, ``key`` and
+        ``metadata`` keys
+    """
+    if not session:
+        session = get_session()
+    cache_key = METADATA_CACHE_KEY.format(hashlib.sha1(url.encode()).hexdigest())
+    cached = cache.get(cache_key)
+    headers = {}
+    if cached and cached['etag']:
+        headers['If-None-Match'] = cached['etag']
+    if cached and cached['last_modified']:
+        headers['If-Modified-Since'] = cached['last_modified']
+
+    response = session.get(url, headers=headers, timeout=METADATA_TIMEOUT)
+    if cached and response.status_code == 304:
+        return cached
+
+    entry = {
+        'key': None,
+        'text': response.text,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'metadata': {},
+    }
+    if response.ok and (entry['etag'] or entry['last_modified']):
+        entry['key'] = cache_key
+        cache.set(cache_key, entry, METADATA_CACHE_TIME)
+    return entry
 
 
 def get_metadata_from_url(url, session=None):
     """Gets an url via a requests compatible api."""
-    if not session:
-        session = requests
-    response = session.get(url)
-    return response.text
+    return fetch_metadata_file(url, session=session)['text']
 
 
 def parse_metadata(data, org, model, settings):
@@ -42,14 +103,40 @@ def parse_metadata(data, org, model, settings):
     return metadata
 
 
+def parse_metadata_file(entry, org, model, settings):
+    """
+    Parse metadata for a file fetched with :py:func:`fetch_metadata_file`.
+
+    The validated metadata is stored in the file cache entry, keyed by the
+    values the validation depends on.
+    """
+    context = '{}:{}:{}:{}'.format(
+        settings,
+        getattr(org, 'url', None),
+        getattr(model, 'slug', None),
+        getattr(model, 'config_repo_name', None),
+    )
+    if settings == DOCUMENT_SETTINGS:
+        context += ':{}'.format(get_allowed_tags_version())
+
+    if context in entry['metadata']:
+        return entry['metadata'][context]
+
+    metadata = parse_metadata(entry['text'], org, model, settings)
+    if entry['key']:
+        entry['metadata'][context] = metadata
+        cache.set(entry['key'], entry, METADATA_CACHE_TIME)
+    return metadata
+
+
 def get_metadata_for_publisher(org, publisher, settings, session=None):
     """Fetch and validate publisher metadata for a specific settings file."""
     url = RAW_GITHUB_BASE_URL.format(
         org=org.slug,
         repo=publisher.config_repo_name,
         path=settings)
-    data = get_metadata_from_url(url, session=session)
-    return parse_metadata(data, org, publisher, settings)
+    entry = fetch_metadata_file(url, session=session)
+    return parse_metadata_file(entry, org, publisher, settings)
 
 
 def get_metadata_for_document(document):
@@ -63,5 +150,5 @@ def get_metadata_for_document(document):
         org=org,
         repo=repo,
         path=DOCUMENT_SETTINGS)
-    data = get_metadata_from_url(url)
-    return parse_metadata(data, None, document, DOCUMENT_SETTINGS)
+    entry = fetch_metadata_file(url)
+    return parse_metadata_file(entry, None, document, DOCUMENT_SETTINGS)
@@ -1,8 +1,16 @@
 """Rebuild documentation for all projects."""
 
+import datetime
+import time
+
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db.models import BooleanField, Case, Exists, F, OuterRef, Value, When
+from django.utils import timezone
 
+from readthedocs.builds.constants import BUILD_STATE_FINISHED, BUILD_STATE_TRIGGERED
 from readthedocs.builds.models import Build, Version
+from readthedocs.doc_builder.constants import DOCKER_LIMITS
 from readthedocs.projects.tasks import update_docs_task
 from readthedocs.projects.models import Project
 
@@ -12,7 +20,18 @@ from readthedocs.docsitalia.models import Publisher, PublisherProject
 
 class Command(BaseCommand):
 
-    """Rebuild all projects command."""
+    """
+    Rebuild all projects command.
+
+    Default versions and featured projects are rebuilt first. With ``--async``
+    the builds are enqueued in waves of ``--wave-size`` every
+    ``--wave-interval`` seconds, without exceeding ``--max-concurrency``
+    builds running at once.
+
+    The builds triggered record the ``--fingerprint`` of the theme and the
+    image they use, so that an interrupted rebuild can be resumed skipping the
+    versions already built, or being built, with the same fingerprint.
+    """
 
     help = 'Rebuild projects'
 
@@ -34,6 +53,29 @@ class Command(BaseCommand):
             '--async', action='store_true', default=False,
             help='Run the rebuild tasks async'
         )
+        parser.add_argument(
+            '--wave-size', type=int, default=20,
+            help='Builds enqueued at most in every wave'
+        )
+        parser.add_argument(
+            '--wave-interval', type=int, default=30,
+            help='Seconds between the waves'
+        )
+        parser.add_argument(
+            '--max-concurrency', type=int, default=40,
+            help='Builds running at most at the same time'
+        )
+        parser.add_argument(
+            '--fingerprint', type=str, default='',
+            help='Identifier of the theme in use, e.g. its commit'
+        )
+        parser.add_argument(
+            '--build-timeout', type=int, default=int(DOCKER_LIMITS['time']) * 2,
+            help=(
+                'Seconds after which a build not finished is considered lost, '
+                'by default twice the time limit of the builds'
+            )
+        )
 
     # pylint: disable=too-many-branches
     def handle(self, *args, **options):
@@ -63,18 +105,119 @@ class Command(BaseCommand):
             except Project.DoesNotExist:
                 raise CommandError("Version {} doesn't exist".format(version_slug))
 
-        for version in versions:
-            task = update_docs_task
-            build = Build.objects.create(
-                project=version.project,
-                version=version,
-                type='html',
-                state='triggered',
+        pending = []
+        running = []
+        for version in self.prioritize(versions):
+            build = self.get_previous_build(version, options['fingerprint'])
+            if build is None or (build['state'] == BUILD_STATE_FINISHED and not build['success']):
+                pending.append(version)
+            elif build['state'] != BUILD_STATE_FINISHED:
+                running.append(build['pk'])
+        self.stdout.write('Versions to rebuild: {}'.format(len(pending)))
+
+        if not run_async:
+            for version in pending:
+                build = self.trigger_build(version, options['fingerprint'])
+                update_docs_task.run(version_pk=version.pk, build_pk=build.pk)
+            return
+
+        self.rebuild_in_waves(
+            pending,
+            running,
+            fingerprint=options['fingerprint'],
+            wave_size=options['wave_size'],
+            wave_interval=options['wave_interval'],
+            max_concurrency=options['max_concurrency'],
+            build_timeout=options['build_timeout'],
+        )
+
+    def prioritize(self, versions):
+        """Return the versions, default versions and featured projects first."""
+        featured = PublisherProject.objects.filter(
+            projects=OuterRef('project'),
+            featured=True,
+        )
+        return versions.select_related('project').annotate(
+            is_default=Case(
+                When(slug=F('project__default_version'), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            is_featured=Exists(featured),
+        ).order_by('-is_default', '-is_featured', 'project__slug', 'pk')
+
+    def get_fingerprint(self, version, fingerprint):
+        """Return the fingerprint of the theme and image the version is built with."""
+        image = version.project.container_image or settings.DOCKER_IMAGE
+        return '{}:{}'.format(fingerprint, image)
+
+    def get_previous_build(self, version, fingerprint):
+        """Return the latest build of the version triggered with the same fingerprint."""
+        return Build.objects.filter(
+            version=version,
+            fingerprint=self.get_fingerprint(version, fingerprint),
+        ).order_by('-date').values('pk', 'state', 'success').first()
+
+    def trigger_build(self, version, fingerprint):
+        """Create the build of the version, recording the fingerprint it is built with."""
+        return Build.objects.create(
+            project=version.project,
+            version=version,
+            type='html',
+            state=BUILD_STATE_TRIGGERED,
+            fingerprint=self.get_fingerprint(version, fingerprint),
+        )
+
+    # pylint: disable=too-many-arguments
+    def rebuild_in_waves(
+            self, pending, running, fingerprint, wave_size, wave_interval, max_concurrency,
+            build_timeout,
+    ):
+        """
+        Enqueue the builds of ``pending`` versions in waves, until all of them finish.
+
+        ``running`` are the builds still running from a previous run. Builds
+        created more than ``build_timeout`` seconds ago are considered done, as
+        a stuck build or a lost task would never finish.
+        """
+        start = time.time()
+        total = len(pending) + len(running)
+        finished = 0
+        while pending or running:
+            expired = timezone.now() - datetime.timedelta(seconds=build_timeout)
+            still_running = set(
+                Build.objects.filter(
+                    pk__in=running,
+                    date__gt=expired,
+                ).exclude(
+                    state=BUILD_STATE_FINISHED,
+                ).values_list('pk', flat=True)
             )
-            kwargs = dict(
-                version_pk=version.pk, build_pk=build.pk
+            finished += len(running) - len(still_running)
+            running = [pk for pk in running if pk in still_running]
+
+            wave = pending[:max(0, min(wave_size, max_concurrency - len(running)))]
+            pending = pending[len(wave):]
+            for version in wave:
+                build = self.trigger_build(version, fingerprint)
+                update_docs_task.apply_async(
+                    kwargs=dict(version_pk=version.pk, build_pk=build.pk),
+                    queue='docs',
+                )
+                running.append(build.pk)
+
+            elapsed = time.time() - start
+            throughput = finished / elapsed * 60 if elapsed else 0
+            eta = (total - finished) / throughput if throughput else None
+            self.stdout.write(
+                'Builds: finished={} running={} pending={} '
+                'throughput={:.1f}/min eta={}'.format(
+                    finished,
+                    len(running),
+                    len(pending),
+                    throughput,
+                    '{:.0f}min'.format(eta) if eta is not None else '-',
+                )
             )
-            if run_async:
-                task.apply_async(kwargs=kwargs, queue='docs')
-            else:
-                task.run(**kwargs)
+            if pending or running:
+                time.sleep(wave_interval)
@@ -0,0 +1,20 @@
+"""Rebuild the published documents projection."""
+
+from django.core.management.base import BaseCommand
+
+from readthedocs.projects.models import Project
+
+from ...models import PublishedDocument
+
+
+class Command(BaseCommand):
+
+    """Update the published documents of every project, e.g. after the first deploy."""
+
+    def handle(self, *args, **options):
+        """handle command."""
+        project_pks = list(Project.objects.values_list('pk', flat=True))
+        PublishedDocument.update_projects(project_pks)
+        self.stdout.write(
+            'Published documents: {}'.format(PublishedDocument.objects.count())
+        )
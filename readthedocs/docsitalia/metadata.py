@@ -4,7 +4,7 @@
 from django.utils.text import slugify
 
 from .models import AllowedTag
-from .utils import load_yaml
+from .utils import get_allowed_tags_version, load_yaml
 
 PUBLISHER_SETTINGS = 'publisher_settings.yml'
 PROJECTS_SETTINGS = 'projects_settings.yml'
@@ -19,6 +19,9 @@ RAW_GITHUB_BASE_URL = (
     'https://raw.githubusercontent.com/{org}/{repo}/master/{path}'
 )
 
+# names of the enabled allowed tags, cached in process until a tag is written
+_allowed_tags = {'version': None, 'names': frozenset()}
+
 
 class InvalidMetadata(Exception):
 
@@ -89,8 +92,19 @@ def validate_document_metadata(org, settings, **kwargs): # noqa
     return _remove_invalid_tags(data)
 
 
+def get_allowed_tags():
+    """Return the names of the enabled allowed tags."""
+    version = get_allowed_tags_version()
+    if _allowed_tags['version'] != version:
+        _allowed_tags['names'] = frozenset(
+            AllowedTag.objects.filter(enabled=True).values_list('name', flat=True)
+        )
+        _allowed_tags['version'] = version
+    return _allowed_tags['names']
+
+
 def _remove_invalid_tags(data):
-    allowed_tags = set(AllowedTag.objects.filter(enabled=True).values_list('name', flat=True))
+    allowed_tags = get_allowed_tags()
     original_tags = {tag.strip().lower() for tag in data['document']['tags']}
     data['document']['tags'] = list(original_tags & allowed_tags)
     return data
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0011_add-build-phases'),
+        ('projects', '0044_auto_20190703_1300'),
+        ('docsitalia', '0020_auto_20191205_1302'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublishedDocument',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('priority', models.PositiveIntegerField(default=0, verbose_name='Priority')),
+                ('priority_date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Priority date')),
+                ('tags', django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=list, verbose_name='Tags')),
+                ('modified_date', models.DateTimeField(auto_now=True, verbose_name='Modified date')),
+                ('build', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='builds.Build', verbose_name='Latest successful build')),
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='projects.Project', verbose_name='Project')),
+                ('publisher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='docsitalia.Publisher', verbose_name='Publisher')),
+                ('publisher_project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='docsitalia.PublisherProject', verbose_name='Publisher project')),
+            ],
+            options={
+                'verbose_name': 'published document',
+                'verbose_name_plural': 'published documents',
+            },
+        ),
+    ]
@@ -1,13 +1,17 @@
 # -*- coding: utf-8 -*-
 """Models for the docsitalia app."""
 
-from django.db import models
+from collections import OrderedDict
+
+from django.db import models, transaction
 from django.contrib.postgres.fields import JSONField
+from django.utils import timezone
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext_lazy as _
 from django.core.urlresolvers import reverse
 
-from readthedocs.builds.models import Version
+from readthedocs.builds.constants import BUILD_STATE_FINISHED
+from readthedocs.builds.models import Build, Version
 from readthedocs.core.utils import broadcast
 from readthedocs.projects.models import Project
 from readthedocs.oauth.models import RemoteOrganization, RemoteRepository
@@ -15,7 +19,15 @@ from readthedocs.oauth.models import RemoteOrganization, RemoteRepository
 from readthedocs.core.resolver import resolver
 
 from . import tags_vocabulary
-from .utils import get_projects_with_builds
+from .utils import (
+    get_projects_with_builds,
+    invalidate_allowed_tags,
+    invalidate_publisher_path_prefixes,
+    invalidate_published_documents,
+    mark_projects_dirty,
+    schedule_published_documents_update,
+    schedule_related_projects_update,
+)
 from .monkeypatch import monkey_patch_project_model  # NOQA
 
 
@@ -90,70 +102,112 @@ class Publisher(models.Model):
         return self.name
 
     def create_projects_from_metadata(self, settings):  # pylint: disable=too-many-locals
-        """Create PublisherProjects from metadata."""
-        slugs = []
-        repo_urls_cache = {}
-        for project in settings['projects']:
+        """
+        Create PublisherProjects from metadata.
+
+        The target state is computed in memory and applied with bulk queries
+        in a single transaction, so no per row signal is sent: the portal
+        projections and the search index are then updated once, only for the
+        documents actually affected.
+        """
+        now = timezone.now()
+        through = PublisherProject.projects.through
+        changed_pks = set()
+        with transaction.atomic():
             # since the slug is used for filtering we use it as key
             # for not duplicating renamed instances
-            proj, created = PublisherProject.objects.get_or_create(
-                publisher=self,
-                slug=project['slug'],
-                defaults={
-                    'name': project['name'],
-                }
+            pub_projects = {
+                pub_proj.slug: pub_proj
+                for pub_proj in PublisherProject.objects.filter(publisher=self)
+            }
+            targets = OrderedDict(
+                (project['slug'], project) for project in settings['projects']
             )
-            if not created:
-                proj.name = project['name']
-            proj.metadata = project
-            proj.active = True
-            proj.save()
-
-            slugs.append(project['slug'])
+            to_create = []
+            for slug, project in targets.items():
+                proj = pub_projects.get(slug)
+                if proj is None:
+                    proj = PublisherProject(
+                        publisher=self,
+                        slug=slug,
+                        name=project['name'],
+                        metadata=project,
+                        active=True,
+                    )
+                    pub_projects[slug] = proj
+                    to_create.append(proj)
+                elif (proj.name, proj.metadata, proj.active) != (project['name'], project, True):
+                    PublisherProject.objects.filter(pk=proj.pk).update(
+                        name=project['name'],
+                        metadata=project,
+                        active=True,
+                        modified_date=now,
+                    )
+                    changed_pks.add(proj.pk)
+            PublisherProject.objects.bulk_create(to_create)
 
             # we cache the repository of each document for the
             # project so we can filter already uploaded documents easily
-            for doc in project['documents']:
-                repo_urls_cache[doc['repo_url']] = proj
-
-        # we disable PublisherProjects that does not have
-        # a slug in the metadata
-        old_pub_projects = PublisherProject.objects.filter(
-            publisher=self
-        ).exclude(
-            slug__in=slugs
-        )
-        old_pub_projects.update(
-            active=False
-        )
-
-        # we need to port to the new PublisherProject any
-        # already uploaded document connected to the disabled
-        # PublisherProjects
-        projects_to_move_pks = old_pub_projects.values_list(
-            'projects',
-            flat=True
+            repo_urls_cache = {}
+            for project in settings['projects']:
+                for doc in project['documents']:
+                    repo_urls_cache[doc['repo_url']] = pub_projects[project['slug']].pk
+
+            # we disable PublisherProjects that does not have
+            # a slug in the metadata
+            old_pub_projects_pks = [
+                pub_proj.pk for slug, pub_proj in pub_projects.items()
+                if slug not in targets
+            ]
+            deactivated_pks = [
+                pub_proj.pk for slug, pub_proj in pub_projects.items()
+                if slug not in targets and pub_proj.active
+            ]
+            PublisherProject.objects.filter(pk__in=deactivated_pks).update(
+                active=False,
+                modified_date=now,
+            )
+            changed_pks.update(deactivated_pks)
+
+            # we need to port to the new PublisherProject any
+            # already uploaded document connected to the disabled
+            # PublisherProjects
+            old_links = through.objects.filter(publisherproject__in=old_pub_projects_pks)
+            repos_to_move = RemoteRepository.objects.filter(
+                project__in=old_links.values('project'),
+                html_url__in=repo_urls_cache.keys()
+            ).values_list('project', 'html_url')
+            moves = {
+                project_pk: repo_urls_cache[repo_url]
+                for project_pk, repo_url in repos_to_move
+            }
+            if moves:
+                old_links.filter(project__in=moves.keys()).delete()
+                links = set(
+                    through.objects.filter(
+                        project__in=moves.keys(),
+                    ).values_list('publisherproject', 'project')
+                )
+                through.objects.bulk_create([
+                    through(publisherproject_id=pub_proj_pk, project_id=project_pk)
+                    for project_pk, pub_proj_pk in moves.items()
+                    if (pub_proj_pk, project_pk) not in links
+                ])
+
+        affected_pks = set(moves)
+        affected_pks.update(
+            through.objects.filter(
+                publisherproject__in=changed_pks,
+            ).values_list('project', flat=True)
         )
-        repos_to_move = RemoteRepository.objects.filter(
-            project__in=projects_to_move_pks,
-            html_url__in=repo_urls_cache.keys()
-        ).select_related('project')
-
-        # we can now remove the documents from the old projects
-        # and add them to the new one
-        old_pub_projects_pks = list(old_pub_projects.values_list('pk', flat=True))
-        for repo in repos_to_move:
-            project = repo.project
-
-            old_pub_projects = project.publisherproject_set.filter(
-                pk__in=old_pub_projects_pks
+        schedule_published_documents_update(affected_pks)
+        if moves:
+            schedule_related_projects_update(moves.keys())
+            # the publisher project slug is the only indexed field that can change here
+            mark_projects_dirty(moves.keys())
+            invalidate_publisher_path_prefixes(
+                Project.objects.filter(pk__in=moves.keys()).values_list('slug', flat=True)
             )
-            for old_pub_proj in old_pub_projects:
-                old_pub_proj.projects.remove(project)
-
-            repo_url = repo.html_url
-            new_pub_proj = repo_urls_cache[repo_url]
-            new_pub_proj.projects.add(project)
 
     def active_publisher_projects(self):
         """Active publisher projects with active documents."""
@@ -225,10 +279,11 @@ class PublisherProject(models.Model):
 
     def active_documents(self):
         """Active documents."""
-        builded_projects = get_projects_with_builds().filter(
-            publisherproject=self
-        )
-        return builded_projects.order_by(
+        return Project.objects.filter(
+            publisheddocument__publisher_project=self
+        ).select_related(
+            'publisheddocument__publisher_project__publisher'
+        ).order_by(
             '-modified_date', '-pub_date'
         )
 
@@ -290,6 +345,21 @@ class PublisherIntegration(models.Model):
             .format(self.get_integration_type_display(), self.publisher.name))
 
 
+class AllowedTagQuerySet(models.QuerySet):
+
+    """Invalidate the cached allowed tags on bulk writes, which send no signals."""
+
+    def bulk_create(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        objs = super().bulk_create(*args, **kwargs)
+        invalidate_allowed_tags()
+        return objs
+
+    def update(self, **kwargs):  # pylint: disable=arguments-differ
+        rows = super().update(**kwargs)
+        invalidate_allowed_tags()
+        return rows
+
+
 @python_2_unicode_compatible
 class AllowedTag(models.Model):
 
@@ -305,6 +375,8 @@ class AllowedTag(models.Model):
     name = models.CharField(_('Name'), max_length=255, unique=True)
     enabled = models.BooleanField(_('Enabled'), default=True)
 
+    objects = AllowedTagQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('allowed tag')
         verbose_name_plural = _('allowed tags')
@@ -353,3 +425,97 @@ class ProjectOrder(models.Model):
 
     def __str__(self):
         return self.project.name
+
+
+class PublishedDocument(models.Model):
+
+    """
+    Denormalized projection of the documents listed in the portal.
+
+    A document is published when both its publisher and its publisher project
+    are active and it has a successful build of an active public version. Rows
+    are kept up to date by :py:meth:`update_projects`, called on build
+    completion and on metadata sync, so the portal pages don't need to join
+    the whole builds table.
+    """
+
+    project = models.OneToOneField(
+        Project,
+        verbose_name=_('Project'),
+        on_delete=models.CASCADE,
+    )
+    publisher = models.ForeignKey(
+        Publisher,
+        verbose_name=_('Publisher'),
+        on_delete=models.CASCADE,
+    )
+    publisher_project = models.ForeignKey(
+        PublisherProject,
+        verbose_name=_('Publisher project'),
+        on_delete=models.CASCADE,
+    )
+    build = models.ForeignKey(
+        Build,
+        verbose_name=_('Latest successful build'),
+        on_delete=models.SET_NULL,
+        null=True,
+    )
+    priority = models.PositiveIntegerField(_('Priority'), default=0)
+    # documents with the same priority are listed in the order it was set
+    priority_date = models.DateTimeField(_('Priority date'), default=timezone.now)
+    tags = JSONField(_('Tags'), blank=True, default=list)
+    modified_date = models.DateTimeField(_('Modified date'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('published document')
+        verbose_name_plural = _('published documents')
+
+    def __str__(self):
+        return self.project.name
+
+    @classmethod
+    def update_projects(cls, project_pks):
+        """Create, update or remove the rows of ``project_pks``."""
+        published = get_projects_with_builds().filter(
+            pk__in=project_pks,
+            publisherproject__active=True,
+            publisherproject__publisher__active=True,
+        ).distinct().select_related('projectorder')
+
+        published_pks = []
+        for project in published:
+            publisher_project = project.publisherproject_set.filter(
+                active=True,
+                publisher__active=True,
+            ).first()
+            build = Build.objects.filter(
+                project=project,
+                success=True,
+                state=BUILD_STATE_FINISHED,
+                version__active=True,
+                version__privacy_level='public',
+            ).order_by('-date').first()
+            try:
+                priority = project.projectorder.priority
+            except ProjectOrder.DoesNotExist:
+                priority = 0
+
+            document = cls.objects.filter(project=project).first()
+            if document is None:
+                document = cls(project=project)
+            elif document.priority != priority:
+                document.priority_date = timezone.now()
+            document.publisher_id = publisher_project.publisher_id
+            document.publisher_project = publisher_project
+            document.build = build
+            document.priority = priority
+            document.tags = sorted(project.tags.slugs())
+            document.save()
+            published_pks.append(project.pk)
+
+        cls.objects.filter(
+            project__in=project_pks,
+        ).exclude(
+            project__in=published_pks,
+        ).delete()
+        invalidate_published_documents()
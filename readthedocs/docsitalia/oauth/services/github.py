@@ -1,18 +1,24 @@
 from __future__ import absolute_import
 from builtins import str
+import hashlib
 import logging
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from django.apps import apps
 from django.db.models import Q
 from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
+from django.utils import timezone
 from requests.exceptions import RequestException
+from requests_oauthlib import OAuth2Session
 
 from readthedocs.oauth.services.github import GitHubService
 from readthedocs.oauth.models import RemoteOrganization, RemoteRepository
 
-from readthedocs.docsitalia.github import get_metadata_for_publisher
+from readthedocs.docsitalia.github import (
+    RAW_GITHUB_BASE_URL, fetch_metadata_file, parse_metadata_file)
 from readthedocs.docsitalia.metadata import (
     PUBLISHER_SETTINGS, PROJECTS_SETTINGS, InvalidMetadata)
 from readthedocs.docsitalia.models import (
@@ -21,80 +27,240 @@ from readthedocs.docsitalia.models import (
 log = logging.getLogger(__name__)
 
 
+GITHUB_ETAG_CACHE_KEY = 'docsitalia:github:{user}:{url}'
+GITHUB_ETAG_CACHE_TIME = 60 * 60 * 24 * 7
+
+
 class DocsItaliaGithubService(GitHubService):
+
+    """GitHub service syncing the organizations of the publishers."""
+
+    # concurrent requests while syncing organizations
+    sync_workers = 8
+    # pause the sync when the API quota left drops below this threshold,
+    # up to ``rate_limit_max_wait`` seconds
+    rate_limit_threshold = 100
+    rate_limit_max_wait = 60
+    # refresh the token before the sync when it expires within this time
+    token_refresh_margin = 60 * 10
+
     def sync(self):
         """Sync organizations."""
         self.sync_organizations()
 
     def sync_organizations(self):
-        """Sync organizations from GitHub API."""
-        dsl_app = apps.get_app_config('django_elasticsearch_dsl')
-        signal_processor = dsl_app.signal_processor
-        # this is a rather brutal way to handle this, but I cannot find a better solution
-        # when syncing the orgs, we repeatedly save the publisher, which is linked to
-        # the PageDocument and ProjectDocument. As django-elasticsearch-dsl is configured in
-        # autosync this triggers the ES update for all the linked documents, and with large
-        # organizations (namely: `italia`) this can yield a significant delay and unnecessary load.
-        # Completely silencing the signals during this process it's the only option I have found.
-        signal_processor.teardown()
+        """
+        Sync organizations from GitHub API.
+
+        The organization details, the metadata files and the repositories of
+        every organization are fetched concurrently by ``sync_workers`` threads,
+        while the database is updated from this thread as each organization is
+        ready. The token is refreshed before fanning out, the worker threads
+        never refresh it.
+        """
         try:
+            access_token = self.refresh_token()
             orgs = self.paginate('https://api.github.com/user/orgs')
-            for org in orgs:
-                org_resp = self.get_session().get(org['url'])
-                org_obj = self.create_organization(org_resp.json())
-
-                # we ingest only whitelisted organizations
-                if not org_obj:
-                    continue
-
-                publisher = Publisher.objects.get(
-                    remote_organization=org_obj, active=True)
-
-                session = self.get_session()
-                try:
-                    publisher_metadata = get_metadata_for_publisher(
-                        org_obj, publisher, PUBLISHER_SETTINGS, session)
-                    projects_metadata = get_metadata_for_publisher(
-                        org_obj, publisher, PROJECTS_SETTINGS, session)
-                except InvalidMetadata as e:
-                    log.error(
-                        'Syncing GitHub organizations: %s', e)
-                    continue
-
-                publisher.metadata = publisher_metadata
-                publisher.projects_metadata = projects_metadata
-                publisher.save()
-                publisher.create_projects_from_metadata(projects_metadata)
-
-                # FIXME: is this the right place?
-                success, _ = self.setup_metadata_webhook(publisher)
-                publisher.has_valid_webhook = success
-                publisher.save()
-
-                # Add repos
-                # TODO ?per_page=100
-                org_repos = self.paginate(
-                    '{org_url}/repos'.format(org_url=org['url'])
-                )
-                repo_whitelist = set()
-                for project in projects_metadata['projects']:
-                    for document in project['documents']:
-                        repo_whitelist.add(document['repository'])
-                for repo in org_repos:
-                    # create repo only for whitelisted repositories
-                    if repo['name'] not in repo_whitelist:
+            config_repos = dict(
+                Publisher.objects.filter(active=True).values_list('slug', 'config_repo_name')
+            )
+            with ThreadPoolExecutor(max_workers=self.sync_workers) as executor:
+                futures = [
+                    executor.submit(
+                        self.fetch_organization, org['url'], config_repos, access_token,
+                    )
+                    for org in orgs
+                ]
+                for future in as_completed(futures):
+                    try:
+                        org_data = future.result()
+                    except RequestException as e:
+                        log.error('Syncing GitHub organizations: %s', e)
                         continue
-                    self.create_repository(repo, organization=org_obj)
-                RemoteRepository.objects.filter(
-                    Q(organization=org_obj),
-                    ~Q(name__in=list(repo_whitelist))
-                ).delete()
+                    if org_data:
+                        self.sync_organization(org_data)
         except (TypeError, ValueError) as e:
             log.error('Error syncing GitHub organizations: %s',
                       str(e), exc_info=True)
             raise Exception('Could not sync your GitHub organizations, '
                             'try reconnecting your account')
-        signal_processor.setup()
+
+    def refresh_token(self):
+        """
+        Refresh the token of the account if it expires within ``token_refresh_margin``.
+
+        :returns: the access token to use for the sync
+        """
+        token = self.account.socialtoken_set.first()
+        if token is None:
+            return None
+        if token.expires_at is not None:
+            expires_in = (token.expires_at - timezone.now()).total_seconds()
+            if expires_in < self.token_refresh_margin:
+                session = self.get_session()
+                # the updater of the session saves the new token
+                session.token_updater(session.refresh_token(
+                    session.auto_refresh_url,
+                    **session.auto_refresh_kwargs
+                ))
+                token.refresh_from_db()
+        return token.token
+
+    def create_worker_session(self, access_token):
+        """
+        Create a session for a sync worker thread.
+
+        The session never refreshes the token, so that the ``SocialToken`` is
+        only written from the thread calling ``sync_organizations``.
+        """
+        return OAuth2Session(token={
+            'access_token': access_token,
+            'token_type': 'bearer',
+        })
+
+    def fetch_organization(self, url, config_repos, access_token):
+        """
+        Fetch everything needed to sync an organization, without touching the database.
+
+        :param url: API url of the organization
+        :param config_repos: configuration repository name of the active
+            publishers, by slug
+        :param access_token: token of the account, see ``refresh_token``
+        :returns: the organization data or ``None`` if it has no active publisher
+        :rtype: dict
+        """
+        with self.create_worker_session(access_token) as session:
+            fields = self.get_github_json(url, session=session)
+            login = fields.get('login')
+            if login not in config_repos:
+                return None
+
+            org_data = {'fields': fields}
+            for settings_file in (PUBLISHER_SETTINGS, PROJECTS_SETTINGS):
+                metadata_url = RAW_GITHUB_BASE_URL.format(
+                    org=login,
+                    repo=config_repos[login],
+                    path=settings_file,
+                )
+                org_data[settings_file] = fetch_metadata_file(metadata_url, session=session)
+            org_data['repos'] = self.get_github_pages(
+                '{org_url}/repos?per_page=100'.format(org_url=url),
+                session=session,
+            )
+        return org_data
+
+    def sync_organization(self, org_data):
+        """Update publisher, organization and repositories from ``fetch_organization`` data."""
+        org_obj = self.create_organization(org_data['fields'])
+
+        # we ingest only whitelisted organizations
+        if not org_obj:
+            return
+
+        publisher = Publisher.objects.get(
+            remote_organization=org_obj, active=True)
+
+        try:
+            publisher_metadata = parse_metadata_file(
+                org_data[PUBLISHER_SETTINGS], org_obj, publisher, PUBLISHER_SETTINGS)
+            projects_metadata = parse_metadata_file(
+                org_data[PROJECTS_SETTINGS], org_obj, publisher, PROJECTS_SETTINGS)
+        except InvalidMetadata as e:
+            log.error(
+                'Syncing GitHub organizations: %s', e)
+            return
+
+        publisher.metadata = publisher_metadata
+        publisher.projects_metadata = projects_metadata
+        publisher.save()
+        publisher.create_projects_from_metadata(projects_metadata)
+
+        # FIXME: is this the right place?
+        success, _ = self.setup_metadata_webhook(publisher)
+        publisher.has_valid_webhook = success
+        publisher.save()
+
+        # Add repos
+        repo_whitelist = set()
+        for project in projects_metadata['projects']:
+            for document in project['documents']:
+                repo_whitelist.add(document['repository'])
+        # create repo only for whitelisted repositories
+        self.create_repositories(
+            [repo for repo in org_data['repos'] if repo['name'] in repo_whitelist],
+            organization=org_obj,
+        )
+        RemoteRepository.objects.filter(
+            Q(organization=org_obj),
+            ~Q(name__in=list(repo_whitelist))
+        ).delete()
+
+    def get_github_json(self, url, session=None):
+        """
+        GET a GitHub API url, returning the decoded JSON.
+
+        Requests are conditional on the ETag of the previous response, which
+        GitHub answers with a ``304`` not counted in the rate limit.
+
+        :param session: session to use instead of ``get_session``
+        """
+        data, _ = self._get_github_page(url, session=session)
+        return data
+
+    def get_github_pages(self, url, session=None):
+        """Return the results of all the pages of a GitHub API url."""
+        results = []
+        while url:
+            data, url = self._get_github_page(url, session=session)
+            results.extend(data)
+        return results
+
+    def _get_github_page(self, url, session=None):
+        """Return the decoded JSON and the next page url of a GitHub API url."""
+        if session is None:
+            session = self.get_session()
+        cache_key = GITHUB_ETAG_CACHE_KEY.format(
+            user=self.user.pk,
+            url=hashlib.sha1(url.encode()).hexdigest(),
+        )
+        cached = cache.get(cache_key)
+        headers = {}
+        if cached:
+            headers['If-None-Match'] = cached['etag']
+
+        resp = session.get(url, headers=headers)
+        self.wait_for_rate_limit(resp)
+        if cached and resp.status_code == 304:
+            return cached['data'], cached['next_url']
+
+        resp.raise_for_status()
+        data = resp.json()
+        next_url = self.get_next_url_to_paginate(resp)
+        etag = resp.headers.get('ETag')
+        if etag:
+            cache.set(
+                cache_key,
+                {'etag': etag, 'data': data, 'next_url': next_url},
+                GITHUB_ETAG_CACHE_TIME,
+            )
+        return data, next_url
+
+    def wait_for_rate_limit(self, resp):
+        """Pause while the GitHub API quota left is below ``rate_limit_threshold``."""
+        try:
+            remaining = int(resp.headers['X-RateLimit-Remaining'])
+            reset = int(resp.headers['X-RateLimit-Reset'])
+        except (KeyError, ValueError):
+            return
+        if remaining >= self.rate_limit_threshold:
+            return
+        delay = min(max(reset - time.time(), 0), self.rate_limit_max_wait)
+        log.warning(
+            'GitHub API rate limit almost exhausted: remaining=%s wait=%ds',
+            remaining,
+            delay,
+        )
+        time.sleep(delay)
 
     def create_organization(self, fields):
         """
@@ -31,12 +31,11 @@ class ItaliaResolver(ResolverBase):
         :param cname: optional subdomain
         :return: string
         """
-        from readthedocs.projects.models import Project
+        from readthedocs.docsitalia.utils import get_publisher_path_prefix
 
-        project = Project.objects.get(slug=project_slug)
-        base_project = project.publisherproject_set.all().first()
+        prefix = get_publisher_path_prefix(project_slug)
 
-        if not base_project or private:
+        if not prefix or private:
             return super(ItaliaResolver, self).base_resolve_path(
                 project_slug, filename, version_slug,
                 language, private, single_version,
@@ -55,7 +54,7 @@ class ItaliaResolver(ResolverBase):
 
         return url.format(
             project_slug=project_slug, filename=filename,
-            base_project_slug=base_project.slug, publisher_slug=base_project.publisher.slug,
+            base_project_slug=prefix[1], publisher_slug=prefix[0],
             version_slug=version_slug, language=language,
             single_version=single_version, subproject_slug=subproject_slug,
         )
@@ -69,7 +68,7 @@ class ItaliaResolver(ResolverBase):
         :return: string
         """
         canonical_project = self._get_canonical_project(project)
-        domain = canonical_project.domains.filter(canonical=True).first()
+        domain = self._get_canonical_domain(canonical_project)
         if domain:
             return domain.domain
         return getattr(settings, 'PUBLIC_DOMAIN')
@@ -14,6 +14,35 @@ trigram_analyzer = analyzer(
     filter=['lowercase']
 )
 
+# the prefixes of every word, matched by the autocomplete as the user types
+autocomplete_analyzer = analyzer(
+    'autocomplete_analyzer',
+    tokenizer=tokenizer(
+        'autocomplete', 'edge_ngram', min_gram=1, max_gram=20, token_chars=['letter', 'digit']
+    ),
+    filter=['lowercase', 'asciifolding']
+)
+autocomplete_search_analyzer = analyzer(
+    'autocomplete_search_analyzer',
+    tokenizer='standard',
+    filter=['lowercase', 'asciifolding']
+)
+
+
+def quicksearch_text_field(attr):
+    """Return the text field of a quicksearch document, with its autocomplete subfield."""
+    return fields.TextField(
+        attr=attr,
+        analyzer=trigram_analyzer,
+        fields={
+            'autocomplete': fields.TextField(
+                analyzer=autocomplete_analyzer,
+                search_analyzer=autocomplete_search_analyzer,
+            ),
+        }
+    )
+
+
 quicksearch_conf = settings.ES_INDEXES['quicksearch']
 quicksearch_index = Index(quicksearch_conf['name'])
 quicksearch_index.settings(**quicksearch_conf['settings'])
@@ -31,7 +60,8 @@ class PageQuickSearchDocument(RTDDocTypeMixin, DocType):
 
     model = fields.KeywordField()
     link = fields.KeywordField(attr='get_absolute_url')
-    text = fields.TextField(attr='processed_json.title', analyzer=trigram_analyzer)
+    text = quicksearch_text_field('processed_json.title')
+    project = fields.KeywordField(attr='project.slug')
     version = fields.KeywordField(attr='version.slug')
 
     class Meta:
@@ -60,7 +90,7 @@ class ProjectQuickSearchDocument(RTDDocTypeMixin, DocType):
 
     model = fields.KeywordField()
     link = fields.KeywordField(attr='get_absolute_url')
-    text = fields.TextField(attr='name', analyzer=trigram_analyzer)
+    text = quicksearch_text_field('name')
 
     class Meta:
         model = PublisherProject
@@ -76,7 +106,7 @@ class PublisherQuickSearchDocument(RTDDocTypeMixin, DocType):
 
     model = fields.KeywordField()
     link = fields.KeywordField(attr='get_absolute_url')
-    text = fields.TextField(attr='name', analyzer=trigram_analyzer)
+    text = quicksearch_text_field('name')
 
     class Meta:
         model = Publisher
@@ -0,0 +1,105 @@
+"""Signal processor keeping the docsitalia fields of the search documents up to date."""
+
+from django.db import models
+from django_elasticsearch_dsl.registries import registry
+from django_elasticsearch_dsl.signals import RealTimeSignalProcessor
+
+from readthedocs.docsitalia.models import ProjectOrder, Publisher, PublisherProject
+from readthedocs.docsitalia.utils import mark_projects_dirty
+from readthedocs.projects.models import Project
+from readthedocs.search.utils import invalidate_search_cache
+
+
+# the fields copied into the search documents of the projects, by model
+INDEXED_FIELDS = {
+    Project: ('default_version',),
+    ProjectOrder: ('priority',),
+    Publisher: ('name',),
+    PublisherProject: ('slug',),
+}
+
+
+def get_indexed_projects(instance):
+    """Return the pks of the projects whose search documents include ``instance`` fields."""
+    # see https://github.com/PyCQA/pylint/issues/2283
+    # pylint: disable=no-else-return
+    if isinstance(instance, Project):
+        return [instance.pk]
+    elif isinstance(instance, ProjectOrder):
+        return [instance.project_id]
+    elif isinstance(instance, Publisher):
+        return Project.objects.filter(
+            publisherproject__publisher=instance
+        ).values_list('pk', flat=True)
+    elif isinstance(instance, PublisherProject):
+        return instance.projects.values_list('pk', flat=True)
+    return []
+
+
+class PartialUpdateSignalProcessor(RealTimeSignalProcessor):
+
+    """
+    Signal processor updating the docsitalia fields of the search documents.
+
+    Instead of reindexing synchronously every page of the projects linked to a
+    saved publisher, publisher project or project order, the projects are
+    marked as dirty when one of their indexed fields changes and the
+    ``update_search_fields`` task updates just those fields later.
+    """
+
+    def setup(self):
+        super().setup()
+        models.signals.pre_save.connect(self.handle_pre_save)
+
+    def teardown(self):
+        super().teardown()
+        models.signals.pre_save.disconnect(self.handle_pre_save)
+
+    def handle_pre_save(self, sender, instance, **kwargs):
+        """Take note if an indexed field of ``instance`` is going to change."""
+        fields = INDEXED_FIELDS.get(sender)
+        if fields is None or instance.pk is None:
+            return
+        previous = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+        current = tuple(getattr(instance, field) for field in fields)
+        instance._search_fields_changed = previous is not None and previous != current
+
+    def handle_save(self, sender, instance, **kwargs):
+        """
+        Update the documents of ``instance`` and mark the projects affected as dirty.
+
+        The cached search results are made stale when an indexed object changes.
+        """
+        super().handle_save(sender, instance, **kwargs)
+        if sender in registry.get_models():
+            invalidate_search_cache()
+        if getattr(instance, '_search_fields_changed', False):
+            instance._search_fields_changed = False
+            mark_projects_dirty(get_indexed_projects(instance))
+
+    def handle_pre_delete(self, sender, instance, **kwargs):
+        """Mark as dirty the projects that outlive a deleted publisher or publisher project."""
+        super().handle_pre_delete(sender, instance, **kwargs)
+        if sender in registry.get_models():
+            invalidate_search_cache()
+        if isinstance(instance, (Publisher, PublisherProject)):
+            mark_projects_dirty(get_indexed_projects(instance))
+
+    def handle_m2m_changed(self, sender, instance, action, **kwargs):
+        """Mark as dirty the projects whose tags or publisher project change."""
+        super().handle_m2m_changed(sender, instance, action, **kwargs)
+        if sender not in (Project.tags.through, PublisherProject.projects.through):
+            return
+        if isinstance(instance, Project):
+            if action in ('post_add', 'post_remove', 'post_clear'):
+                mark_projects_dirty([instance.pk])
+        elif action in ('post_add', 'post_remove'):
+            # the publisher project or the tag sends the projects in pk_set
+            mark_projects_dirty(kwargs['pk_set'] or [])
+        elif action == 'pre_clear':
+            if isinstance(instance, PublisherProject):
+                mark_projects_dirty(get_indexed_projects(instance))
+            else:
+                mark_projects_dirty(
+                    Project.objects.filter(tags=instance).values_list('pk', flat=True)
+                )
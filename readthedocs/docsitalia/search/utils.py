@@ -0,0 +1,77 @@
+"""Utilities for the docsitalia quick search."""
+
+import logging
+import threading
+from concurrent.futures import Future
+
+
+log = logging.getLogger(__name__)
+
+
+class QueryCoalescer:
+
+    """
+    Run identical concurrent queries once.
+
+    The first thread asking for a key runs the query, the others asking for
+    the same key meanwhile wait for it and share its result or exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = {}
+
+    def run(self, key, func):
+        """Return ``func()``, sharing the call with the threads asking for ``key``."""
+        with self._lock:
+            future = self._running.get(key)
+            leader = future is None
+            if leader:
+                future = self._running[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._running[key]
+        return result
+
+
+class LatencyRecorder:
+
+    """Log the median and the 99th percentile of the latencies every ``size`` samples."""
+
+    def __init__(self, name, size=1000):
+        self.name = name
+        self.size = size
+        self._lock = threading.Lock()
+        self._samples = []
+
+    def record(self, seconds):
+        """Add a sample, logging the percentiles when there are enough of them."""
+        with self._lock:
+            self._samples.append(seconds)
+            if len(self._samples) < self.size:
+                return
+            samples = sorted(self._samples)
+            self._samples = []
+        log.info(
+            '%s latency: p50=%.1fms p99=%.1fms samples=%s',
+            self.name,
+            percentile(samples, 50) * 1000,
+            percentile(samples, 99) * 1000,
+            len(samples),
+        )
+
+
+def percentile(samples, percent):
+    """Return the ``percent`` percentile of the sorted ``samples``."""
+    index = int(len(samples) * percent / 100)
+    return samples[min(index, len(samples) - 1)]
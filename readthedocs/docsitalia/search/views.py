@@ -1,13 +1,27 @@
 """Api for the docsitalia app."""
 
+import hashlib
+import time
+
 from django.conf import settings
+from django.core.cache import cache
 from elasticsearch import Elasticsearch
 from elasticsearch_dsl import Q, Search
 from rest_framework import generics, serializers
+from rest_framework.response import Response
 
 from readthedocs.builds.constants import LATEST
 
 from .documents import quicksearch_index
+from .utils import LatencyRecorder, QueryCoalescer
+
+
+QUICKSEARCH_CACHE_KEY = 'docsitalia:quicksearch:{}'
+# the suggestions can lag behind the index for this many seconds
+QUICKSEARCH_CACHE_TIME = 60
+
+coalescer = QueryCoalescer()
+latency = LatencyRecorder('quicksearch')
 
 
 class SearchSerializer(serializers.Serializer):  # pylint: disable=abstract-method
@@ -20,15 +34,35 @@ class SearchSerializer(serializers.Serializer):  # pylint: disable=abstract-meth
 
     def get_text(self, obj):
         """Return item text."""
-        return obj.meta.highlight.text[0]
+        return obj.meta.highlight['text.autocomplete'][0]
 
 
 class QuickSearchAPIView(generics.ListAPIView):
 
-    """Main entry point for quick search using Elasticsearch."""
+    """
+    Main entry point for quick search using Elasticsearch.
+
+    The words typed are matched as prefixes, and the results are shared by
+    the identical queries, normalized, for ``QUICKSEARCH_CACHE_TIME`` seconds.
+    """
 
     pagination_class = None
     serializer_class = SearchSerializer
+    using = None
+
+    def get_using(self):
+        """Return the ES client, shared by the requests served by the process."""
+        if QuickSearchAPIView.using is None:
+            QuickSearchAPIView.using = Elasticsearch(**settings.ELASTICSEARCH_DSL['default'])
+        return QuickSearchAPIView.using
+
+    def get_query_params(self):
+        """Return the normalized query parameters."""
+        return {
+            'query': ' '.join(self.request.query_params.get('q', '').lower().split()),
+            'model': self.request.query_params.get('model'),
+            'version': self.request.query_params.get('version', LATEST),
+        }
 
     def get_queryset(self):
         """
@@ -38,23 +72,39 @@ class QuickSearchAPIView(generics.ListAPIView):
         So for searching, its possible to return ``Search`` object instead of queryset.
         The ``filter_backends`` and ``pagination_class`` is compatible with ``Search``
         """
-        # Validate all the required params are there
-        query = self.request.query_params.get('q', '')
-        model = self.request.query_params.get('model')
-        version = self.request.query_params.get('version', LATEST)
-        using = Elasticsearch(**settings.ELASTICSEARCH_DSL['default'])
+        params = self.get_query_params()
         search = Search(
             index=f'{quicksearch_index}',
-            using=using,
+            using=self.get_using(),
         ).filter(
             Q(
                 'terms', model=['progetto', 'amministrazione']
             ) | (
-                Q('term', model='documento') & Q('term', version=version)
+                Q('term', model='documento') & Q('term', version=params['version'])
             )
-        ).query('match', text=query).highlight(
-            'text', pre_tags=['<mark>'], post_tags=['</mark>'], fragment_size=100
+        ).query(
+            'match', **{'text.autocomplete': {'query': params['query'], 'operator': 'and'}}
+        ).highlight(
+            'text.autocomplete', pre_tags=['<mark>'], post_tags=['</mark>'], fragment_size=100
         )
-        if model:
-            search = search.filter('term', model=model)
+        if params['model']:
+            search = search.filter('term', model=params['model'])
         return search[0:10]
+
+    def get_results(self, key):
+        """Run the search and cache the serialized results."""
+        results = list(self.get_serializer(self.get_queryset(), many=True).data)
+        cache.set(key, results, QUICKSEARCH_CACHE_TIME)
+        return results
+
+    def list(self, request, *args, **kwargs):
+        start = time.time()
+        params = self.get_query_params()
+        key = QUICKSEARCH_CACHE_KEY.format(
+            hashlib.sha1(repr(sorted(params.items())).encode('utf-8')).hexdigest()
+        )
+        results = cache.get(key)
+        if results is None:
+            results = coalescer.run(key, lambda: self.get_results(key))
+        latency.record(time.time() - start)
+        return Response(results)
@@ -142,7 +142,9 @@ class RelatedProjectsSerializer(serializers.ModelSerializer):
         queryset = Project.objects.filter(
             publisherproject__publisher=self.publisher_project.publisher,
             versions__built=True
-        ).exclude(pk=obj.pk).distinct()[:4]
+        ).exclude(pk=obj.pk).distinct().prefetch_related(
+            'publisherproject_set__publisher'
+        )[:4]
         return RelatedProjectsSectionSerializer(queryset, many=True).data
 
     def get_same_publisher_project(self, obj):
@@ -150,16 +152,19 @@ class RelatedProjectsSerializer(serializers.ModelSerializer):
         queryset = Project.objects.filter(
             publisherproject=self.publisher_project,
             versions__built=True
-        ).exclude(pk=obj.pk).distinct()[:4]
+        ).exclude(pk=obj.pk).distinct().prefetch_related(
+            'publisherproject_set__publisher'
+        )[:4]
         return RelatedProjectsSectionSerializer(queryset, many=True).data
 
     @staticmethod
     def get_similar_tags(obj):
         """Return projects having similar tags to `obj`."""
-        similar_projects = []
-        for project in obj.tags.similar_objects():
-            if project.versions.filter(built=True).exists():
-                similar_projects.append(project)
-            if len(similar_projects) == 4:
-                break
+        candidates = [project.pk for project in obj.tags.similar_objects()]
+        built = Project.objects.filter(
+            pk__in=candidates,
+            versions__built=True
+        ).distinct().prefetch_related('publisherproject_set__publisher')
+        built = {project.pk: project for project in built}
+        similar_projects = [built[pk] for pk in candidates if pk in built][:4]
         return RelatedProjectsSectionSerializer(similar_projects, many=True).data
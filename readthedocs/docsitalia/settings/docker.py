@@ -152,6 +152,10 @@ class DocsItaliaDockerSettings(CommunityBaseSettings):
             'hosts': ES_HOSTS
         },
     }
+    # Update the docsitalia fields of the indexed documents asynchronously
+    ELASTICSEARCH_DSL_SIGNAL_PROCESSOR = (
+        'readthedocs.docsitalia.search.signals.PartialUpdateSignalProcessor'
+    )
 
     # RTD settings
     # This goes together with FILE_SYNCER setting
@@ -14,6 +14,11 @@ class DocsItaliaTestSettings(CommunityTestSettings):
         }
     }
 
+    # Update the docsitalia fields of the indexed documents asynchronously
+    ELASTICSEARCH_DSL_SIGNAL_PROCESSOR = (
+        'readthedocs.docsitalia.search.signals.PartialUpdateSignalProcessor'
+    )
+
     if os.environ.get('TRAVIS_DOCSITALIA_DOCKER', False):
         DATABASES = {
             'default': {
@@ -3,21 +3,55 @@
 
 import logging
 
+from django.core.cache import cache
 from django.dispatch import receiver
-from django.db.models.signals import post_save, pre_delete, pre_save
-from django_elasticsearch_dsl.apps import DEDConfig
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 
+from readthedocs.api.v2.signals import build_context_response
+from readthedocs.builds.constants import BUILD_STATE_FINISHED
+from readthedocs.builds.models import Build, Version
 from readthedocs.core.signals import webhook_github
 from readthedocs.doc_builder.signals import finalize_sphinx_context_data
-from readthedocs.projects.models import Project, HTMLFile
-from readthedocs.search.tasks import index_objects_to_es
+from readthedocs.projects.models import Project
 
 from .github import get_metadata_for_document
-from .models import ProjectOrder, PublisherProject, update_project_from_metadata
+from .models import (
+    AllowedTag,
+    ProjectOrder,
+    Publisher,
+    PublisherProject,
+    PublishedDocument,
+    update_project_from_metadata,
+)
+from .utils import (
+    RELATED_PROJECTS_CACHE_KEY,
+    get_projects_related_to,
+    invalidate_allowed_tags,
+    invalidate_publisher_path_prefixes,
+    schedule_published_documents_update,
+    schedule_related_projects_update,
+    schedule_related_sections_update,
+)
 
 
 log = logging.getLogger(__name__) # noqa
 
+# the fields of the versions the published documents depend on
+PUBLISHED_VERSION_FIELDS = ('active', 'privacy_level', 'built')
+# the fields of the projects shown in the related projects sections
+RELATED_PROJECT_FIELDS = ('slug', 'name')
+# the m2m_changed actions updating the related projects, the published
+# documents and the path prefixes of the documents
+RELATED_PROJECTS_ACTIONS = ('pre_remove', 'pre_clear', 'post_add', 'post_remove')
+PUBLISHED_DOCUMENTS_ACTIONS = ('post_add', 'post_remove', 'post_clear')
+PATH_PREFIX_ACTIONS = ('pre_clear', 'post_add', 'post_remove')
+
 
 @receiver(webhook_github)
 def on_webhook_github(sender, project, data, event, **kwargs): # noqa
@@ -60,6 +94,17 @@ def add_sphinx_context_data(sender, data, build_env, **kwargs):  # pylint: disab
     """
     from readthedocs.docsitalia.utils import get_subprojects
 
+    # the builders get the subprojects and the publisher with the build context
+    build_context = getattr(build_env.project, 'build_context', {})
+    if 'publisher' in build_context:
+        data['subprojects'] = build_context['subprojects']
+        data['publisher_project'] = build_context['publisher_project']
+        data['publisher'] = build_context['publisher']
+        data['publisher_logo'] = build_context['publisher_logo']
+        if build_context['tags']:
+            data['tags'] = build_context['tags']
+        return
+
     subprojects = get_subprojects(build_env.project.pk)
     data['subprojects'] = subprojects
     publisher_project = build_env.project.publisherproject_set.first()
@@ -76,6 +121,35 @@ def add_sphinx_context_data(sender, data, build_env, **kwargs):  # pylint: disab
         data['tags'] = sorted([t.tag.name for t in build_env.project.tagged_items.all()])
 
 
+@receiver(build_context_response)
+def add_build_context_data(sender, version, resp_data, **kwargs):  # pylint: disable=unused-argument
+    """
+    Add the publisher and the tags of the project to the build context.
+
+    :param sender: sender class
+    :param version: the version to build
+    :param resp_data: the build context returned to the builder
+    :return: None
+    """
+    project = version.project
+    publisher_project = project.publisherproject_set.select_related('publisher').first()
+    resp_data['publisher_project'] = None
+    resp_data['publisher'] = None
+    resp_data['publisher_logo'] = None
+    if publisher_project:
+        publisher = publisher_project.publisher
+        resp_data['publisher_project'] = {
+            'name': publisher_project.name,
+            'slug': publisher_project.slug,
+        }
+        resp_data['publisher'] = {
+            'name': publisher.name,
+            'slug': publisher.slug,
+        }
+        resp_data['publisher_logo'] = publisher.metadata.get('publisher', {}).get('logo_url')
+    resp_data['tags'] = sorted(project.tags.names())
+
+
 @receiver(pre_delete, sender=PublisherProject)
 def on_publisher_project_delete(sender, instance, **kwargs):  # noqa
     """Remove all the projects associated at PublisherProject removal from db and ES indexes."""
@@ -88,44 +162,172 @@ def on_publisher_project_delete(sender, instance, **kwargs):  # noqa
     projects_pks = list(instance.projects.values_list('pk', flat=True))
     projects_pks = [p for p in projects_pks if p not in reused_projects_pks]
     if projects_pks:
-        instance.projects.filter(pk__in=projects_pks).delete()
-        clear_es_index.delay(projects=projects_pks)
-
+        projects = instance.projects.filter(pk__in=projects_pks)
+        projects_slugs = list(projects.values_list('slug', flat=True))
+        projects.delete()
+        clear_es_index.delay(projects=projects_pks, project_slugs=projects_slugs)
 
-@receiver(pre_save, sender=Project)
-def index_documents_project_save(instance, *args, **kwargs):  # noqa
-    """If project default_version has changed - reindex PageDocument."""
-    from readthedocs.search.documents import PageDocument
 
-    if not instance.id or not DEDConfig.autosync_enabled():
+@receiver(post_save, sender=Project)
+def on_project_create(sender, instance, created, **kwargs):  # noqa
+    """Create ProjectOrder on Project create"""
+    if not created:
         return
+    ProjectOrder.objects.create(project=instance)
+
+
+@receiver(m2m_changed, sender=Project.tags.through)
+def on_project_tags_change(sender, instance, action, **kwargs):  # noqa
+    """Update the related projects sharing tags with the project."""
+    if action in RELATED_PROJECTS_ACTIONS:
+        schedule_related_projects_update([instance.pk])
+    if action in PUBLISHED_DOCUMENTS_ACTIONS:
+        schedule_published_documents_update([instance.pk])
 
-    previous = Project.objects.get(id=instance.id)
 
-    if previous.default_version == instance.default_version:
+@receiver(m2m_changed, sender=PublisherProject.projects.through)
+def on_publisher_project_projects_change(sender, instance, action, reverse, pk_set, **kwargs):  # noqa
+    """Update related projects and published documents when the publisher documents change."""
+    if reverse:
+        project_pks = [instance.pk]
+    elif action == 'pre_clear':
+        project_pks = list(instance.projects.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        project_pks = list(
+            PublishedDocument.objects.filter(
+                publisher_project=instance,
+            ).values_list('project', flat=True)
+        )
+    else:
+        project_pks = pk_set
+
+    if action in RELATED_PROJECTS_ACTIONS:
+        schedule_related_projects_update(project_pks)
+    if action in PUBLISHED_DOCUMENTS_ACTIONS:
+        schedule_published_documents_update(project_pks)
+    if action in PATH_PREFIX_ACTIONS:
+        invalidate_publisher_path_prefixes(
+            Project.objects.filter(pk__in=project_pks).values_list('slug', flat=True)
+        )
+
+
+@receiver(pre_save, sender=Project)
+def on_project_pre_save(sender, instance, **kwargs):  # noqa
+    """Take note if a field of ``instance`` shown in the related projects sections changes."""
+    if instance.pk is None:
+        instance._related_fields_changed = False
         return
+    previous = Project.objects.filter(
+        pk=instance.pk,
+    ).values_list(*RELATED_PROJECT_FIELDS).first()
+    current = tuple(getattr(instance, field) for field in RELATED_PROJECT_FIELDS)
+    instance._related_fields_changed = previous is not None and previous != current
+
 
-    html_obj_ids = HTMLFile.objects.filter(
-        project=instance, version__slug__in=[previous.default_version, instance.default_version]
-    ).values_list('id', flat=True)
+@receiver(post_save, sender=Project)
+def on_project_save(sender, instance, **kwargs):  # noqa
+    """Update the related projects showing the renamed project."""
+    if getattr(instance, '_related_fields_changed', False):
+        instance._related_fields_changed = False
+        schedule_related_projects_update([instance.pk])
+
+
+@receiver(pre_delete, sender=Project)
+def on_project_pre_delete(sender, instance, **kwargs):  # noqa
+    """Take note of the related projects, they aren't found after the removal."""
+    instance._related_project_pks = get_projects_related_to([instance.pk]) - {instance.pk}
+
+
+@receiver(post_delete, sender=Project)
+def on_project_related_delete(sender, instance, **kwargs):  # noqa
+    """Remove the deleted project from the related projects sections."""
+    cache.delete(RELATED_PROJECTS_CACHE_KEY.format(instance.pk))
+    schedule_related_sections_update(getattr(instance, '_related_project_pks', set()))
+
+
+@receiver(post_save, sender=Build)
+def on_build_finished(sender, instance, **kwargs):  # noqa
+    """Publish the document on build completion."""
+    if instance.state == BUILD_STATE_FINISHED:
+        schedule_published_documents_update([instance.project_id])
 
-    if not html_obj_ids:
+
+@receiver(pre_save, sender=Version)
+def on_version_pre_save(sender, instance, **kwargs):  # noqa
+    """Take note if a field of ``instance`` affecting the portal changes."""
+    instance._built_changed = False
+    if instance.pk is None:
+        instance._published_fields_changed = instance.active
         return
+    previous = Version.objects.filter(
+        pk=instance.pk,
+    ).values_list(*PUBLISHED_VERSION_FIELDS).first()
+    current = tuple(getattr(instance, field) for field in PUBLISHED_VERSION_FIELDS)
+    instance._published_fields_changed = previous != current
+    if previous is not None:
+        previous_built = previous[PUBLISHED_VERSION_FIELDS.index('built')]
+        instance._built_changed = previous_built != instance.built
 
-    kwargs = {
-        'app_label': HTMLFile._meta.app_label,
-        'model_name': HTMLFile.__name__,
-        'document_class': str(PageDocument),
-        'objects_id': list(html_obj_ids),
-    }
 
-    # execute in a second to get object after save
-    index_objects_to_es.apply_async(kwargs=kwargs, countdown=1)
+@receiver(post_save, sender=Version)
+def on_version_save(sender, instance, **kwargs):  # noqa
+    """
+    Active status, privacy level and built status of versions affect published documents.
 
+    The related projects are updated too when a project gets its first build
+    or loses it.
+    """
+    if getattr(instance, '_published_fields_changed', False):
+        instance._published_fields_changed = False
+        schedule_published_documents_update([instance.project_id])
+    if getattr(instance, '_built_changed', False):
+        instance._built_changed = False
+        schedule_related_projects_update([instance.project_id])
 
-@receiver(post_save, sender=Project)
-def on_project_create(sender, instance, created, **kwargs):  # noqa
-    """Create ProjectOrder on Project create"""
-    if not created:
+
+@receiver(post_save, sender=Publisher)
+@receiver(post_save, sender=PublisherProject)
+def on_publisher_save(sender, instance, **kwargs):  # noqa
+    """Update the documents of the publisher or publisher project on metadata sync."""
+    if sender is Publisher:
+        projects = Project.objects.filter(publisherproject__publisher=instance)
+    else:
+        projects = instance.projects.all()
+    schedule_published_documents_update(projects.values_list('pk', flat=True).distinct())
+
+
+@receiver(post_save, sender=ProjectOrder)
+def on_project_order_save(sender, instance, **kwargs):  # noqa
+    """Keep the priority of the published document in sync."""
+    schedule_published_documents_update([instance.project_id])
+
+
+@receiver(post_save, sender=AllowedTag)
+@receiver(post_delete, sender=AllowedTag)
+def on_allowed_tag_change(sender, **kwargs):  # noqa
+    """Invalidate the allowed tags cached by ``get_allowed_tags``."""
+    invalidate_allowed_tags()
+
+
+@receiver(pre_save, sender=Publisher)
+@receiver(pre_save, sender=PublisherProject)
+def on_publisher_slug_change(sender, instance, **kwargs):  # noqa
+    """The slugs of publishers and publisher projects prefix the documents paths."""
+    if not instance.pk:
         return
-    ProjectOrder.objects.create(project=instance)
+    previous = sender.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+    if previous is not None and previous != instance.slug:
+        invalidate_publisher_path_prefixes()
+
+
+@receiver(post_delete, sender=Publisher)
+@receiver(post_delete, sender=PublisherProject)
+def on_publisher_delete(sender, **kwargs):  # noqa
+    """Documents of a deleted publisher or publisher project lose the path prefix."""
+    invalidate_publisher_path_prefixes()
+
+
+@receiver(post_delete, sender=Project)
+def on_project_delete(sender, instance, **kwargs):  # noqa
+    """A new project could reuse the slug of the deleted one."""
+    invalidate_publisher_path_prefixes([instance.slug])
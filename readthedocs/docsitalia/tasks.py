@@ -2,32 +2,171 @@
 
 from __future__ import unicode_literals
 import logging
+import time
 
 from django.conf import settings
-from elasticsearch import Elasticsearch, exceptions
+from django.core.cache import cache
+from elasticsearch import Elasticsearch, exceptions, helpers
 
+from readthedocs.projects.models import Project
+from readthedocs.search.utils import invalidate_search_cache
 from readthedocs.worker import app
 
+from .models import PublishedDocument
+from .utils import (
+    PUBLISHED_DOCUMENTS_DIRTY_KEY,
+    SEARCH_FIELDS_DIRTY_KEY,
+    cache_related_projects,
+    get_search_fields,
+)
+
 
 log = logging.getLogger(__name__)  # noqa
 
+# sets the docsitalia fields of the pages and recomputes ``is_default``
+PAGE_SEARCH_FIELDS_SCRIPT = (
+    'ctx._source.putAll(params.fields); '
+    'ctx._source.is_default = ctx._source.version == params.default_version'
+)
+
+# seconds between the checks of the ES tasks and before giving up on them
+ES_TASKS_POLL_INTERVAL = 1
+ES_TASKS_TIMEOUT = 60 * 5
+
 
 @app.task()
-def clear_es_index(projects):
-    """Clearing ES indexes for removed projects."""
+def clear_es_index(projects, project_slugs=None):
+    """
+    Clearing ES indexes for removed projects.
+
+    The projects are deleted with a single bulk request, their pages from the
+    page and the quicksearch indexes with a ``delete_by_query`` each, run in
+    parallel by ES.
+    """
+    from readthedocs.search.documents import ProjectDocument
+
     projects_str = ', '.join([str(p) for p in projects])
     log.info('Clearing indexes for removed projects: %s', projects_str)
-    e_s = Elasticsearch(settings.ES_HOSTS)
-    for p_id in projects:
-        try:
-            e_s.delete(index='readthedocs', doc_type='project', id=p_id)
-        except exceptions.NotFoundError:
-            pass
+    e_s = Elasticsearch(**settings.ELASTICSEARCH_DSL['default'])
+    helpers.bulk(
+        e_s,
+        [{
+            '_op_type': 'delete',
+            '_index': settings.ES_INDEXES['project']['name'],
+            '_type': ProjectDocument._doc_type.mapping.doc_type,
+            '_id': p_id,
+        } for p_id in projects],
+        raise_on_error=False,
+    )
 
+    if not project_slugs:
+        return
+    tasks = []
+    for index in ('page', 'quicksearch'):
         try:
-            e_s.delete_by_query(
-                index='readthedocs',
-                doc_type='page',
-                body={'query': {'term': {'project_id': p_id}}})
+            response = e_s.delete_by_query(
+                index=settings.ES_INDEXES[index]['name'],
+                body={'query': {'terms': {'project': project_slugs}}},
+                conflicts='proceed',
+                slices='auto',
+                wait_for_completion=False,
+            )
         except exceptions.NotFoundError:
-            pass
+            continue
+        tasks.append(response['task'])
+    wait_for_es_tasks(e_s, tasks)
+    invalidate_search_cache()
+
+
+def wait_for_es_tasks(e_s, tasks):
+    """Poll the ES ``tasks`` until they complete or ``ES_TASKS_TIMEOUT`` expires."""
+    deadline = time.time() + ES_TASKS_TIMEOUT
+    while tasks:
+        for task_id in list(tasks):
+            if e_s.tasks.get(task_id=task_id).get('completed'):
+                tasks.remove(task_id)
+        if not tasks:
+            break
+        if time.time() > deadline:
+            log.warning('ES tasks still running: %s', ', '.join(tasks))
+            break
+        time.sleep(ES_TASKS_POLL_INTERVAL)
+
+
+@app.task(queue='web')
+def update_related_projects(project_pks):
+    """Recompute the related projects sections of ``project_pks``."""
+    projects = Project.objects.filter(
+        pk__in=project_pks,
+        documentation_type__contains='sphinx',
+        publisherproject__isnull=False,
+    ).distinct()
+    log.info('Updating related projects: count=%s', len(project_pks))
+    for project in projects:
+        cache_related_projects(project)
+
+
+@app.task(queue='web')
+def update_published_documents(project_pks):
+    """Update the published documents projection of ``project_pks``."""
+    cache.delete_many([PUBLISHED_DOCUMENTS_DIRTY_KEY.format(pk) for pk in project_pks])
+    PublishedDocument.update_projects(project_pks)
+
+
+@app.task(queue='web')
+def update_search_fields(project_pks):
+    """
+    Update the docsitalia fields of the search documents of ``project_pks``.
+
+    Only the fields derived from the publisher, the project order and the tags
+    are sent to ES, the documents are not prepared again.
+    """
+    from readthedocs.search.documents import PageDocument, ProjectDocument
+
+    cache.delete_many([SEARCH_FIELDS_DIRTY_KEY.format(pk) for pk in project_pks])
+    projects = Project.objects.filter(
+        pk__in=project_pks,
+    ).select_related(
+        'projectorder',
+    ).prefetch_related(
+        'tags',
+        'publisherproject_set__publisher',
+    )
+    log.info('Updating search fields of projects: count=%s', len(project_pks))
+
+    e_s = Elasticsearch(**settings.ELASTICSEARCH_DSL['default'])
+    project_actions = []
+    for project in projects:
+        search_fields = get_search_fields(project)
+        project_actions.append({
+            '_op_type': 'update',
+            '_index': str(ProjectDocument._doc_type.index),
+            '_type': ProjectDocument._doc_type.mapping.doc_type,
+            '_id': project.pk,
+            'doc': search_fields,
+        })
+        e_s.update_by_query(
+            index=str(PageDocument._doc_type.index),
+            doc_type=PageDocument._doc_type.mapping.doc_type,
+            body={
+                'query': {'term': {'project': project.slug}},
+                'script': {
+                    'lang': 'painless',
+                    'source': PAGE_SEARCH_FIELDS_SCRIPT,
+                    'params': {
+                        'fields': search_fields,
+                        'default_version': project.default_version,
+                    },
+                },
+            },
+            conflicts='proceed',
+            refresh=settings.ELASTICSEARCH_DSL_AUTO_REFRESH,
+        )
+    # projects not indexed yet are skipped
+    helpers.bulk(
+        e_s,
+        project_actions,
+        raise_on_error=False,
+        refresh=settings.ELASTICSEARCH_DSL_AUTO_REFRESH,
+    )
+    invalidate_search_cache()
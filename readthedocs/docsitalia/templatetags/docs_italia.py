@@ -1,11 +1,10 @@
 """Template tags for docs italia app."""
 
 from django import template
-from taggit.models import Tag
 
 from readthedocs.core.resolver import resolve
 
-from ..models import PublisherProject
+from ..utils import get_portal_labels
 
 
 register = template.Library()
@@ -13,20 +12,14 @@ register = template.Library()
 
 @register.filter
 def get_publisher_project(slug):
-    """get a publisher project from the slug."""
-    try:
-        return PublisherProject.objects.get(slug=slug)
-    except PublisherProject.DoesNotExist:
-        return slug
+    """get a publisher project name from the slug."""
+    return get_portal_labels()['publisher_projects'].get(slug, slug)
 
 
 @register.filter
 def get_project_tag(slug):
-    """Get tag from the slug."""
-    try:
-        return Tag.objects.get(slug=slug)
-    except Tag.DoesNotExist:
-        return slug
+    """Get tag name from the slug."""
+    return get_portal_labels()['tags'].get(slug, slug)
 
 
 @register.simple_tag(name="doc_url_patched")
@@ -4,12 +4,18 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import time
+
 import yaml
 
 # pylint: disable=redefined-builtin
 from requests.exceptions import ConnectionError
 
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
+from django_elasticsearch_dsl.apps import DEDConfig
 
 from readthedocs.builds.constants import LATEST, STABLE
 from readthedocs.builds.models import Build
@@ -19,6 +25,33 @@ from readthedocs.api.v2.client import api as apiv2
 from . import LANG_IT
 
 
+PUBLISHED_DOCUMENTS_VERSION_CACHE_KEY = 'docsitalia:published-documents:version'
+PORTAL_LABELS_CACHE_KEY = 'docsitalia:portal-labels:{}'
+# seconds the portal listings fragments are cached for
+PORTAL_CACHE_TIME = 60 * 10
+
+ALLOWED_TAGS_VERSION_CACHE_KEY = 'docsitalia:allowed-tags:version'
+
+RELATED_PROJECTS_CACHE_KEY = 'docsitalia:related-projects:{}'
+RELATED_PROJECTS_CACHE_TIME = 60 * 60 * 24
+# seconds to wait before recomputing, so that a burst of changes is handled once
+RELATED_PROJECTS_UPDATE_DELAY = 10
+
+RESOLVER_VERSION_CACHE_KEY = 'docsitalia:resolver:version'
+RESOLVER_PREFIX_CACHE_KEY = 'docsitalia:resolver-prefix:{}:{}'
+RESOLVER_PREFIX_CACHE_TIME = 60 * 60 * 24
+
+PUBLISHED_DOCUMENTS_DIRTY_KEY = 'docsitalia:published-documents-dirty:{}'
+# the marker outlives the delay, so a lost task doesn't block the updates forever
+PUBLISHED_DOCUMENTS_DIRTY_TIME = 60 * 10
+PUBLISHED_DOCUMENTS_UPDATE_DELAY = 10
+
+SEARCH_FIELDS_DIRTY_KEY = 'docsitalia:search-fields-dirty:{}'
+# the marker outlives the delay, so a lost task doesn't block the updates forever
+SEARCH_FIELDS_DIRTY_TIME = 60 * 10
+SEARCH_FIELDS_UPDATE_DELAY = 10
+
+
 def load_yaml(txt):
     """Helper for yaml parsing."""
     try:
@@ -125,3 +158,213 @@ def docsitalia_parse_tags(tag_string):
         return sorted(tag_string.split(','))
 
     return []
+
+
+def get_related_projects(project):
+    """
+    Return the "Documenti correlati" sections of the project.
+
+    Sections are precomputed by ``update_related_projects``: they are only
+    built here on a cache miss.
+    """
+    key = RELATED_PROJECTS_CACHE_KEY.format(project.pk)
+    data = cache.get(key)
+    if data is None:
+        data = cache_related_projects(project)
+    return data
+
+
+def cache_related_projects(project):
+    """Compute the related projects sections of the project and cache them."""
+    from .serializers import RelatedProjectsSerializer
+
+    data = RelatedProjectsSerializer(project).data
+    cache.set(
+        RELATED_PROJECTS_CACHE_KEY.format(project.pk),
+        data,
+        RELATED_PROJECTS_CACHE_TIME,
+    )
+    return data
+
+
+def get_projects_related_to(project_pks):
+    """
+    Return the pks of the projects whose related sections include any of ``project_pks``.
+
+    These are the projects themselves, the ones sharing a publisher with them
+    and the ones sharing at least a tag.
+    """
+    publishers = Project.objects.filter(
+        pk__in=project_pks,
+    ).values('publisherproject__publisher')
+    tags = Project.objects.filter(pk__in=project_pks).values('tags')
+    related = Project.objects.filter(
+        Q(pk__in=project_pks) |
+        Q(publisherproject__publisher__in=publishers) |
+        Q(tags__in=tags)
+    )
+    return set(related.values_list('pk', flat=True))
+
+
+def schedule_related_projects_update(project_pks):
+    """
+    Recompute asynchronously the related projects sections affected by ``project_pks``.
+
+    Call it before removing a relation too, as afterwards the projects that
+    were related aren't found anymore.
+    """
+    schedule_related_sections_update(get_projects_related_to(project_pks))
+
+
+def schedule_related_sections_update(project_pks):
+    """Recompute asynchronously the related projects sections of ``project_pks`` only."""
+    from .tasks import update_related_projects
+
+    if project_pks:
+        update_related_projects.apply_async(
+            args=[sorted(project_pks)],
+            countdown=RELATED_PROJECTS_UPDATE_DELAY,
+        )
+
+
+def schedule_published_documents_update(project_pks):
+    """
+    Update the published documents projection of ``project_pks``.
+
+    Projects already waiting for the update are skipped, so that a burst of
+    changes results in a single update of their published documents.
+    """
+    from .tasks import update_published_documents
+
+    dirty_pks = [
+        pk for pk in set(project_pks)
+        if cache.add(
+            PUBLISHED_DOCUMENTS_DIRTY_KEY.format(pk), True, PUBLISHED_DOCUMENTS_DIRTY_TIME
+        )
+    ]
+    if dirty_pks:
+        update_published_documents.apply_async(
+            args=[sorted(dirty_pks)],
+            countdown=PUBLISHED_DOCUMENTS_UPDATE_DELAY,
+        )
+
+
+def mark_projects_dirty(project_pks):
+    """
+    Schedule the update of the docsitalia fields indexed for ``project_pks``.
+
+    Projects already waiting for the update are skipped, so that a burst of
+    changes results in a single partial update of their search documents.
+    """
+    from .tasks import update_search_fields
+
+    if not DEDConfig.autosync_enabled():
+        return
+
+    dirty_pks = [
+        pk for pk in set(project_pks)
+        if cache.add(SEARCH_FIELDS_DIRTY_KEY.format(pk), True, SEARCH_FIELDS_DIRTY_TIME)
+    ]
+    if dirty_pks:
+        update_search_fields.apply_async(
+            args=[sorted(dirty_pks)],
+            countdown=SEARCH_FIELDS_UPDATE_DELAY,
+        )
+
+
+def get_search_fields(project):
+    """Return the docsitalia fields of the search documents of the project."""
+    publisher_projects = sorted(project.publisherproject_set.all(), key=lambda p: p.pk)
+    try:
+        priority = project.projectorder.priority
+    except ObjectDoesNotExist:
+        priority = 0
+    return {
+        'publisher_project': publisher_projects[0].slug if publisher_projects else None,
+        'publisher': publisher_projects[0].publisher.name if publisher_projects else None,
+        'priority': priority,
+        'tags': [
+            {'id': tag.id, 'name': tag.name, 'slug': tag.slug}
+            for tag in project.tags.all()
+        ],
+    }
+
+
+def get_published_documents_version():
+    """
+    Return the version of the published documents listings.
+
+    It's part of the key of every cached portal fragment, so changing it
+    invalidates all of them at once.
+    """
+    return cache.get_or_set(PUBLISHED_DOCUMENTS_VERSION_CACHE_KEY, time.time, None)
+
+
+def invalidate_published_documents():
+    """Invalidate the cached portal listings."""
+    cache.set(PUBLISHED_DOCUMENTS_VERSION_CACHE_KEY, time.time(), None)
+
+
+def get_portal_labels():
+    """Return the names of the publisher projects and tags keyed by slug."""
+    from taggit.models import Tag
+    from .models import PublisherProject
+
+    key = PORTAL_LABELS_CACHE_KEY.format(get_published_documents_version())
+    labels = cache.get(key)
+    if labels is None:
+        labels = {
+            'publisher_projects': dict(
+                PublisherProject.objects.values_list('slug', 'name')
+            ),
+            'tags': dict(Tag.objects.values_list('slug', 'name')),
+        }
+        cache.set(key, labels, PORTAL_CACHE_TIME)
+    return labels
+
+
+def get_allowed_tags_version():
+    """Return the version of the allowed tags, changed on every ``AllowedTag`` write."""
+    return cache.get_or_set(ALLOWED_TAGS_VERSION_CACHE_KEY, time.time, None)
+
+
+def invalidate_allowed_tags():
+    """Invalidate the allowed tags cached by every process."""
+    cache.set(ALLOWED_TAGS_VERSION_CACHE_KEY, time.time(), None)
+
+
+def get_resolver_version():
+    """Return the version of the cached path prefixes, changed when a slug changes."""
+    return cache.get_or_set(RESOLVER_VERSION_CACHE_KEY, time.time, None)
+
+
+def get_publisher_path_prefix(project_slug):
+    """
+    Return the publisher and publisher project slugs prefixing the project path.
+
+    They are cached, so that resolving the URLs of many documents doesn't cost
+    a query each. ``None`` is returned for projects without publisher project.
+    """
+    from .models import PublisherProject
+
+    key = RESOLVER_PREFIX_CACHE_KEY.format(get_resolver_version(), project_slug)
+    prefix = cache.get(key)
+    if prefix is None:
+        row = PublisherProject.objects.filter(
+            projects__slug=project_slug,
+        ).order_by('pk').values_list('publisher__slug', 'slug').first()
+        # an empty list caches the projects without publisher project too
+        prefix = list(row) if row else []
+        cache.set(key, prefix, RESOLVER_PREFIX_CACHE_TIME)
+    return tuple(prefix) or None
+
+
+def invalidate_publisher_path_prefixes(project_slugs=None):
+    """Invalidate the path prefixes cached for ``project_slugs``, or for every project."""
+    if project_slugs is None:
+        cache.set(RESOLVER_VERSION_CACHE_KEY, time.time(), None)
+        return
+    version = get_resolver_version()
+    cache.delete_many([
+        RESOLVER_PREFIX_CACHE_KEY.format(version, slug) for slug in project_slugs
+    ])
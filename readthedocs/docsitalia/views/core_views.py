@@ -3,7 +3,7 @@
 
 import logging
 
-from django.db.models import Case, When
+from django.db.models import Case, DateTimeField, F, When
 from django.http import HttpResponseRedirect, Http404
 from django.shortcuts import render, redirect
 from django.urls import reverse
@@ -19,14 +19,30 @@ from readthedocs.projects.views.private import ImportView
 
 from ..github import get_metadata_for_document
 from ..metadata import InvalidMetadata
-from ..models import PublisherProject, Publisher, ProjectOrder, update_project_from_metadata
-from ..utils import get_projects_with_builds
+from ..models import (
+    PublishedDocument,
+    PublisherProject,
+    Publisher,
+    update_project_from_metadata,
+)
+from ..utils import PORTAL_CACHE_TIME, get_published_documents_version
 from ...search.views import elastic_search
 
 log = logging.getLogger(__name__)  # noqa
 
 
-class DocsItaliaHomePage(ListView):  # pylint: disable=too-many-ancestors
+class PublishedDocumentsCacheMixin:
+
+    """Add the key of the cached portal fragments to the context."""
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['portal_cache_time'] = PORTAL_CACHE_TIME
+        context['published_documents_version'] = get_published_documents_version()
+        return context
+
+
+class DocsItaliaHomePage(PublishedDocumentsCacheMixin, ListView):  # pylint: disable=too-many-ancestors
 
     """Docs italia Home Page."""
 
@@ -37,38 +53,41 @@ class DocsItaliaHomePage(ListView):  # pylint: disable=too-many-ancestors
         """
         Filter projects to show in homepage.
 
-        We show in homepage projects that matches the following requirements:
+        We show in homepage the published documents, see
+        :py:class:`PublishedDocument`:
         - Publisher is active
         - PublisherProject is active
         - document (Project) has a public build
         - Build is success and finished
 
         Ordering by:
-        - ProjectOrder model values
+        - ProjectOrder priority descending
+        - the time the priority was set ascending, only for the documents
+          with a priority
         - modified_date descending
         - pub_date descending
         """
-        active_pub_projects = PublisherProject.objects.filter(
-            active=True,
-            publisher__active=True
+        priority_date = Case(
+            When(
+                publisheddocument__priority__gt=0,
+                then=F('publisheddocument__priority_date'),
+            ),
+            default=None,
+            output_field=DateTimeField(),
         )
-        qs = get_projects_with_builds()
+        return Project.objects.filter(
+            publisheddocument__isnull=False
+        ).select_related(
+            'publisheddocument__publisher_project__publisher'
+        ).order_by(
+            '-publisheddocument__priority',
+            priority_date,
+            '-modified_date',
+            '-pub_date',
+        )[:24]
 
-        order_by_list = ['-modified_date', '-pub_date']
-
-        projects_priority_list = ProjectOrder.objects.all().values_list('project', flat=True)
-        if projects_priority_list:
-            project_priority_order = Case(
-                *[When(id=pk, then=pos) for pos, pk in enumerate(projects_priority_list)]
-            )
-            order_by_list.insert(0, project_priority_order)
 
-        return qs.filter(
-            publisherproject__in=active_pub_projects
-        ).order_by(*order_by_list)[:24]
-
-
-class PublisherList(ListView):  # pylint: disable=too-many-ancestors
+class PublisherList(PublishedDocumentsCacheMixin, ListView):  # pylint: disable=too-many-ancestors
 
     """List view of :py:class:`Publisher` instances."""
 
@@ -82,23 +101,12 @@ class PublisherList(ListView):  # pylint: disable=too-many-ancestors
         - are active
         - have documents with successful public build
         """
-        active_pub_projects = PublisherProject.objects.filter(
-            active=True,
-            publisher__active=True
-        )
-        publishers_with_projects = get_projects_with_builds().filter(
-            publisherproject__in=active_pub_projects
-        ).values_list(
-            'publisherproject__publisher',
-            flat=True
-        )
-
         return Publisher.objects.filter(
-            pk__in=publishers_with_projects
+            pk__in=PublishedDocument.objects.values('publisher')
         )
 
 
-class PublisherIndex(DetailView):  # pylint: disable=too-many-ancestors
+class PublisherIndex(PublishedDocumentsCacheMixin, DetailView):  # pylint: disable=too-many-ancestors
 
     """Detail view of :py:class:`Publisher` instances."""
 
@@ -109,7 +117,7 @@ class PublisherIndex(DetailView):  # pylint: disable=too-many-ancestors
         return Publisher.objects.filter(active=True)
 
 
-class PublisherProjectIndex(DetailView):  # pylint: disable=too-many-ancestors
+class PublisherProjectIndex(PublishedDocumentsCacheMixin, DetailView):  # pylint: disable=too-many-ancestors
 
     """Detail view of :py:class:`PublisherProject` instances."""
 
@@ -3,11 +3,13 @@
 
 from rest_framework.generics import RetrieveAPIView
 from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 
 from readthedocs.api.v2.permissions import APIPermission
 from readthedocs.projects.models import Project
 
 from ..serializers import RelatedProjectsSerializer
+from ..utils import get_related_projects
 
 
 class RelatedProjectsView(RetrieveAPIView):
@@ -21,3 +23,7 @@ class RelatedProjectsView(RetrieveAPIView):
     )
     renderer_classes = (JSONRenderer,)
     serializer_class = RelatedProjectsSerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return the precomputed sections, see ``update_related_projects``."""
+        return Response(get_related_projects(self.get_object()))
@@ -4,7 +4,7 @@
 from dal import autocomplete
 from django import forms
 
-from .models import AllowedTag
+from .metadata import get_allowed_tags
 
 
 # pylint: disable=too-many-ancestors
@@ -17,9 +17,7 @@ class WhitelistedTaggitSelect2(autocomplete.TaggitSelect2):
     def value_from_datadict(self, data, files, name):
         csv_tags = super(WhitelistedTaggitSelect2, self).value_from_datadict(data, files, name)
         tags = set(csv_tags.split(','))
-        filtered_tags = tags & set(
-            AllowedTag.objects.filter(enabled=True).values_list('name', flat=True),
-        )
+        filtered_tags = tags & get_allowed_tags()
         return ','.join(filtered_tags)
 
 
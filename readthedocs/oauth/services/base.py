@@ -134,54 +134,73 @@ class Service:
 
     def paginate(self, url, **kwargs):
         """
-        Recursively combine results from service's pagination.
+        Iterate over the results of service's pagination.
+
+        Pages are requested lazily, one at a time, so that the results can be
+        processed in bounded memory.
 
         :param url: start url to get the data from.
         :type url: unicode
         :param kwargs: optional parameters passed to .get() method
         :type kwargs: dict
         """
-        try:
-            resp = self.get_session().get(url, data=kwargs)
-
-            # TODO: this check of the status_code would be better in the
-            # ``create_session`` method since it could be used from outside, but
-            # I didn't find a generic way to make a test request to each
-            # provider.
-            if resp.status_code == 401:
-                # Bad credentials: the token we have in our database is not
-                # valid. Probably the user has revoked the access to our App. He
-                # needs to reconnect his account
-                raise SyncServiceError(
-                    'Our access to your {provider} account was revoked. '
-                    'Please, reconnect it from your social account connections.'.format(
-                        provider=self.provider_name,
-                    ),
-                )
+        for results in self.paginate_pages(url, **kwargs):
+            yield from results
 
-            next_url = self.get_next_url_to_paginate(resp)
-            results = self.get_paginated_results(resp)
-            if next_url:
-                results.extend(self.paginate(next_url))
-            return results
-        # Catch specific exception related to OAuth
-        except InvalidClientIdError:
-            log.warning('access_token or refresh_token failed: %s', url)
-            raise Exception('You should reconnect your account')
-        # Catch exceptions with request or deserializing JSON
-        except (RequestException, ValueError):
-            # Response data should always be JSON, still try to log if not
-            # though
+    def paginate_pages(self, url, **kwargs):
+        """
+        Iterate over the pages of service's pagination, yielding their results.
+
+        :param url: start url to get the data from.
+        :type url: unicode
+        :param kwargs: optional parameters passed to .get() method of the
+            first request, the next urls already include them
+        :type kwargs: dict
+        """
+        while url:
+            resp = None
             try:
-                debug_data = resp.json()
-            except ValueError:
-                debug_data = resp.content
-            log.debug(
-                'Paginate failed at %s with response: %s',
-                url,
-                debug_data,
-            )
-            return []
+                resp = self.get_session().get(url, data=kwargs)
+
+                # TODO: this check of the status_code would be better in the
+                # ``create_session`` method since it could be used from outside, but
+                # I didn't find a generic way to make a test request to each
+                # provider.
+                if resp.status_code == 401:
+                    # Bad credentials: the token we have in our database is not
+                    # valid. Probably the user has revoked the access to our App. He
+                    # needs to reconnect his account
+                    raise SyncServiceError(
+                        'Our access to your {provider} account was revoked. '
+                        'Please, reconnect it from your social account connections.'.format(
+                            provider=self.provider_name,
+                        ),
+                    )
+
+                next_url = self.get_next_url_to_paginate(resp)
+                results = self.get_paginated_results(resp)
+            # Catch specific exception related to OAuth
+            except InvalidClientIdError:
+                log.warning('access_token or refresh_token failed: %s', url)
+                raise Exception('You should reconnect your account')
+            # Catch exceptions with request or deserializing JSON
+            except (RequestException, ValueError):
+                # Response data should always be JSON, still try to log if not
+                # though
+                try:
+                    debug_data = resp.json() if resp is not None else None
+                except ValueError:
+                    debug_data = resp.content
+                log.debug(
+                    'Paginate failed at %s with response: %s',
+                    url,
+                    debug_data,
+                )
+                return
+
+            yield results
+            url = next_url
+            kwargs = {}
 
     def sync(self):
         """Sync repositories and organizations."""
@@ -41,10 +41,10 @@ class GitHubService(Service):
 
     def sync_repositories(self):
         """Sync repositories from GitHub API."""
-        repos = self.paginate('https://api.github.com/user/repos?per_page=100')
+        pages = self.paginate_pages('https://api.github.com/user/repos?per_page=100')
         try:
-            for repo in repos:
-                self.create_repository(repo)
+            for repos in pages:
+                self.create_repositories(repos)
         except (TypeError, ValueError):
             log.warning('Error syncing GitHub repositories')
             raise SyncServiceError(
@@ -55,17 +55,17 @@ class GitHubService(Service):
     def sync_organizations(self):
         """Sync organizations from GitHub API."""
         try:
-            orgs = self.paginate('https://api.github.com/user/orgs')
-            for org in orgs:
-                org_resp = self.get_session().get(org['url'])
-                org_obj = self.create_organization(org_resp.json())
+            orgs = [
+                self.get_session().get(org['url']).json()
+                for org in self.paginate('https://api.github.com/user/orgs?per_page=100')
+            ]
+            for org_obj, org in zip(self.create_organizations(orgs), orgs):
                 # Add repos
-                # TODO ?per_page=100
-                org_repos = self.paginate(
-                    '{org_url}/repos'.format(org_url=org['url']),
+                pages = self.paginate_pages(
+                    '{org_url}/repos?per_page=100'.format(org_url=org['url']),
                 )
-                for repo in org_repos:
-                    self.create_repository(repo, organization=org_obj)
+                for repos in pages:
+                    self.create_repositories(repos, organization=org_obj)
         except (TypeError, ValueError):
             log.warning('Error syncing GitHub organizations')
             raise SyncServiceError(
@@ -83,54 +83,112 @@ class GitHubService(Service):
         :type organization: RemoteOrganization
         :rtype: RemoteRepository
         """
+        repos = self.create_repositories([fields], privacy=privacy, organization=organization)
+        return repos[0] if repos else None
+
+    def create_repositories(self, repositories, privacy=None, organization=None):
+        """
+        Update or create the repositories of a page of GitHub API response.
+
+        The repositories of the user are fetched with a single query and
+        saved only when changed, the new ones are created and linked to the
+        user in bulk.
+
+        :param repositories: list of dictionaries of response data from API
+        :param privacy: privacy level to support
+        :param organization: remote organization to associate with
+        :type organization: RemoteOrganization
+        :returns: the repositories imported
+        :rtype: list of RemoteRepository
+        """
         privacy = privacy or settings.DEFAULT_PRIVACY_LEVEL
-        if any([
-                (privacy == 'private'),
-                (fields['private'] is False and privacy == 'public'),
-        ]):
-            try:
-                repo = RemoteRepository.objects.get(
-                    full_name=fields['full_name'],
-                    users=self.user,
-                    account=self.account,
+        importable = []
+        for fields in repositories:
+            if any([
+                    (privacy == 'private'),
+                    (fields['private'] is False and privacy == 'public'),
+            ]):
+                importable.append(fields)
+            else:
+                log.debug(
+                    'Not importing %s because mismatched type',
+                    fields['name'],
                 )
-            except RemoteRepository.DoesNotExist:
-                repo = RemoteRepository.objects.create(
+
+        existing = {
+            repo.full_name: repo
+            for repo in RemoteRepository.objects.filter(
+                full_name__in=[fields['full_name'] for fields in importable],
+                users=self.user,
+                account=self.account,
+            )
+        }
+        organization_pk = organization.pk if organization else None
+        imported = []
+        created = []
+        for fields in importable:
+            repo = existing.get(fields['full_name'])
+            if repo is None:
+                repo = RemoteRepository(
                     full_name=fields['full_name'],
                     account=self.account,
                 )
-                repo.users.add(self.user)
-            if repo.organization and repo.organization != organization:
+                existing[repo.full_name] = repo
+                created.append(repo)
+            elif repo.organization_id and repo.organization_id != organization_pk:
                 log.debug(
                     'Not importing %s because mismatched orgs',
                     fields['name'],
                 )
-                return None
-
-            repo.organization = organization
-            repo.name = fields['name']
-            repo.description = fields['description']
-            repo.ssh_url = fields['ssh_url']
-            repo.html_url = fields['html_url']
-            repo.private = fields['private']
-            if repo.private:
-                repo.clone_url = fields['ssh_url']
-            else:
-                repo.clone_url = fields['clone_url']
-            repo.admin = fields.get('permissions', {}).get('admin', False)
-            repo.vcs = 'git'
-            repo.account = self.account
-            repo.avatar_url = fields.get('owner', {}).get('avatar_url')
-            if not repo.avatar_url:
-                repo.avatar_url = self.default_user_avatar_url
+                continue
+
+            changed = self.update_repository_fields(repo, fields, organization)
+            if changed and repo.pk:
+                repo.save()
+            imported.append(repo)
+
+        RemoteRepository.objects.bulk_create(created)
+        through = RemoteRepository.users.through
+        through.objects.bulk_create([
+            through(remoterepository_id=repo.pk, user_id=self.user.pk)
+            for repo in created
+        ])
+        return imported
+
+    def update_repository_fields(self, repo, fields, organization):
+        """
+        Set the repository fields from GitHub API response.
+
+        The raw response, stored in ``json``, is not compared: fields like
+        ``pushed_at`` change on almost every sync. It's updated only along
+        with the other fields.
+
+        :returns: whether any field changed
+        :rtype: bool
+        """
+        values = {
+            'organization_id': organization.pk if organization else None,
+            'name': fields['name'],
+            'description': fields['description'],
+            'ssh_url': fields['ssh_url'],
+            'html_url': fields['html_url'],
+            'private': fields['private'],
+            'clone_url': fields['ssh_url'] if fields['private'] else fields['clone_url'],
+            'admin': fields.get('permissions', {}).get('admin', False),
+            'vcs': 'git',
+            'account_id': self.account.pk if self.account else None,
+            'avatar_url': (
+                fields.get('owner', {}).get('avatar_url') or self.default_user_avatar_url
+            ),
+        }
+        changed = False
+        for attr, value in values.items():
+            if getattr(repo, attr) != value:
+                setattr(repo, attr, value)
+                changed = True
+        if changed or repo.pk is None:
             repo.json = json.dumps(fields)
-            repo.save()
-            return repo
-        else:
-            log.debug(
-                'Not importing %s because mismatched type',
-                fields['name'],
-            )
+        return changed
 
     def create_organization(self, fields):
         """
@@ -139,28 +197,54 @@ class GitHubService(Service):
         :param fields: dictionary response of data from API
         :rtype: RemoteOrganization
         """
-        try:
-            organization = RemoteOrganization.objects.get(
-                slug=fields.get('login'),
+        return self.create_organizations([fields])[0]
+
+    def create_organizations(self, organizations):
+        """
+        Update or create remote organizations from GitHub API responses.
+
+        :param organizations: list of dictionaries of response data from API
+        :returns: the organizations, in the same order
+        :rtype: list of RemoteOrganization
+        """
+        existing = {
+            organization.slug: organization
+            for organization in RemoteOrganization.objects.filter(
+                slug__in=[fields.get('login') for fields in organizations],
                 users=self.user,
                 account=self.account,
             )
-        except RemoteOrganization.DoesNotExist:
-            organization = RemoteOrganization.objects.create(
-                slug=fields.get('login'),
-                account=self.account,
-            )
-            organization.users.add(self.user)
-        organization.url = fields.get('html_url')
-        organization.name = fields.get('name')
-        organization.email = fields.get('email')
-        organization.avatar_url = fields.get('avatar_url')
-        if not organization.avatar_url:
-            organization.avatar_url = self.default_org_avatar_url
-        organization.json = json.dumps(fields)
-        organization.account = self.account
-        organization.save()
-        return organization
+        }
+        imported = []
+        created = []
+        for fields in organizations:
+            organization = existing.get(fields.get('login'))
+            if organization is None:
+                organization = RemoteOrganization(
+                    slug=fields.get('login'),
+                    account=self.account,
+                )
+                existing[organization.slug] = organization
+                created.append(organization)
+            organization.url = fields.get('html_url')
+            organization.name = fields.get('name')
+            organization.email = fields.get('email')
+            organization.avatar_url = fields.get('avatar_url')
+            if not organization.avatar_url:
+                organization.avatar_url = self.default_org_avatar_url
+            organization.json = json.dumps(fields)
+            organization.account = self.account
+            if organization.pk:
+                organization.save()
+            imported.append(organization)
+
+        RemoteOrganization.objects.bulk_create(created)
+        through = RemoteOrganization.users.through
+        through.objects.bulk_create([
+            through(remoteorganization_id=organization.pk, user_id=self.user.pk)
+            for organization in created
+        ])
+        return imported
 
     def get_next_url_to_paginate(self, response):
         return response.links.get('next', {}).get('url')
@@ -480,6 +480,18 @@ class Project(models.Model):
             args=[(self.doc_path,)],
         )
 
+        # Remove the shared git mirror on the build servers
+        if settings.GIT_MIRROR_ROOT:
+            mirror_path = os.path.join(
+                settings.GIT_MIRROR_ROOT,
+                '{}.git'.format(self.slug),
+            )
+            broadcast(
+                type='build',
+                task=tasks.remove_dirs,
+                args=[(mirror_path,)],
+            )
+
         # Remove build artifacts from storage
         storage_paths = []
         for type_ in MEDIA_TYPES:
@@ -1116,8 +1128,22 @@ class Project(models.Model):
         If the feature has a historical True value before the feature was added,
         we consider the project to have the flag. This is used for deprecating a
         feature or changing behavior for new projects
+
+        The features of the project are loaded once per instance, so checking
+        many flags in a request costs a single query. They are loaded again
+        when a feature changes.
         """
-        return self.features.filter(feature_id=feature_id).exists()
+        return feature_id in self.get_feature_ids()
+
+    def get_feature_ids(self):
+        """Return the set of the ids of the features of the project."""
+        cached = getattr(self, '_feature_ids', None)
+        if cached is None or cached[0] != Feature.generation:
+            cached = self._feature_ids = (
+                Feature.generation,
+                set(self.features.values_list('feature_id', flat=True)),
+            )
+        return cached[1]
 
     def get_feature_value(self, feature, positive, negative):
         """
@@ -1177,6 +1203,8 @@ class APIProject(Project):
 
     def __init__(self, *args, **kwargs):
         self.features = kwargs.pop('features', [])
+        # Data returned with the project by the build context API endpoint
+        self.build_context = {}
         environment_variables = kwargs.pop('environment_variables', {})
         ad_free = (not kwargs.pop('show_advertising', True))
         # These fields only exist on the API return, not on the model, so we'll
@@ -1199,6 +1227,16 @@ class APIProject(Project):
     def has_feature(self, feature_id):
         return feature_id in self.features
 
+    def api_versions(self):
+        """Return the active versions, from the build context if there is one."""
+        from readthedocs.builds.models import APIVersion
+        if 'active_versions' not in self.build_context:
+            return super().api_versions()
+        return sort_version_aware([
+            APIVersion(**version_data)
+            for version_data in self.build_context['active_versions']
+        ])
+
     @property
     def show_advertising(self):
         """Whether this project is ad-free (don't access the database)."""
@@ -1444,6 +1482,7 @@ class Feature(models.Model):
     UPDATE_CONDA_STARTUP = 'update_conda_startup'
     CONDA_APPEND_CORE_REQUIREMENTS = 'conda_append_core_requirements'
     SEARCH_ANALYTICS = 'search_analytics'
+    STREAM_BUILD_OUTPUT = 'stream_build_output'
 
     FEATURES = (
         (USE_SPHINX_LATEST, _('Use latest version of Sphinx')),
@@ -1498,7 +1537,11 @@ class Feature(models.Model):
         (
             SEARCH_ANALYTICS,
             _('Enable search analytics'),
-        )
+        ),
+        (
+            STREAM_BUILD_OUTPUT,
+            _('Stream build command output and post commands in batches'),
+        ),
     )
 
     projects = models.ManyToManyField(
@@ -1523,6 +1566,9 @@ class Feature(models.Model):
 
     objects = FeatureQuerySet.as_manager()
 
+    # Bumped when the features change, to reload the ones of the projects
+    generation = 0
+
     def __str__(self):
         return '{} feature'.format(self.get_feature_display(),)
 
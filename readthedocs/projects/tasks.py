@@ -18,6 +18,7 @@ import requests
 from celery.exceptions import SoftTimeLimitExceeded
 from django.conf import settings
 from django.core.files.storage import get_storage_class
+from django.db import transaction
 from django.db.models import Q
 from django.urls import reverse
 from django.utils import timezone
@@ -31,6 +32,7 @@ from readthedocs.builds.constants import (
     BUILD_STATE_CLONING,
     BUILD_STATE_FINISHED,
     BUILD_STATE_INSTALLING,
+    BUILD_STATE_TRIGGERED,
     BUILD_STATUS_SUCCESS,
     BUILD_STATUS_FAILURE,
     LATEST,
@@ -69,6 +71,11 @@ from readthedocs.projects.models import APIProject, Feature
 from readthedocs.search.utils import index_new_files, remove_indexed_files
 from readthedocs.sphinx_domains.models import SphinxDomain
 from readthedocs.vcs_support import utils as vcs_support_utils
+from readthedocs.vcs_support.backends.git import (
+    borrows_from_mirror,
+    detach_from_mirror,
+    mirror_lock,
+)
 from readthedocs.worker import app
 
 from .constants import LOG_TEMPLATE
@@ -381,13 +388,23 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
         try:
             if docker is None:
                 docker = settings.DOCKER_ENABLE
-            self.version = self.get_version(version_pk)
+            self.version, self.build = self.get_build_context(version_pk, build_pk)
             self.project = self.version.project
-            self.build = self.get_build(build_pk)
             self.build_force = force
             self.commit = commit
             self.config = None
 
+            if not self.claim_build() or self.is_cancelled():
+                log.info(
+                    LOG_TEMPLATE,
+                    {
+                        'project': self.project.slug,
+                        'version': self.version.slug,
+                        'msg': 'Skipping cancelled build {}'.format(build_pk),
+                    }
+                )
+                return False
+
             # Build process starts here
             setup_successful = self.run_setup(record=record)
             if not setup_successful:
@@ -431,6 +448,39 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
             self.send_notifications(version_pk, build_pk)
             return False
 
+    def claim_build(self):
+        """
+        Move the build out of the queue before starting it.
+
+        The build is moved out of ``triggered`` state atomically by the API,
+        so it can't be cancelled once the task has started. The build data is
+        refreshed with the state it has after the claim.
+
+        :returns: whether the build can be started by this task
+        """
+        if self.build.get('state') != BUILD_STATE_TRIGGERED:
+            return True
+        resp = api_v2.build(self.build['id']).claim.post()
+        self.build = self.filter_build_data(resp['build'])
+        return resp['claimed']
+
+    def is_cancelled(self):
+        """
+        Whether the build was superseded while waiting in the queue.
+
+        Cancelled builds are marked as failed and finished before the task
+        starts (see ``readthedocs.core.utils.cancel_queued_builds``), and
+        can't be cancelled anymore once claimed (see ``claim_build``). Retries
+        are excluded because a build retried after a ``VersionLockedError`` is
+        already in the same state.
+        """
+        retries = self.task.request.retries if self.task else 0
+        return (
+            retries == 0 and
+            self.build.get('state') == BUILD_STATE_FINISHED and
+            self.build.get('success') is False
+        )
+
     def run_setup(self, record=True):
         """
         Run setup in the local environment.
@@ -453,7 +503,8 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
                     raise ProjectBuildsSkippedError
                 try:
                     with self.project.repo_nonblockinglock(version=self.version):
-                        self.setup_vcs()
+                        with self.setup_env.phase('vcs'):
+                            self.setup_vcs()
                 except vcs_support_utils.LockTimeout as e:
                     self.task.retry(exc=e, throw=False)
                     raise VersionLockedError
@@ -568,13 +619,14 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
                 build_id = self.build.get('id')
                 if build_id:
                     # Store build artifacts to storage (local or cloud storage)
-                    self.store_build_artifacts(
-                        html=bool(outcomes['html']),
-                        search=bool(outcomes['search']),
-                        localmedia=bool(outcomes['localmedia']),
-                        pdf=bool(outcomes['pdf']),
-                        epub=bool(outcomes['epub']),
-                    )
+                    with self.build_env.phase('upload'):
+                        self.store_build_artifacts(
+                            html=bool(outcomes['html']),
+                            search=bool(outcomes['search']),
+                            localmedia=bool(outcomes['localmedia']),
+                            pdf=bool(outcomes['pdf']),
+                            epub=bool(outcomes['epub']),
+                        )
 
                     # Finalize build and update web servers
                     # We upload EXTERNAL version media files to blob storage
@@ -637,6 +689,25 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
         project_data = api_v2.project(project_pk).get()
         return APIProject(**project_data)
 
+    @staticmethod
+    def get_build_context(version_pk, build_pk):
+        """
+        Retrieve the version and the build with their context from the API.
+
+        The active versions and the subprojects of the project, returned in
+        the same response, are kept in ``APIProject.build_context``.
+
+        :param version_pk: Version primary key
+        :param build_pk: Build primary key
+        :returns: the version and the build
+        """
+        params = {'build': build_pk} if build_pk else {}
+        context = api_v2.version(version_pk).build_context.get(**params)
+        version = APIVersion(**context.pop('version'))
+        build = UpdateDocsTaskStep.filter_build_data(context.pop('build'))
+        version.project.build_context = context
+        return version, build
+
     @staticmethod
     def get_build(build_pk):
         """
@@ -647,6 +718,11 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
         build = {}
         if build_pk:
             build = api_v2.build(build_pk).get()
+        return UpdateDocsTaskStep.filter_build_data(build)
+
+    @staticmethod
+    def filter_build_data(build):
+        """Remove from the build data the keys not used by the builder."""
         private_keys = [
             'project',
             'version',
@@ -903,13 +979,17 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
         This triggers updates across application instances for html, pdf, epub,
         downloads, and search. Tasks are broadcast to all web servers from here.
         """
-        # Update version if we have successfully built HTML output
+        # Update version if we have successfully built HTML output, recording
+        # the downloads so they are listed without checking the storage
         try:
+            data = {
+                'has_pdf': pdf,
+                'has_epub': epub,
+                'has_htmlzip': localmedia,
+            }
             if html:
-                version = api_v2.version(self.version.pk)
-                version.patch({
-                    'built': True,
-                })
+                data['built'] = True
+            api_v2.version(self.version.pk).patch(data)
         except HttpClientError:
             log.exception(
                 'Updating version failed, skipping file sync: version=%s',
@@ -962,10 +1042,13 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
         else:
             self.python_env.delete_existing_build_dir()
 
-        self.python_env.setup_base()
-        self.python_env.save_environment_json()
-        self.python_env.install_core_requirements()
-        self.python_env.install_requirements()
+        with self.build_env.phase('venv'):
+            self.python_env.setup_base()
+            self.python_env.save_environment_json()
+        with self.build_env.phase('core_requirements'):
+            self.python_env.install_core_requirements()
+        with self.build_env.phase('user_requirements'):
+            self.python_env.install_requirements()
 
     def build_docs(self):
         """
@@ -982,11 +1065,15 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
         before_build.send(sender=self.version)
 
         outcomes = defaultdict(lambda: False)
-        outcomes['html'] = self.build_docs_html()
+        with self.build_env.phase('html'):
+            outcomes['html'] = self.build_docs_html()
         outcomes['search'] = self.build_docs_search()
-        outcomes['localmedia'] = self.build_docs_localmedia()
-        outcomes['pdf'] = self.build_docs_pdf()
-        outcomes['epub'] = self.build_docs_epub()
+        with self.build_env.phase('localmedia'):
+            outcomes['localmedia'] = self.build_docs_localmedia()
+        with self.build_env.phase('pdf'):
+            outcomes['pdf'] = self.build_docs_pdf()
+        with self.build_env.phase('epub'):
+            outcomes['epub'] = self.build_docs_epub()
 
         after_build.send(sender=self.version)
         return outcomes
@@ -1357,6 +1444,7 @@ def fileify(version_pk, commit, build):
             'msg': 'Creating ImportedFiles',
         }
     )
+    start = timezone.now()
     try:
         changed_files = _create_imported_files(version, commit, build)
     except Exception:
@@ -1368,11 +1456,49 @@ def fileify(version_pk, commit, build):
     except Exception:
         log.exception('Failed during SphinxDomain creation')
 
+    indexing_start = timezone.now()
     try:
         _sync_imported_files(version, build, changed_files)
     except Exception:
         log.exception('Failed during ImportedFile syncing')
 
+    _record_build_phases(
+        build,
+        [
+            ('fileify', start, indexing_start),
+            ('indexing', indexing_start, timezone.now()),
+        ],
+    )
+
+
+def _record_build_phases(build_pk, phases):
+    """
+    Append the phases run on the web servers to the build timing record.
+
+    :param build_pk: primary key of the build
+    :param phases: list of ``(name, start, end)`` tuples
+    """
+    records = [
+        {
+            'name': name,
+            'start': start.isoformat(),
+            'length': (end - start).total_seconds(),
+            'cpu': None,
+            'memory': None,
+        }
+        for name, start, end in phases
+    ]
+    names = {name for name, _, _ in phases}
+    with transaction.atomic():
+        build = Build.objects.select_for_update().filter(pk=build_pk).first()
+        if build is None:
+            return
+        build.phases = [
+            phase for phase in build.phases
+            if phase['name'] not in names
+        ] + records
+        build.save(update_fields=['phases'])
+
 
 def _create_intersphinx_data(version, commit, build):
     """
@@ -1827,6 +1953,57 @@ def remove_dirs(paths):
         shutil.rmtree(path, ignore_errors=True)
 
 
+@app.task()
+def prune_git_mirrors():
+    """
+    Remove the git mirrors of deleted projects and the ones not used lately.
+
+    Mirrors are touched every time they are fetched, so a mirror older than
+    ``GIT_MIRROR_MAX_AGE`` belongs to a project that isn't being built.
+    The checkouts cloned with ``--reference`` to a removed mirror get a copy of
+    the objects they borrow from it, or are removed when that fails or the
+    project was deleted.
+    """
+    if not settings.GIT_MIRROR_ROOT or not os.path.isdir(settings.GIT_MIRROR_ROOT):
+        return
+
+    mirrors = {
+        name[:-len('.git')]: os.path.join(settings.GIT_MIRROR_ROOT, name)
+        for name in os.listdir(settings.GIT_MIRROR_ROOT)
+        if name.endswith('.git')
+    }
+    existing = set(
+        Project.objects.filter(slug__in=mirrors).values_list('slug', flat=True)
+    )
+    expires = timezone.now().timestamp() - settings.GIT_MIRROR_MAX_AGE
+    for slug, path in mirrors.items():
+        if slug in existing and os.path.getmtime(path) > expires:
+            continue
+        log.info('Removing git mirror. project=%s', slug)
+        checkouts = os.path.join(settings.DOCROOT, slug.replace('_', '-'), 'checkouts')
+        with mirror_lock(path):
+            if os.path.isdir(checkouts):
+                for name in os.listdir(checkouts):
+                    checkout_path = os.path.join(checkouts, name)
+                    if not borrows_from_mirror(checkout_path, path):
+                        continue
+                    if slug not in existing or not detach_from_mirror(checkout_path):
+                        log.info('Removing git checkout. path=%s', checkout_path)
+                        shutil.rmtree(checkout_path, ignore_errors=True)
+            shutil.rmtree(path, ignore_errors=True)
+        safe_unlink('{}.lock'.format(path))
+
+
+@app.task(queue='web')
+def broadcast_prune_git_mirrors():
+    """
+    Broadcast the task ``prune_git_mirrors`` to all our build servers.
+
+    This task is executed by CELERY BEAT.
+    """
+    broadcast(type='build', task=prune_git_mirrors, args=[])
+
+
 @app.task(queue='web')
 def remove_build_storage_paths(paths):
     """
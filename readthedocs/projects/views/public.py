@@ -219,8 +219,9 @@ def project_download_media(request, project_slug, type_, version_slug):
         slug=version_slug,
     )
 
-    # Send media download to analytics - sensitive data is anonymized
-    analytics_event.delay(
+    # Send media download to analytics - sensitive data is anonymized.
+    # The event is buffered by this process and sent in a batch
+    analytics_event(
         event_category='Build Media',
         event_action=f'Download {type_}',
         event_label=str(version),
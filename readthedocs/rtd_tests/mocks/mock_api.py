@@ -68,6 +68,16 @@ def mock_version(repo):
             if 'slug' in kwargs:
                 return {'objects': [version], 'project': project}
             return version
+
+        @property
+        def build_context(self):
+            """Returns mock data to emulate the build context of a version."""
+            return mock.Mock(**{'get.return_value': {
+                'version': self.get(),
+                'build': {'id': 123, 'state': 'triggered'},
+                'active_versions': [],
+                'subprojects': [],
+            }})
     return MockVersion
 
 
@@ -79,7 +89,13 @@ class MockApi:
         return ProjectData()
 
     def build(self, _):
-        return mock.Mock(**{'get.return_value': {'id': 123, 'state': 'triggered'}})
+        return mock.Mock(**{
+            'get.return_value': {'id': 123, 'state': 'triggered'},
+            'claim.post.return_value': {
+                'claimed': True,
+                'build': {'id': 123, 'state': 'cloning'},
+            },
+        })
 
     def command(self, _):
         return mock.Mock(**{'get.return_value': {}})
@@ -37,7 +37,13 @@ from readthedocs.api.v2.views.integrations import (
     GitLabWebhookView,
 )
 from readthedocs.api.v2.views.task_views import get_status_data
-from readthedocs.builds.constants import LATEST, EXTERNAL
+from readthedocs.builds.constants import (
+    BUILD_STATE_CLONING,
+    BUILD_STATE_FINISHED,
+    BUILD_STATE_TRIGGERED,
+    EXTERNAL,
+    LATEST,
+)
 from readthedocs.builds.models import Build, BuildCommandResult, Version
 from readthedocs.integrations.models import Integration
 from readthedocs.oauth.models import RemoteOrganization, RemoteRepository
@@ -422,6 +428,80 @@ class APIBuildTests(TestCase):
         self.assertEqual(build['commands'][0]['run_time'], 5)
         self.assertEqual(build['commands'][0]['description'], 'foo')
 
+    def test_make_build_commands_in_batch(self):
+        """Create the build commands of a build with a single request."""
+        client = APIClient()
+        client.login(username='super', password='test')
+        build = get(Build, project_id=1, version_id=1)
+        now = datetime.datetime.utcnow()
+        resp = client.post(
+            '/api/v2/command/',
+            [
+                {
+                    'build': build.pk,
+                    'command': 'echo {}'.format(number),
+                    'description': 'command {}'.format(number),
+                    'exit_code': 0,
+                    'start_time': str(now + datetime.timedelta(seconds=number)),
+                    'end_time': str(now + datetime.timedelta(seconds=number + 1)),
+                }
+                for number in range(3)
+            ],
+            format='json',
+        )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [command['command'] for command in resp.data],
+            ['echo 0', 'echo 1', 'echo 2'],
+        )
+        resp = client.get('/api/v2/build/%s/' % build.pk)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            [command['description'] for command in resp.data['commands']],
+            ['command 0', 'command 1', 'command 2'],
+        )
+
+    def test_claim_build(self):
+        client = APIClient()
+        build = get(
+            Build,
+            project_id=1,
+            version_id=1,
+            state=BUILD_STATE_TRIGGERED,
+        )
+        url = reverse('build-claim', kwargs={'pk': build.pk})
+
+        resp = client.post(url)
+        self.assertIn(resp.status_code, (401, 403))
+
+        client.login(username='super', password='test')
+        resp = client.post(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.data['claimed'])
+        self.assertEqual(resp.data['build']['state'], BUILD_STATE_CLONING)
+
+        # A build can be claimed only once
+        resp = client.post(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.data['claimed'])
+
+    def test_claim_cancelled_build(self):
+        client = APIClient()
+        client.login(username='super', password='test')
+        build = get(
+            Build,
+            project_id=1,
+            version_id=1,
+            state=BUILD_STATE_FINISHED,
+            success=False,
+        )
+        resp = client.post(reverse('build-claim', kwargs={'pk': build.pk}))
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.data['claimed'])
+        self.assertEqual(resp.data['build']['state'], BUILD_STATE_FINISHED)
+        build.refresh_from_db()
+        self.assertEqual(build.state, BUILD_STATE_FINISHED)
+
     def test_get_raw_log_success(self):
         build = get(Build, project_id=1, version_id=1, builder='foo')
         get(
@@ -2184,6 +2264,36 @@ class APIVersionTests(TransactionTestCase):
             version_data,
         )
 
+    def test_get_build_context(self):
+        pip = Project.objects.get(slug='pip')
+        version = pip.versions.get(slug='0.8')
+        build = get(Build, project=pip, version=version)
+        subproject = get(Project, slug='sub', main_language_project=None)
+        pip.add_subproject(subproject)
+        url = reverse('version-build-context', kwargs={'pk': version.pk})
+
+        resp = self.client.get(url, {'build': build.pk})
+        self.assertIn(resp.status_code, (401, 403))
+
+        resp = self.client.get(
+            url,
+            {'build': build.pk},
+            HTTP_AUTHORIZATION='Basic {}'.format(eric_auth),
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['version']['slug'], '0.8')
+        self.assertEqual(resp.data['version']['project']['slug'], 'pip')
+        self.assertIn('features', resp.data['version']['project'])
+        self.assertEqual(resp.data['build']['id'], build.pk)
+        self.assertEqual(
+            sorted(v['slug'] for v in resp.data['active_versions']),
+            sorted(pip.versions.filter(active=True).values_list('slug', flat=True)),
+        )
+        self.assertEqual(
+            [p['slug'] for p in resp.data['subprojects']],
+            ['sub'],
+        )
+
     def test_get_active_versions(self):
         """Test the full response of
         ``/api/v2/version/?project__slug=pip&active=true``"""
@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
 
 import os
+import subprocess
 from os.path import exists
 from tempfile import mkdtemp
 import textwrap
 
 import django_dynamic_fixture as fixture
 from django.contrib.auth.models import User
+from django.test.utils import override_settings
 from mock import Mock, patch
 
 from readthedocs.builds.constants import EXTERNAL
@@ -14,6 +16,7 @@ from readthedocs.builds.models import Version
 from readthedocs.config import ALL
 from readthedocs.projects.exceptions import RepositoryError
 from readthedocs.projects.models import Feature, Project
+from readthedocs.projects.tasks import prune_git_mirrors
 from readthedocs.rtd_tests.base import RTDTestCase
 from readthedocs.rtd_tests.utils import (
     create_git_branch,
@@ -111,6 +114,70 @@ class TestGitBackend(RTDTestCase):
         self.assertEqual(code, 0)
         self.assertTrue(exists(repo.working_dir))
 
+    def test_git_update_with_mirror(self):
+        mirror_root = mkdtemp()
+        with override_settings(GIT_MIRROR_ROOT=mirror_root):
+            repo = self.project.vcs_repo()
+            repo.make_clean_working_dir()
+            code, _, _ = repo.update()
+            self.assertEqual(code, 0)
+            code, _, _ = repo.checkout('submodule')
+            self.assertEqual(code, 0)
+
+            # Fetching an existing checkout is served by the mirror
+            code, _, _ = repo.update()
+            self.assertEqual(code, 0)
+
+        self.assertTrue(exists(os.path.join(mirror_root, 'test-project.git', 'HEAD')))
+        # Objects are borrowed from the mirror
+        alternates = os.path.join(
+            repo.working_dir, '.git', 'objects', 'info', 'alternates',
+        )
+        self.assertTrue(exists(alternates))
+        self.assertIn(
+            'submodule',
+            {branch.verbose_name for branch in repo.branches},
+        )
+
+    def test_prune_git_mirrors(self):
+        mirror_root = mkdtemp()
+        for slug in ('test-project', 'deleted-project'):
+            os.mkdir(os.path.join(mirror_root, '{}.git'.format(slug)))
+
+        with override_settings(GIT_MIRROR_ROOT=mirror_root):
+            prune_git_mirrors()
+
+        self.assertEqual(os.listdir(mirror_root), ['test-project.git'])
+
+    def test_prune_git_mirrors_detaches_checkouts(self):
+        mirror_root = mkdtemp()
+        docroot = mkdtemp()
+        checkouts = {}
+        for slug in ('test-project', 'deleted-project'):
+            mirror_path = os.path.join(mirror_root, '{}.git'.format(slug))
+            subprocess.check_call(
+                ['git', 'clone', '-q', '--bare', self.project.repo, mirror_path],
+            )
+            # Not fetched for a long time
+            os.utime(mirror_path, (0, 0))
+            checkouts[slug] = os.path.join(docroot, slug, 'checkouts', 'latest')
+            subprocess.check_call([
+                'git', 'clone', '-q', '--reference', mirror_path,
+                mirror_path, checkouts[slug],
+            ])
+
+        with override_settings(GIT_MIRROR_ROOT=mirror_root, DOCROOT=docroot):
+            prune_git_mirrors()
+
+        self.assertEqual(os.listdir(mirror_root), [])
+        self.assertFalse(exists(checkouts['deleted-project']))
+        # The checkout has its own copy of the objects of the mirror
+        checkout = checkouts['test-project']
+        self.assertFalse(exists(
+            os.path.join(checkout, '.git', 'objects', 'info', 'alternates'),
+        ))
+        subprocess.check_call(['git', 'fsck', '-q'], cwd=checkout)
+
     @patch('readthedocs.vcs_support.backends.git.Backend.fetch')
     def test_git_update_with_external_version(self, fetch):
         version = fixture.get(
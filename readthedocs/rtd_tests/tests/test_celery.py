@@ -96,6 +96,29 @@ class TestCeleryBuilding(RTDTestCase):
             )
         self.assertTrue(result.successful())
 
+    @patch('readthedocs.projects.tasks.UpdateDocsTaskStep.run_setup')
+    def test_update_docs_cancelled_before_claim(self, run_setup):
+        version = self.project.versions.first()
+        build = get(
+            Build, project=self.project,
+            version=version,
+        )
+        with mock_api(self.repo) as mapi:
+            mapi.build = MagicMock()
+            mapi.build().claim.post.return_value = {
+                'claimed': False,
+                'build': {'id': 123, 'state': 'finished', 'success': False},
+            }
+            result = tasks.update_docs_task.delay(
+                version.pk,
+                build_pk=build.pk,
+                record=False,
+                intersphinx=False,
+            )
+        self.assertTrue(result.successful())
+        self.assertFalse(result.result)
+        run_setup.assert_not_called()
+
     @patch('readthedocs.projects.tasks.UpdateDocsTaskStep.setup_python_environment', new=MagicMock)
     @patch('readthedocs.projects.tasks.UpdateDocsTaskStep.build_docs', new=MagicMock)
     @patch('readthedocs.doc_builder.environments.BuildEnvironment.update_build', new=MagicMock)
@@ -334,6 +357,33 @@ class TestCeleryBuilding(RTDTestCase):
         tasks.fileify(version_pk=345343, commit=None, build=1)
         mock_logger.warning.assert_called_with("Version not found for given kwargs. {'pk': 345343}")
 
+    @patch('readthedocs.projects.tasks._sync_imported_files')
+    @patch('readthedocs.projects.tasks._create_intersphinx_data')
+    @patch('readthedocs.projects.tasks._create_imported_files')
+    def test_fileify_records_build_phases(self, create_imported_files, *args):
+        create_imported_files.return_value = set()
+        version = self.project.versions.get(slug=LATEST)
+        build = get(
+            Build,
+            project=self.project,
+            version=version,
+            phases=[
+                {'name': 'vcs', 'start': '2019-04-29T10:00:00', 'length': 2.0,
+                 'cpu': 1.0, 'memory': 1024},
+                {'name': 'fileify', 'start': '2019-04-29T10:00:02', 'length': 60.0,
+                 'cpu': None, 'memory': None},
+            ],
+        )
+        tasks.fileify(version_pk=version.pk, commit='a1b2c3', build=build.pk)
+
+        build.refresh_from_db()
+        self.assertEqual(
+            [phase['name'] for phase in build.phases],
+            ['vcs', 'fileify', 'indexing'],
+        )
+        self.assertEqual(build.phases[0]['length'], 2.0)
+        self.assertNotEqual(build.phases[1]['start'], '2019-04-29T10:00:02')
+
     @patch('readthedocs.oauth.services.github.GitHubService.send_build_status')
     def test_send_build_status_with_remote_repo_github(self, send_build_status):
         self.project.repo = 'https://github.com/test/test/'
@@ -4,12 +4,17 @@ import os
 
 import mock
 from django.http import Http404
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django_dynamic_fixture import get
 from mock import call
 
-from readthedocs.builds.constants import LATEST
-from readthedocs.builds.models import Version
+from readthedocs.builds.constants import (
+    BUILD_STATE_BUILDING,
+    BUILD_STATE_FINISHED,
+    BUILD_STATE_TRIGGERED,
+    LATEST,
+)
+from readthedocs.builds.models import Build, Version
 from readthedocs.core.utils import slugify, trigger_build
 from readthedocs.core.utils.general import wipe_version_via_slugs
 from readthedocs.projects.models import Project
@@ -176,6 +181,46 @@ class CoreUtilTests(TestCase):
             immutable=True,
         )
 
+    @mock.patch('readthedocs.projects.tasks.update_docs_task')
+    def test_trigger_build_cancels_queued_builds(self, update_docs):
+        queued = get(
+            Build,
+            project=self.project,
+            version=self.version,
+            state=BUILD_STATE_TRIGGERED,
+        )
+        running = get(
+            Build,
+            project=self.project,
+            version=self.version,
+            state=BUILD_STATE_BUILDING,
+        )
+        _, build = trigger_build(project=self.project, version=self.version)
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.state, BUILD_STATE_FINISHED)
+        self.assertFalse(queued.success)
+        running.refresh_from_db()
+        self.assertEqual(running.state, BUILD_STATE_BUILDING)
+        self.assertEqual(build.state, BUILD_STATE_TRIGGERED)
+
+    @override_settings(RTD_BUILD_COALESCE_DEBOUNCE=10)
+    @mock.patch('readthedocs.projects.tasks.update_docs_task')
+    def test_trigger_build_debounce(self, update_docs):
+        trigger_build(project=self.project, version=self.version)
+        options = {
+            'queue': mock.ANY,
+            'time_limit': 720,
+            'soft_time_limit': 600,
+            'countdown': 10,
+        }
+        update_docs.signature.assert_called_with(
+            args=(self.version.pk,),
+            kwargs=mock.ANY,
+            options=options,
+            immutable=True,
+        )
+
     def test_slugify(self):
         """Test additional slugify."""
         self.assertEqual(
@@ -5,16 +5,19 @@ Things to know:
 * raw subprocess calls like .communicate expects bytes
 * the Command wrappers encapsulate the bytes and expose unicode
 """
+import datetime
+import gzip
 import hashlib
 import json
 import os
 import re
 import tempfile
+import time
 import uuid
 
 import mock
 import pytest
-from django.test import TestCase, TransactionTestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 from django_dynamic_fixture import get
 from docker.errors import APIError as DockerAPIError
 from docker.errors import DockerException
@@ -23,10 +26,12 @@ from mock import Mock, PropertyMock, mock_open, patch
 from readthedocs.builds.constants import BUILD_STATE_CLONING
 from readthedocs.builds.models import Version
 from readthedocs.doc_builder.config import load_yaml_config
+from readthedocs.doc_builder.constants import DOCKER_TIMEOUT_EXIT_CODE
 from readthedocs.doc_builder.environments import (
     BuildCommand,
     DockerBuildCommand,
     DockerBuildEnvironment,
+    DockerContainerPool,
     LocalBuildEnvironment,
 )
 from readthedocs.doc_builder.exceptions import BuildEnvironmentError
@@ -199,6 +204,85 @@ class TestLocalBuildEnvironment(TransactionTestCase):
             'exit_code': 0,
         })
 
+    def _finished_command(self, build_env, output):
+        command = BuildCommand(['echo', output], build_env=build_env)
+        command.output = output
+        command.exit_code = 0
+        command.start_time = command.end_time = datetime.datetime.utcnow()
+        return command
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=1000)
+    def test_flush_commands_in_batches_under_upload_limit(self):
+        build_env = LocalBuildEnvironment(
+            version=self.version,
+            project=self.project,
+            build={'id': DUMMY_BUILD_ID},
+        )
+        build_env.pending_commands = [
+            self._finished_command(build_env, output * 400)
+            for output in 'abc'
+        ]
+        build_env.flush_commands(force=True)
+
+        post = self.mocks.mocks['api_v2.command'].post
+        self.assertEqual(post.call_count, 3)
+        for call, output in zip(post.call_args_list, 'abc'):
+            batch = call[0][0]
+            self.assertEqual([data['output'] for data in batch], [output * 400])
+        self.assertEqual(build_env.pending_commands, [])
+
+    def test_flush_commands_saves_one_at_a_time_when_batch_fails(self):
+        build_env = LocalBuildEnvironment(
+            version=self.version,
+            project=self.project,
+            build={'id': DUMMY_BUILD_ID},
+        )
+        build_env.pending_commands = [
+            self._finished_command(build_env, output) for output in 'ab'
+        ]
+        post = self.mocks.mocks['api_v2.command'].post
+        post.side_effect = [Exception('Request Entity Too Large'), {}, {}]
+        build_env.flush_commands(force=True)
+
+        self.assertEqual(post.call_count, 3)
+        self.assertIsInstance(post.call_args_list[0][0][0], list)
+        self.assertEqual(post.call_args_list[1][0][0]['output'], 'a')
+        self.assertEqual(post.call_args_list[2][0][0]['output'], 'b')
+
+    def test_flush_commands_saves_output_of_running_command(self):
+        build_env = LocalBuildEnvironment(
+            version=self.version,
+            project=self.project,
+            build={'id': DUMMY_BUILD_ID},
+        )
+        command = BuildCommand(['echo', 'test'], build_env=build_env, stream_output=True)
+        command.start_time = datetime.datetime.utcnow()
+        command.output_buffer.write(b'partial')
+        api_command = self.mocks.mocks['api_v2.command']
+        api_command.post.return_value = {'id': 42}
+        build_env.flush_commands(force=True, running=command)
+
+        api_command.post.assert_called_once_with({
+            'build': DUMMY_BUILD_ID,
+            'command': 'echo test',
+            'description': '',
+            'output': 'partial',
+            'exit_code': None,
+            'start_time': command.start_time,
+            'end_time': mock.ANY,
+        })
+        self.assertEqual(command.pk, 42)
+
+        # The result posted while running is updated when the command ends
+        command.output = 'partial output'
+        command.exit_code = 0
+        command.end_time = datetime.datetime.utcnow()
+        build_env.pending_commands = [command]
+        build_env.flush_commands(force=True)
+        self.assertEqual(api_command.post.call_count, 1)
+        api_command.assert_called_with(42)
+        api_command().patch.assert_called_once_with(command.get_data())
+
     def test_incremental_state_update_with_no_update(self):
         """Build updates to a non-finished state when update_on_success=True."""
         build_envs = [
@@ -416,6 +500,100 @@ class TestDockerBuildEnvironment(TestCase):
             'builder': mock.ANY,
         })
 
+    @override_settings(DOCKER_CONTAINER_POOL_SIZE=2)
+    def test_environment_reuses_pooled_container(self):
+        """An idle container of the pool is claimed and released back."""
+        build_env = DockerBuildEnvironment(
+            version=self.version,
+            project=self.project,
+            build={'id': DUMMY_BUILD_ID},
+        )
+        pool = DockerContainerPool(None, build_env.get_container_pool_config())
+        self.mocks.configure_mock('docker_client', {
+            'containers.return_value': [{
+                'Id': 'a1b2c3',
+                'Names': ['/{}idle'.format(pool.prefix)],
+                'Labels': {
+                    DockerContainerPool.EXPIRES_LABEL: str(int(time.time()) + 3600),
+                },
+            }],
+        })
+
+        with build_env:
+            pass
+
+        self.assertTrue(build_env.successful)
+        client = self.mocks.docker_client
+        client.rename.assert_any_call('a1b2c3', 'build-123-project-6-pip')
+        self.assertFalse(client.create_container.called)
+        self.assertFalse(client.kill.called)
+        released_name = client.rename.call_args[0][1]
+        self.assertTrue(released_name.startswith(pool.prefix))
+        self.assertIsNone(build_env.stats_thread)
+
+    @override_settings(DOCKER_CONTAINER_POOL_SIZE=2)
+    def test_environment_reused_container_timeout(self):
+        """The build time limit is enforced on the commands of a reused container."""
+        build_env = DockerBuildEnvironment(
+            version=self.version,
+            project=self.project,
+            build={'id': DUMMY_BUILD_ID},
+        )
+        build_env.container_time_limit = 0
+        pool = DockerContainerPool(None, build_env.get_container_pool_config())
+        self.mocks.configure_mock('docker_client', {
+            'containers.return_value': [{
+                'Id': 'a1b2c3',
+                'Names': ['/{}idle'.format(pool.prefix)],
+                'Labels': {
+                    DockerContainerPool.EXPIRES_LABEL: str(int(time.time()) + 3600),
+                },
+            }],
+            'exec_create.return_value': {'Id': b'container-foobar'},
+            'exec_start.return_value': b'',
+            'exec_inspect.return_value': {'ExitCode': 124},
+        })
+
+        with build_env:
+            build_env.run('echo', 'test', cwd='/tmp')
+
+        client = self.mocks.docker_client
+        self.assertFalse(client.create_container.called)
+        self.assertTrue(
+            client.exec_create.call_args[1]['cmd'].startswith('timeout 1 /bin/sh -c'),
+        )
+        self.assertEqual(build_env.commands[0].exit_code, DOCKER_TIMEOUT_EXIT_CODE)
+        self.assertFalse(build_env.successful)
+        self.assertEqual(str(build_env.failure), 'Build exited due to time out')
+        # The container isn't put back into the pool
+        client.kill.assert_called_with('build-123-project-6-pip')
+
+    def test_environment_reused_container_memory(self):
+        """The memory of a reused container doesn't include the earlier builds."""
+        build_env = DockerBuildEnvironment(
+            version=self.version,
+            project=self.project,
+            build={'id': DUMMY_BUILD_ID},
+        )
+        build_env.reused = True
+        self.mocks.configure_mock('docker_client', {
+            'stats.return_value': [
+                {
+                    'cpu_stats': {'cpu_usage': {'total_usage': 10 ** 9}},
+                    'memory_stats': {'usage': 300, 'max_usage': 1000},
+                },
+                {
+                    'cpu_stats': {'cpu_usage': {'total_usage': 3 * 10 ** 9}},
+                    'memory_stats': {'usage': 200, 'max_usage': 1000},
+                },
+            ],
+        })
+
+        build_env.sample_stats()
+
+        self.assertEqual(build_env.get_resource_usage(), {'cpu': 3, 'memory': 300})
+        self.mocks.docker_client.close.assert_called_once_with()
+
     def test_environment_successful_build_without_update(self):
         """A successful build exits cleanly and doesn't update build."""
         build_env = DockerBuildEnvironment(
@@ -1069,6 +1247,34 @@ class TestBuildCommand(TestCase):
         self.assertEqual(cmd.output, '')
         self.assertEqual(cmd.error, 'FOOBAR')
 
+    def test_streamed_output(self):
+        cmd = BuildCommand('/bin/cat', input_data='FOOBAR', stream_output=True)
+        cmd.run()
+        self.assertTrue(cmd.successful)
+        self.assertEqual(cmd.output, 'FOOBAR')
+        self.assertFalse(cmd.output_buffer.truncated)
+        # The output fits in the database, the compressed copy isn't kept
+        self.assertTrue(cmd.output_buffer.file.closed)
+
+    def test_streamed_output_with_large_input(self):
+        data = 'FOOBAR' * 100000
+        cmd = BuildCommand('/bin/cat', input_data=data, stream_output=True)
+        cmd.run()
+        self.assertTrue(cmd.successful)
+        self.assertEqual(cmd.output_buffer.length, len(data))
+
+    @override_settings(RTD_BUILD_COMMAND_OUTPUT_TAIL=6)
+    def test_streamed_output_truncated(self):
+        cmd = BuildCommand(
+            ['/bin/bash', '-c', 'echo -n FOOBAR; echo -n BARFOO'],
+            stream_output=True,
+        )
+        cmd.run()
+        self.assertTrue(cmd.output_buffer.truncated)
+        self.assertTrue(cmd.output.endswith('\n\nBARFOO'))
+        with gzip.GzipFile(fileobj=cmd.output_buffer.close()) as output:
+            self.assertEqual(output.read(), b'FOOBARBARFOO')
+
     def test_sanitize_output(self):
         cmd = BuildCommand(['/bin/bash', '-c', 'echo'])
         checks = (
@@ -1,25 +1,29 @@
 from __future__ import absolute_import, unicode_literals
 
+import datetime
+
 import requests
 import requests_mock
 from django.http import Http404
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 
-from mock import patch
+from allauth.socialaccount.models import SocialAccount, SocialApp, SocialToken
+from mock import Mock, patch
 import pytest
 
 from django.core.management import call_command
 from django.conf import settings
-from django.db import IntegrityError
+from django.core.cache import cache
+from django.db import IntegrityError, connection
 from django.test import TestCase, RequestFactory
 from django.core.urlresolvers import reverse
 from django.contrib.auth.models import User
 from django.template.loader import get_template
-from django.utils import six
+from django.utils import six, timezone
 from rest_framework.response import Response
 
 from readthedocs.builds.constants import LATEST, STABLE
-from readthedocs.builds.models import Version
+from readthedocs.builds.models import Build, Version
 from readthedocs.core.signals import webhook_github
 from readthedocs.core.views.serve import serve_docs
 from readthedocs.docsitalia.resolver import ItaliaResolver
@@ -27,6 +31,7 @@ from readthedocs.oauth.models import RemoteOrganization, RemoteRepository
 from readthedocs.projects.models import Project
 
 from readthedocs.docsitalia.forms import PublisherAdminForm
+from readthedocs.docsitalia.github import get_metadata_for_document
 from readthedocs.docsitalia.oauth.services.github import DocsItaliaGithubService
 from readthedocs.docsitalia.metadata import (
     validate_publisher_metadata, validate_projects_metadata,
@@ -34,6 +39,7 @@ from readthedocs.docsitalia.metadata import (
 from readthedocs.docsitalia.models import (
     AllowedTag, Publisher, PublisherProject, PublisherIntegration,
     update_project_from_metadata)
+from readthedocs.docsitalia.tasks import clear_es_index
 from readthedocs.docsitalia.serializers import (
     DocsItaliaProjectSerializer, DocsItaliaProjectAdminSerializer)
 from readthedocs.rtd_tests.base import RequestFactoryTestMixin
@@ -216,7 +222,11 @@ class DocsItaliaTest(TestCase):
         session = requests.Session()
         with patch(
             'readthedocs.docsitalia.oauth.services.github.DocsItaliaGithubService.get_session'
-        ) as m:
+        ) as m, patch.object(
+            DocsItaliaGithubService, 'refresh_token', return_value='token',
+        ), patch.object(
+            DocsItaliaGithubService, 'create_worker_session', return_value=session,
+        ):
             m.return_value = session
             with requests_mock.Mocker() as rm:
                 rm.get('https://api.github.com/user/orgs', json=orgs_json)
@@ -294,7 +304,11 @@ class DocsItaliaTest(TestCase):
         session = requests.Session()
         with patch(
             'readthedocs.docsitalia.oauth.services.github.DocsItaliaGithubService.get_session'
-        ) as m:
+        ) as m, patch.object(
+            DocsItaliaGithubService, 'refresh_token', return_value='token',
+        ), patch.object(
+            DocsItaliaGithubService, 'create_worker_session', return_value=session,
+        ):
             m.return_value = session
             with requests_mock.Mocker() as rm:
                 rm.get('https://api.github.com/user/orgs', json=orgs_json)
@@ -328,7 +342,11 @@ class DocsItaliaTest(TestCase):
         session = requests.Session()
         with patch(
             'readthedocs.docsitalia.oauth.services.github.DocsItaliaGithubService.get_session'
-        ) as m:
+        ) as m, patch.object(
+            DocsItaliaGithubService, 'refresh_token', return_value='token',
+        ), patch.object(
+            DocsItaliaGithubService, 'create_worker_session', return_value=session,
+        ):
             m.return_value = session
             with requests_mock.Mocker() as rm:
                 rm.get('https://api.github.com/user/orgs', json=orgs_json)
@@ -351,6 +369,126 @@ class DocsItaliaTest(TestCase):
         remote_repos = RemoteRepository.objects.all()
         self.assertEqual(remote_repos.count(), 1)
 
+    def test_sync_organizations_refreshes_token_before_fetching(self):
+        app = SocialApp.objects.create(provider='github', name='github')
+        account = SocialAccount.objects.create(user=self.user, provider='github')
+        token = SocialToken.objects.create(
+            app=app,
+            account=account,
+            token='oldtoken',
+            token_secret='refreshtoken',
+            expires_at=timezone.now() + datetime.timedelta(minutes=1),
+        )
+        service = DocsItaliaGithubService(user=self.user, account=account)
+        session = Mock(auto_refresh_kwargs={'client_id': 'clientid'})
+        session.refresh_token.return_value = {'access_token': 'newtoken'}
+
+        def update_token(data):
+            token.token = data['access_token']
+            token.save()
+
+        session.token_updater.side_effect = update_token
+        with patch.object(service, 'get_session', return_value=session):
+            self.assertEqual(service.refresh_token(), 'newtoken')
+        session.refresh_token.assert_called_once_with(
+            session.auto_refresh_url,
+            client_id='clientid',
+        )
+
+        # tokens far from the expiration are not refreshed
+        token.expires_at = timezone.now() + datetime.timedelta(hours=1)
+        token.save()
+        session.reset_mock()
+        with patch.object(service, 'get_session', return_value=session):
+            self.assertEqual(service.refresh_token(), 'newtoken')
+        session.refresh_token.assert_not_called()
+
+        worker_session = service.create_worker_session('newtoken')
+        self.assertEqual(worker_session.access_token, 'newtoken')
+        self.assertIsNone(worker_session.auto_refresh_url)
+
+    def test_github_pages_use_etags_and_rate_limit(self):
+        url = 'https://api.github.com/orgs/etagorg/repos'
+        session = requests.Session()
+        with patch(
+            'readthedocs.docsitalia.oauth.services.github.DocsItaliaGithubService.get_session'
+        ) as m, patch('readthedocs.docsitalia.oauth.services.github.time') as time_mock:
+            m.return_value = session
+            time_mock.time.return_value = 1000
+            with requests_mock.Mocker() as rm:
+                rm.get(url, json=[{'name': 'testrepo'}], headers={
+                    'ETag': '"abc"',
+                    'X-RateLimit-Remaining': '10',
+                    'X-RateLimit-Reset': '1030',
+                })
+                self.assertEqual(
+                    self.service.get_github_pages(url), [{'name': 'testrepo'}])
+                time_mock.sleep.assert_called_once_with(30)
+
+                rm.get(url, status_code=304)
+                self.assertEqual(
+                    self.service.get_github_pages(url), [{'name': 'testrepo'}])
+                self.assertEqual(rm.last_request.headers['If-None-Match'], '"abc"')
+
+    def test_italia_resolver_path_prefix_is_cached(self):
+        cache.clear()
+        publisher = Publisher.objects.create(
+            name='Test Org',
+            slug='testorg',
+            active=True
+        )
+        pub_project = PublisherProject.objects.create(
+            name='Test Project',
+            slug='testproject',
+            publisher=publisher,
+            active=True
+        )
+        other_pub_project = PublisherProject.objects.create(
+            name='Other Project',
+            slug='otherproject',
+            publisher=publisher,
+            active=True
+        )
+        projects = [
+            Project.objects.create(
+                name='document {}'.format(i),
+                slug='document-{}'.format(i),
+                repo='https://github.com/testorg/document-{}.git'.format(i)
+            )
+            for i in range(200)
+        ]
+        pub_project.projects.add(*projects)
+        resolver = ItaliaResolver()
+
+        def resolve_all():
+            return [
+                resolver.base_resolve_path(project.slug, 'index.html', 'bozza', 'it')
+                for project in projects
+            ]
+
+        # resolving the paths of a 200 documents page costs a query per document
+        # the first time, then none at all
+        with CaptureQueriesContext(connection) as cold:
+            paths = resolve_all()
+        self.assertEqual(len(cold), 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_all(), paths)
+        self.assertEqual(paths[0], '/testorg/testproject/document-0/it/bozza/index.html')
+
+        pub_project.projects.remove(projects[0])
+        other_pub_project.projects.add(projects[0])
+        self.assertEqual(
+            resolver.base_resolve_path(projects[0].slug, 'index.html', 'bozza', 'it'),
+            '/testorg/otherproject/document-0/it/bozza/index.html'
+        )
+
+        publisher.slug = 'neworg'
+        publisher.save()
+        self.assertEqual(
+            resolver.base_resolve_path(projects[1].slug, 'index.html', 'bozza', 'it'),
+            '/neworg/testproject/document-1/it/bozza/index.html'
+        )
+
     @patch('django.contrib.messages.api.add_message')
     @override_settings(PUBLIC_DOMAIN_USES_HTTPS=True, PUBLIC_DOMAIN='readthedocs.org')
     def test_project_custom_resolver(self, add_message):
@@ -452,6 +590,53 @@ class DocsItaliaTest(TestCase):
             'tags': list(tags)
         })
 
+    @patch('readthedocs.docsitalia.utils.get_subprojects')
+    def test_project_sphinx_context_from_build_context(self, get_subprojects):
+        from readthedocs.api.v2.signals import build_context_response
+        from readthedocs.doc_builder.signals import finalize_sphinx_context_data
+
+        publisher = Publisher.objects.create(
+            name='Test Org',
+            slug='testorg',
+            metadata={'publisher': {'logo_url': 'logo_url.jpg'}},
+            projects_metadata={},
+            active=True
+        )
+        pub_project = PublisherProject.objects.create(
+            name='Test Project',
+            slug='testproject',
+            metadata={},
+            publisher=publisher,
+            active=True
+        )
+        project = Project.objects.create(
+            name='my project',
+            slug='myprojectslug',
+            repo='https://github.com/testorg/myrepourl.git'
+        )
+        project.tags.add('lorem', 'ipsum')
+        pub_project.projects.add(project)
+
+        resp_data = {'subprojects': [{'slug': 'sub1'}]}
+        build_context_response.send(
+            sender=None, request=None, version=Mock(project=project), resp_data=resp_data
+        )
+        build_env = Mock(project=Mock(build_context=resp_data))
+        data = {}
+        finalize_sphinx_context_data.send(
+            sender=self.__class__,
+            build_env=build_env,
+            data=data,
+        )
+        get_subprojects.assert_not_called()
+        self.assertEqual(data, {
+            'subprojects': [{'slug': 'sub1'}],
+            'publisher_project': {'name': 'Test Project', 'slug': 'testproject'},
+            'publisher': {'name': 'Test Org', 'slug': 'testorg'},
+            'publisher_logo': 'logo_url.jpg',
+            'tags': ['ipsum', 'lorem'],
+        })
+
     def test_publisher_create_projects_from_metadata_let_use_same_slug_for_other_publisher(self):
         publisher = Publisher.objects.create(
             name='Test Org',
@@ -539,6 +724,99 @@ class DocsItaliaTest(TestCase):
         self.assertTrue(new_pub_proj.active)
         self.assertTrue(new_pub_proj.projects.filter(pk=project.pk).exists())
 
+    @patch('readthedocs.docsitalia.models.mark_projects_dirty')
+    def test_publisher_create_projects_from_metadata_reindex_only_moved_projects(self, mark_projects_dirty):
+        publisher = Publisher.objects.create(
+            name='Test Org',
+            slug='testorg',
+        )
+        pub_project = PublisherProject.objects.create(
+            name='Test Project',
+            slug='testproject',
+            publisher=publisher,
+            active=True
+        )
+        project = Project.objects.create(
+            name='my project',
+            slug='myprojectslug',
+            repo='https://github.com/testorg/myrepourl.git'
+        )
+        other_project = Project.objects.create(
+            name='my other project',
+            slug='myotherprojectslug',
+            repo='https://github.com/testorg/myotherrepourl.git'
+        )
+        pub_project.projects.add(project, other_project)
+        RemoteRepository.objects.create(
+            full_name='remote repo name',
+            html_url='https://github.com/testorg/myrepourl',
+            project=project,
+        )
+        metadata = {
+            'projects': [{
+                'name': 'Test Project',
+                'slug': 'newtestproject',
+                'documents': [{
+                    'repo_url': 'https://github.com/testorg/myrepourl'
+                }]
+            }]
+        }
+        publisher.create_projects_from_metadata(metadata)
+        mark_projects_dirty.assert_called_once()
+        self.assertEqual(list(mark_projects_dirty.call_args[0][0]), [project.pk])
+        self.assertEqual(list(pub_project.projects.all()), [other_project])
+
+        # syncing the same metadata again doesn't touch anything
+        new_pub_proj = PublisherProject.objects.get(slug='newtestproject')
+        mark_projects_dirty.reset_mock()
+        publisher.create_projects_from_metadata(metadata)
+        mark_projects_dirty.assert_not_called()
+        self.assertEqual(
+            PublisherProject.objects.get(pk=new_pub_proj.pk).modified_date,
+            new_pub_proj.modified_date
+        )
+        self.assertEqual(list(new_pub_proj.projects.all()), [project])
+
+    @patch('readthedocs.docsitalia.tasks.update_search_fields.apply_async')
+    def test_publisher_changes_mark_projects_dirty_once(self, update_search_fields):
+        cache.clear()
+        publisher = Publisher.objects.create(
+            name='Test Org',
+            slug='testorg',
+        )
+        pub_project = PublisherProject.objects.create(
+            name='Test Project',
+            slug='testproject',
+            publisher=publisher,
+            active=True
+        )
+        project = Project.objects.create(
+            name='my project',
+            slug='myprojectslug',
+            repo='https://github.com/testorg/myrepourl.git'
+        )
+        with override_settings(ELASTICSEARCH_DSL_AUTOSYNC=True):
+            pub_project.projects.add(project)
+            update_search_fields.assert_called_once_with(args=[[project.pk]], countdown=10)
+
+            # the project is already waiting for the update
+            update_search_fields.reset_mock()
+            publisher.name = 'New Test Org'
+            publisher.save()
+            update_search_fields.assert_not_called()
+
+            # saving without changing the indexed fields doesn't mark the projects
+            cache.clear()
+            publisher.metadata = {'publisher': {}}
+            publisher.save()
+            pub_project.name = 'New Test Project'
+            pub_project.save()
+            update_search_fields.assert_not_called()
+
+            publisher.name = 'Test Org'
+            publisher.save()
+            update_search_fields.assert_called_once_with(args=[[project.pk]], countdown=10)
+
     def test_publisher_metadata_validation_parse_well_formed_metadata(self):
         data = validate_publisher_metadata(None, PUBLISHER_METADATA)
         self.assertTrue(data)
@@ -790,6 +1068,35 @@ class DocsItaliaTest(TestCase):
         self.assertEqual(project.tags.count(), 1)
         self.assertIn('amazing-document', project.tags.slugs())
 
+    def test_document_metadata_is_cached_by_etag(self):
+        AllowedTag.objects.create(name='amazing document', enabled=True)
+        project = Project.objects.create(
+            name='my project',
+            slug='myprojectslug',
+            repo='https://github.com/testorg/etagrepo.git'
+        )
+        url = 'https://raw.githubusercontent.com/testorg/etagrepo/master/document_settings.yml'
+        with requests_mock.Mocker() as rm:
+            rm.get(url, text=DOCUMENT_METADATA, headers={
+                'ETag': '"abc"',
+                'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT',
+            })
+            metadata = get_metadata_for_document(project)
+
+            rm.get(url, status_code=304)
+            with self.assertNumQueries(0):
+                self.assertEqual(get_metadata_for_document(project), metadata)
+            self.assertEqual(rm.last_request.headers['If-None-Match'], '"abc"')
+            self.assertEqual(
+                rm.last_request.headers['If-Modified-Since'],
+                'Wed, 21 Oct 2015 07:28:00 GMT'
+            )
+
+            # the validation depends on the allowed tags
+            AllowedTag.objects.filter(name='amazing document').update(enabled=False)
+            metadata = get_metadata_for_document(project)
+        self.assertEqual(metadata['document']['tags'], [])
+
     def test_on_webhook_github_signal_ignores_not_push_events(self):
         webhook_github.send(Project, project=None, data=None, event='notpush')
 
@@ -1249,6 +1556,62 @@ class DocsItaliaTest(TestCase):
             call_command('clean_es_index')
             self.assertIn(project.pk, [e[1]['id'] for e in d.call_args_list])
 
+    @patch('readthedocs.docsitalia.management.commands.rebuild_projects.update_docs_task')
+    def test_rebuild_projects_default_versions_first_and_resume(self, update_docs_task):
+        project = Project.objects.create(
+            name='my project',
+            slug='myprojectslug',
+            repo='https://github.com/testorg/myrepourl.git'
+        )
+        other = project.versions.create(
+            slug='other', verbose_name='other', identifier='other', type='branch', active=True
+        )
+        project.default_version = other.slug
+        project.save()
+
+        call_command('rebuild_projects', document=project.slug)
+        built = [c[1]['version_pk'] for c in update_docs_task.run.call_args_list]
+        self.assertEqual(built[0], other.pk)
+        self.assertEqual(sorted(built), sorted(project.versions.values_list('pk', flat=True)))
+        self.assertEqual(
+            set(Build.objects.filter(project=project).values_list('fingerprint', flat=True)),
+            {':{}'.format(settings.DOCKER_IMAGE)},
+        )
+
+        # the versions already built with the same fingerprint are skipped
+        update_docs_task.reset_mock()
+        Build.objects.filter(project=project).update(state='finished', success=True)
+        call_command('rebuild_projects', document=project.slug)
+        update_docs_task.run.assert_not_called()
+
+        # the builds not triggered by the command don't count
+        Build.objects.filter(project=project).update(fingerprint='')
+        call_command('rebuild_projects', document=project.slug)
+        self.assertEqual(update_docs_task.run.call_count, project.versions.count())
+
+        update_docs_task.reset_mock()
+        call_command('rebuild_projects', document=project.slug, fingerprint='new')
+        self.assertEqual(update_docs_task.run.call_count, project.versions.count())
+
+    @patch('readthedocs.docsitalia.management.commands.rebuild_projects.update_docs_task')
+    def test_rebuild_projects_ends_with_lost_builds(self, update_docs_task):
+        project = Project.objects.create(
+            name='my project',
+            slug='myprojectslug',
+            repo='https://github.com/testorg/myrepourl.git'
+        )
+        call_command('rebuild_projects', document=project.slug)
+
+        # the builds of the first run never started
+        Build.objects.filter(project=project).update(
+            date=timezone.now() - datetime.timedelta(hours=1),
+        )
+        call_command(
+            'rebuild_projects', '--async', document=project.slug,
+            wave_interval=0, build_timeout=60,
+        )
+        update_docs_task.apply_async.assert_not_called()
+
     @patch('readthedocs.docsitalia.tasks.clear_es_index')
     def test_when_i_remove_the_publisher_project_the_projects_get_removed(self, clear_index):
         publisher = Publisher.objects.create(
@@ -1299,6 +1662,31 @@ class DocsItaliaTest(TestCase):
         proj2 = Project.objects.filter(pk=project2.pk)
         self.assertTrue(proj2.exists())
 
+    @patch('readthedocs.docsitalia.tasks.helpers.bulk')
+    @patch('readthedocs.docsitalia.tasks.Elasticsearch')
+    def test_clear_es_index_purges_the_projects_in_bulk(self, elasticsearch, bulk):
+        e_s = elasticsearch.return_value
+        e_s.delete_by_query.side_effect = [{'task': 'node:1'}, {'task': 'node:2'}]
+        e_s.tasks.get.return_value = {'completed': True}
+        clear_es_index(projects=[1, 2], project_slugs=['first', 'second'])
+
+        bulk.assert_called_once()
+        actions = bulk.call_args[0][1]
+        self.assertEqual([action['_id'] for action in actions], [1, 2])
+        self.assertEqual(
+            set(action['_index'] for action in actions),
+            {settings.ES_INDEXES['project']['name']}
+        )
+        self.assertEqual(
+            [c[1]['index'] for c in e_s.delete_by_query.call_args_list],
+            [settings.ES_INDEXES['page']['name'], settings.ES_INDEXES['quicksearch']['name']]
+        )
+        for c in e_s.delete_by_query.call_args_list:
+            self.assertEqual(c[1]['body'], {'query': {'terms': {'project': ['first', 'second']}}})
+            self.assertEqual(c[1]['slices'], 'auto')
+            self.assertFalse(c[1]['wait_for_completion'])
+        self.assertEqual(e_s.tasks.get.call_count, 2)
+
     def test_document_metadata_validation_allows_whitelisted_tags_only(self):
         AllowedTag.objects.bulk_create(
             [
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import threading
+import time
+
+from django.test import TestCase
+
+from readthedocs.docsitalia.search.utils import QueryCoalescer
+
+
+class QueryCoalescerTest(TestCase):
+
+    def test_identical_queries_are_coalesced(self):
+        coalescer = QueryCoalescer()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def search():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return ['result']
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(coalescer.run('key', search)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(coalescer.run('key', search)))
+        follower.start()
+        # give the follower the time to wait for the running query
+        time.sleep(0.5)
+        release.set()
+        leader.join()
+        follower.join()
+        self.assertEqual(results, [['result'], ['result']])
+        self.assertEqual(len(calls), 1)
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
 
+import datetime
+
 import mock
 import requests_mock
 from django.conf import settings
@@ -8,11 +10,17 @@ from requests.exceptions import ConnectionError
 import pytest
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test import TestCase
+from django.utils import timezone
 from readthedocs.builds.models import Build, Version
 from readthedocs.docsitalia.github import InvalidMetadata
-from readthedocs.docsitalia.models import Publisher, PublisherProject, AllowedTag, ProjectOrder
+from readthedocs.docsitalia.models import (
+    Publisher, PublisherProject, AllowedTag, ProjectOrder, PublishedDocument)
+from readthedocs.docsitalia.templatetags.docs_italia import get_project_tag, get_publisher_project
+from readthedocs.docsitalia.tasks import update_related_projects
+from readthedocs.docsitalia.utils import RELATED_PROJECTS_CACHE_KEY
 from readthedocs.docsitalia.views.core_views import (
     DocsItaliaHomePage, PublisherIndex, PublisherProjectIndex, PublisherList)
 from readthedocs.oauth.models import RemoteRepository
@@ -578,6 +586,164 @@ class DocsItaliaViewsTest(TestCase):
         )
         self.assertTrue(len(response.data['versions']) == 0)
 
+    def test_docsitalia_related_projects_are_precomputed(self):
+        publisher = Publisher.objects.create(
+            name='Test Org',
+            slug='testorg',
+            metadata={},
+            projects_metadata={},
+            active=True
+        )
+        pub_project = PublisherProject.objects.create(
+            name='Test Project',
+            slug='testproject',
+            metadata={},
+            publisher=publisher,
+            active=True
+        )
+        project = Project.objects.create(
+            name='my project',
+            slug='projectslug',
+            repo='https://github.com/testorg/myrepourl.git'
+        )
+        other_project = Project.objects.create(
+            name='other project',
+            slug='otherprojectslug',
+            repo='https://github.com/testorg/otherrepourl.git'
+        )
+        Version.objects.filter(project=other_project).update(built=True)
+        url = reverse('api_relatedprojects', kwargs={'slug': project.slug})
+
+        # adding the documents to the publisher project fills the cache
+        pub_project.projects.add(project, other_project)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [p['slug'] for p in response.data['same_publisher_project']],
+            ['otherprojectslug']
+        )
+
+        # the view reads the cached sections only
+        cache.set(RELATED_PROJECTS_CACHE_KEY.format(project.pk), {'cached': True})
+        response = self.client.get(url)
+        self.assertEqual(response.data, {'cached': True})
+
+        update_related_projects([project.pk])
+        response = self.client.get(url)
+        self.assertEqual(
+            [p['slug'] for p in response.data['same_publisher']],
+            ['otherprojectslug']
+        )
+
+    def test_docsitalia_related_projects_follow_renames_and_removals(self):
+        publisher = Publisher.objects.create(
+            name='Test Org',
+            slug='testorg',
+            metadata={},
+            projects_metadata={},
+            active=True
+        )
+        pub_project = PublisherProject.objects.create(
+            name='Test Project',
+            slug='testproject',
+            metadata={},
+            publisher=publisher,
+            active=True
+        )
+        project = Project.objects.create(
+            name='my project',
+            slug='projectslug',
+            repo='https://github.com/testorg/myrepourl.git'
+        )
+        other_project = Project.objects.create(
+            name='other project',
+            slug='otherprojectslug',
+            repo='https://github.com/testorg/otherrepourl.git'
+        )
+        Version.objects.filter(project=other_project).update(built=True)
+        pub_project.projects.add(project, other_project)
+        url = reverse('api_relatedprojects', kwargs={'slug': project.slug})
+
+        other_project.name = 'renamed project'
+        other_project.save()
+        response = self.client.get(url)
+        self.assertEqual(
+            [p['name'] for p in response.data['same_publisher_project']],
+            ['renamed project']
+        )
+
+        other_project.delete()
+        response = self.client.get(url)
+        self.assertEqual(response.data['same_publisher_project'], [])
+        self.assertEqual(response.data['same_publisher'], [])
+
+    def test_docsitalia_published_documents_projection(self):
+        publisher = Publisher.objects.create(
+            name='Test Org',
+            slug='testorg',
+            metadata={},
+            projects_metadata={},
+            active=True
+        )
+        pub_project = PublisherProject.objects.create(
+            name='Test Project',
+            slug='testproject',
+            metadata={},
+            publisher=publisher,
+            active=True
+        )
+        project = Project.objects.create(
+            name='my project',
+            slug='projectslug',
+            repo='https://github.com/testorg/myrepourl.git'
+        )
+        project.tags.add('amazing document')
+        pub_project.projects.add(project)
+        self.assertFalse(PublishedDocument.objects.filter(project=project).exists())
+
+        build = Build.objects.create(
+            project=project,
+            version=project.versions.first(),
+            type='html',
+            state='finished',
+            success=True
+        )
+        document = PublishedDocument.objects.get(project=project)
+        self.assertEqual(document.publisher, publisher)
+        self.assertEqual(document.publisher_project, pub_project)
+        self.assertEqual(document.build, build)
+        self.assertEqual(document.tags, ['amazing-document'])
+        self.assertEqual(get_publisher_project('testproject'), 'Test Project')
+        self.assertEqual(get_project_tag('amazing-document'), 'amazing document')
+
+        publisher.active = False
+        publisher.save()
+        self.assertFalse(PublishedDocument.objects.filter(project=project).exists())
+
+    @mock.patch('readthedocs.docsitalia.tasks.update_published_documents.apply_async')
+    def test_docsitalia_published_documents_on_version_change(self, apply_async):
+        project = Project.objects.create(
+            name='my project',
+            slug='projectslug',
+            repo='https://github.com/testorg/myrepourl.git'
+        )
+        version = project.versions.first()
+        # forget the update scheduled by the creation of the version
+        apply_async.reset_mock()
+        cache.clear()
+
+        version.identifier = 'a1b2c3'
+        version.save()
+        self.assertFalse(apply_async.called)
+
+        version.built = not version.built
+        version.save()
+        version.privacy_level = PRIVATE
+        version.save()
+        # the update is scheduled once for the burst of changes
+        apply_async.assert_called_once_with(args=[[project.pk]], countdown=10)
+        cache.clear()
+
     def test_docsitalia_homepage_order_projects(self):
         hp = DocsItaliaHomePage()
 
@@ -652,6 +818,13 @@ class DocsItaliaViewsTest(TestCase):
             success=True
         )
 
+        # without priority, the most recently modified documents come first
+        now = timezone.now()
+        for hours, document in enumerate([project, project2, project3]):
+            Project.objects.filter(pk=document.pk).update(
+                modified_date=now - datetime.timedelta(hours=hours),
+            )
+
         qs = hp.get_queryset()
 
         self.assertEqual(list(qs), [project, project2, project3])
@@ -675,7 +848,7 @@ class DocsItaliaViewsTest(TestCase):
         qs = hp.get_queryset()
         self.assertEqual(list(qs), [project2, project3, project])
 
-        # test Projects with same priority should be ordered by modified date
+        # test Projects with same priority should be ordered by the time the priority was set
         project_order3 = ProjectOrder.objects.get(
             project=project
         )
@@ -685,6 +858,79 @@ class DocsItaliaViewsTest(TestCase):
         qs = hp.get_queryset()
         self.assertEqual(list(qs), [project2, project, project3])
 
+    def test_docsitalia_homepage_lists_recently_modified_documents_first(self):
+        publisher = Publisher.objects.create(
+            name='Test Org',
+            slug='testorg',
+            metadata={},
+            projects_metadata={},
+            active=True
+        )
+        pub_project = PublisherProject.objects.create(
+            name='Test Project',
+            slug='testproject',
+            metadata={},
+            publisher=publisher,
+            active=True
+        )
+        old_project = Project.objects.create(
+            name='old project',
+            slug='oldprojectslug',
+            repo='https://github.com/testorg/oldrepourl.git'
+        )
+        new_project = Project.objects.create(
+            name='new project',
+            slug='newprojectslug',
+            repo='https://github.com/testorg/newrepourl.git'
+        )
+        for project in (old_project, new_project):
+            pub_project.projects.add(project)
+            Build.objects.create(
+                project=project,
+                version=project.versions.first(),
+                type='html',
+                state='finished',
+                success=True
+            )
+        self.assertEqual(
+            set(PublishedDocument.objects.values_list('priority', flat=True)), {0}
+        )
+
+        Project.objects.filter(pk=old_project.pk).update(
+            modified_date=timezone.now() - datetime.timedelta(days=1),
+        )
+        Project.objects.filter(pk=new_project.pk).update(modified_date=timezone.now())
+        self.assertEqual(
+            list(DocsItaliaHomePage().get_queryset()), [new_project, old_project]
+        )
+
+    @mock.patch('readthedocs.docsitalia.search.views.Search.execute')
+    def test_docsitalia_quicksearch_results_are_cached(self, execute):
+        cache.clear()
+        execute.return_value = [
+            mock.Mock(
+                model='progetto',
+                link='http://testserver/italia/progetto/',
+                meta=mock.Mock(highlight={'text.autocomplete': ['<mark>Pro</mark>getto']}),
+            )
+        ]
+        url = reverse('api_quicksearch')
+        response = self.client.get(url, {'q': 'Pro'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{
+            'model': 'progetto',
+            'link': 'http://testserver/italia/progetto/',
+            'text': '<mark>Pro</mark>getto',
+        }])
+
+        # the same query, normalized, is served from the cache
+        response = self.client.get(url, {'q': ' pro '})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(execute.call_count, 1)
+
+        self.client.get(url, {'q': 'pro', 'model': 'progetto'})
+        self.assertEqual(execute.call_count, 2)
 
 
 class TestAdminPrivateViews(TestCase):
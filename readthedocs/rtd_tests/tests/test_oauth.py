@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import json
+
 import mock
 from django.conf import settings
 from django.contrib.auth.models import User
@@ -120,6 +122,70 @@ class GitHubOAuthTests(TestCase):
         self.assertEqual(org.avatar_url, 'https://images.github.com/foobar')
         self.assertEqual(org.url, 'https://github.com/testorg')
 
+    @mock.patch('readthedocs.oauth.services.github.GitHubService.get_session')
+    def test_sync_repositories_pages_in_bulk(self, session):
+        def repo_json(name):
+            return {
+                'name': name,
+                'full_name': 'testuser/{}'.format(name),
+                'description': 'Test Repo',
+                'git_url': 'git://github.com/testuser/{}.git'.format(name),
+                'private': False,
+                'ssh_url': 'ssh://git@github.com:testuser/{}.git'.format(name),
+                'html_url': 'https://github.com/testuser/{}'.format(name),
+                'clone_url': 'https://github.com/testuser/{}.git'.format(name),
+            }
+
+        first_page = mock.Mock(status_code=200, links={
+            'next': {'url': 'https://api.github.com/user/repos?per_page=100&page=2'},
+        })
+        first_page.json.return_value = [repo_json('one'), repo_json('two')]
+        second_page = mock.Mock(status_code=200, links={})
+        second_page.json.return_value = [repo_json('three')]
+        session().get.side_effect = [first_page, second_page]
+        self.service.sync_repositories()
+        self.assertEqual(
+            [c[0][0] for c in session().get.call_args_list],
+            [
+                'https://api.github.com/user/repos?per_page=100',
+                'https://api.github.com/user/repos?per_page=100&page=2',
+            ]
+        )
+        repos = RemoteRepository.objects.filter(
+            users=self.user, full_name__startswith='testuser/',
+        )
+        self.assertEqual(
+            sorted(repos.values_list('name', flat=True)), ['one', 'three', 'two'],
+        )
+
+        # unchanged repositories are not saved again
+        session().get.side_effect = [first_page, second_page]
+        with mock.patch.object(RemoteRepository, 'save') as save:
+            self.service.sync_repositories()
+        save.assert_not_called()
+        self.assertEqual(repos.count(), 3)
+
+        # nor when only the volatile fields of the response change
+        first_page.json.return_value = [
+            dict(repo_json(name), pushed_at='2020-01-01T00:00:00Z')
+            for name in ('one', 'two')
+        ]
+        session().get.side_effect = [first_page, second_page]
+        with mock.patch.object(RemoteRepository, 'save') as save:
+            self.service.sync_repositories()
+        save.assert_not_called()
+
+        # the response is stored along with the changed fields
+        first_page.json.return_value = [
+            dict(repo_json('one'), description='New description', pushed_at='2020-01-02'),
+            repo_json('two'),
+        ]
+        session().get.side_effect = [first_page, second_page]
+        self.service.sync_repositories()
+        repo = repos.get(name='one')
+        self.assertEqual(repo.description, 'New description')
+        self.assertEqual(json.loads(repo.json)['pushed_at'], '2020-01-02')
+
     def test_import_with_no_token(self):
         """User without a GitHub SocialToken does not return a service."""
         services = GitHubService.for_user(self.user)
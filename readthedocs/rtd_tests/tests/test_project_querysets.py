@@ -259,6 +259,20 @@ class FeatureQuerySetTests(TestCase):
             ordered=False,
         )
 
+    def test_feature_for_project_is_loaded_once(self):
+        project = fixture.get(Project, main_language_project=None)
+        feature = fixture.get(Feature, projects=[project])
+        with self.assertNumQueries(1):
+            self.assertTrue(project.has_feature(feature.feature_id))
+            self.assertFalse(project.has_feature(Feature.API_LARGE_DATA))
+            self.assertFalse(project.has_feature(Feature.STREAM_BUILD_OUTPUT))
+
+        # the features are loaded again after a change
+        feature.projects.remove(project)
+        self.assertFalse(project.has_feature(feature.feature_id))
+        other = fixture.get(Feature, projects=[project])
+        self.assertTrue(project.has_feature(other.feature_id))
+
     def test_feature_multiple_projects(self):
         project1 = fixture.get(Project, main_language_project=None)
         project2 = fixture.get(Project, main_language_project=None)
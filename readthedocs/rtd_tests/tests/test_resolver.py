@@ -7,6 +7,7 @@ from readthedocs.core.resolver import (
     resolve,
     resolve_domain,
     resolve_path,
+    resolver_memo,
 )
 from readthedocs.projects.constants import PRIVATE
 from readthedocs.projects.models import Domain, Project, ProjectRelationship
@@ -709,6 +710,55 @@ class ResolverTestsAlt(ResolverAltSetUp, ResolverTests):
     pass
 
 
+class ResolverMemoSetUp:
+
+    """Resolve the URLs of the tests with the resolver memo active."""
+
+    def setUp(self):
+        super().setUp()
+        memo = resolver_memo()
+        memo.__enter__()
+        self.addCleanup(memo.__exit__, None, None, None)
+
+
+@override_settings(PUBLIC_DOMAIN='readthedocs.org')
+class ResolverDomainTestsMemo(ResolverMemoSetUp, ResolverDomainTests):
+    pass
+
+
+@override_settings(PUBLIC_DOMAIN='readthedocs.org')
+class SmartResolverPathTestsMemo(ResolverMemoSetUp, SmartResolverPathTests):
+    pass
+
+
+@override_settings(PUBLIC_DOMAIN='readthedocs.org')
+class ResolverTestsMemo(ResolverMemoSetUp, ResolverTests):
+
+    @override_settings(USE_SUBDOMAIN=True, PRODUCTION_DOMAIN='readthedocs.org')
+    def test_resolver_memo_looks_up_relations_once(self):
+        fixture.get(
+            Domain,
+            domain='docs.foobar.com',
+            project=self.pip,
+            canonical=True,
+            https=False,
+        )
+        url = resolve_domain(project=self.subproject)
+        self.assertEqual(url, 'docs.foobar.com')
+        # a fresh instance of the same project hits the memo too
+        subproject = Project.objects.get(pk=self.subproject.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_domain(project=subproject), url)
+        self.assertEqual(
+            resolve(project=subproject, version_slug='latest', private=False),
+            'http://docs.foobar.com/projects/sub/ja/latest/',
+        )
+
+        # the memo is cleared by the changes of the domains
+        Domain.objects.filter(project=self.pip).delete()
+        self.assertEqual(resolve_domain(project=subproject), 'pip.readthedocs.org')
+
+
 @override_settings(USE_SUBDOMAIN=True, PUBLIC_DOMAIN='readthedocs.io')
 class TestSubprojectsWithTranslations(TestCase):
 
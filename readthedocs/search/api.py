@@ -167,13 +167,13 @@ class PageSearchAPIView(generics.ListAPIView):
         query = self.request.query_params.get('q', '')
         query = query.lower().strip()
 
-        # record the search query with a celery task
-        tasks.record_search_query.delay(
+        # buffer the search query, to record it with the following ones
+        tasks.search_queries_buffer.add((
             project_slug,
             version_slug,
             query,
             total_results,
             time.isoformat(),
-        )
+        ))
 
         return response
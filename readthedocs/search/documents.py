@@ -5,7 +5,6 @@ from django_elasticsearch_dsl import DocType, Index, fields
 
 from elasticsearch import Elasticsearch
 
-from readthedocs.docsitalia.models import Publisher, PublisherProject, ProjectOrder
 from readthedocs.projects.models import HTMLFile, Project
 
 
@@ -63,8 +62,8 @@ class ProjectDocument(RTDDocTypeMixin, DocType):
         model = Project
         fields = ('name', 'slug', 'description')
         ignore_signals = True
-        # ensure the Project is reindexed when Publisher or PublisherProject is updated
-        related_models = [PublisherProject, Publisher, ProjectOrder]
+        # the docsitalia fields are updated by the PartialUpdateSignalProcessor
+        # when a Publisher, PublisherProject or ProjectOrder changes
 
     def get_queryset(self):
         """Fetch related instances."""
@@ -73,20 +72,6 @@ class ProjectDocument(RTDDocTypeMixin, DocType):
             'publisherproject_set__publisher'
         )
 
-    def get_instances_from_related(self, related_instance):
-        """
-        If related_models is set, define how to retrieve the instance(s) from the related model.
-
-        The related_models option should be used with caution because it can lead in the index
-        to the updating of a lot of items.
-        """
-        # see https://github.com/PyCQA/pylint/issues/2283
-        # pylint: disable=no-else-return
-        if isinstance(related_instance, Publisher):
-            return Project.objects.filter(publisherproject__publisher=related_instance)
-        elif isinstance(related_instance, PublisherProject):
-            return related_instance.projects.all()
-
     def prepare_publisher_project(self, instance):
         """Prepare docsitalia publisher project field."""
         # not using more sophisticated Django methods in order to exploit prefetching
@@ -189,24 +174,8 @@ class PageDocument(RTDDocTypeMixin, DocType):
         model = HTMLFile
         fields = ('commit', 'build')
         ignore_signals = True
-        # ensure the Page is reindexed when Publisher or PublisherProject or ProjectOrder is updated
-        related_models = [PublisherProject, Publisher, ProjectOrder]
-
-    def get_instances_from_related(self, related_instance):
-        """
-        If related_models is set, define how to retrieve the instance(s) from the related model.
-
-        The related_models option should be used with caution because it can lead in the index
-        to the updating of a lot of items.
-        """
-        # see https://github.com/PyCQA/pylint/issues/2283
-        # pylint: disable=no-else-return
-        if isinstance(related_instance, Publisher):
-            return HTMLFile.objects.filter(project__publisherproject__publisher=related_instance)
-        elif isinstance(related_instance, PublisherProject):
-            return HTMLFile.objects.filter(project__publisherproject=related_instance)
-        elif isinstance(related_instance, ProjectOrder):
-            return HTMLFile.objects.filter(project__projectorder=related_instance)
+        # the docsitalia fields are updated by the PartialUpdateSignalProcessor
+        # when a Publisher, PublisherProject or ProjectOrder changes
 
     def prepare_domains(self, html_file):
         """Prepares and returns the values for domains field."""
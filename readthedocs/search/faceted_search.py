@@ -5,6 +5,7 @@ from elasticsearch_dsl import FacetedSearch, TermsFacet
 from elasticsearch_dsl.faceted_search import FacetedResponse, NestedFacet
 from elasticsearch_dsl.query import Bool, SimpleQueryString, Nested, Match
 from elasticsearch_dsl.search import Search
+from elasticsearch_dsl.utils import AttrDict
 
 from django.conf import settings
 
@@ -24,12 +25,30 @@ ALL_FACETS = [
 ]
 
 
+class RTDFacetedResponse(FacetedResponse):
+
+    """Faceted response returning the facets of the search when they are already known."""
+
+    @property
+    def facets(self):
+        cached_facets = self._faceted_search.cached_facets
+        if cached_facets is None:
+            return super().facets
+        if not hasattr(self, '_facets'):
+            super(AttrDict, self).__setattr__('_facets', AttrDict(cached_facets))
+        return self._facets
+
+
 class RTDFacetedSearch(FacetedSearch):
 
     def __init__(self, user, **kwargs):
         """
         Pass in a user in order to filter search results by privacy.
 
+        When the facets of the same search were computed by a previous request,
+        they can be passed in as ``cached_facets``: Elasticsearch isn't asked
+        to aggregate them again.
+
         .. warning::
 
             The `self.user` and `self.filter_by_user` attributes
@@ -37,6 +56,7 @@ class RTDFacetedSearch(FacetedSearch):
         """
         self.user = user
         self.filter_by_user = kwargs.pop('filter_by_user', True)
+        self.cached_facets = kwargs.pop('cached_facets', None)
 
         # Set filters properly
         for facet in self.facets:
@@ -56,6 +76,15 @@ class RTDFacetedSearch(FacetedSearch):
 
         super().__init__(**kwargs)
 
+    def aggregate(self, search):
+        """Add the aggregations of the facets to ``search``, unless they are cached."""
+        if self.cached_facets is None:
+            super().aggregate(search)
+
+    def search(self):
+        """Return the search object, building a response with the cached facets."""
+        return super().search().response_class(RTDFacetedResponse)
+
     def query(self, search, query):
         """
         Add query part to ``search`` when needed.
@@ -224,7 +253,7 @@ class PageSearchBase(RTDFacetedSearch):
             doc_type=self.doc_types, index=self.index, using=self.using,
             extra={'min_score': getattr(settings, 'ES_SEARCH_FILE_MIN_SCORE', 1)},
         ).exclude("term", privacy_level=PRIVATE)
-        return s.response_class(FacetedResponse)
+        return s.response_class(RTDFacetedResponse)
 
 
 class PageSearch(SettingsOverrideObject):
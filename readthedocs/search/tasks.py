@@ -1,15 +1,18 @@
+import atexit
 import logging
+from collections import defaultdict
 
 from dateutil.parser import parse
 from django.apps import apps
+from django.conf import settings
 from django.utils import timezone
 from django_elasticsearch_dsl.registries import registry
 
 from readthedocs.builds.models import Version
-from readthedocs.projects.models import Project
+from readthedocs.core.utils.buffer import BatchBuffer
 from readthedocs.search.models import SearchQuery
 from readthedocs.worker import app
-from .utils import _get_index, _get_document
+from .utils import _get_index, _get_document, invalidate_search_cache
 
 log = logging.getLogger(__name__)
 
@@ -55,6 +58,8 @@ def index_objects_to_es(
         log.info('Undoing index replacement, settings %s with %s',
                  document._doc_type.index, old_index_name)
         document._doc_type.index = old_index_name
+    else:
+        invalidate_search_cache()
 
 
 @app.task(queue='web')
@@ -70,6 +75,7 @@ def delete_objects_in_es(app_label, model_name, document_class, objects_id):
         doc_obj.update(queryset.iterator(), action='delete')
     except Exception:
         log.warning('Unable to delete a subset of files. Continuing.', exc_info=True)
+    invalidate_search_cache()
 
 
 @app.task(queue='web')
@@ -101,6 +107,7 @@ def switch_es_index(app_label, model_name, index_name, new_index_name):
     new_index.put_alias(name=index_name)
     if old_index_actual_name:
         old_index.connection.indices.delete(index=old_index_actual_name)
+    invalidate_search_cache()
 
 
 @app.task(queue='web')
@@ -119,6 +126,7 @@ def index_missing_objects(app_label, model_name, document_class, index_generatio
     query_string = '{}__lte'.format(document.modified_model_field)
     queryset = document().get_queryset().exclude(**{query_string: index_generation_time})
     document().update(queryset.iterator())
+    invalidate_search_cache()
 
     log.info("Indexed %s missing objects from model: %s'", queryset.count(), model.__name__)
 
@@ -145,70 +153,122 @@ def delete_old_search_queries_from_db():
 @app.task(queue='web')
 def record_search_query(project_slug, version_slug, query, total_results, time_string):
     """Record/update search query in database."""
-    if not project_slug or not version_slug or not query:
-        log.debug(
-            'Not recording the search query. Passed arguments: '
-            'project_slug: %s, version_slug: %s, query: %s, total_results: %s, time: %s' % (
-                project_slug, version_slug, query, total_results, time_string
+    record_search_queries([
+        (project_slug, version_slug, query, total_results, time_string),
+    ])
+
+
+@app.task(queue='web')
+def record_search_queries(queries):
+    """
+    Record/update a batch of search queries in database.
+
+    A query updates the partial query recorded for the same project version
+    in the 10 seconds before it, if any, whether it was recorded by a
+    previous batch or by this one. The recent queries are read once per
+    project version and each query is written once.
+
+    :param queries: list of ``(project_slug, version_slug, query,
+        total_results, time_string)`` tuples
+    """
+    queries_by_version = defaultdict(list)
+    for project_slug, version_slug, query, total_results, time_string in queries:
+        if not project_slug or not version_slug or not query:
+            log.debug(
+                'Not recording the search query. Passed arguments: '
+                'project_slug: %s, version_slug: %s, query: %s, total_results: %s, time: %s' % (
+                    project_slug, version_slug, query, total_results, time_string
+                )
             )
+            continue
+        queries_by_version[(project_slug, version_slug)].append(
+            (query, total_results, parse(time_string))
         )
-        return
 
-    time = parse(time_string)
-    before_10_sec = time - timezone.timedelta(seconds=10)
-    partial_query_qs = SearchQuery.objects.filter(
+    for (project_slug, version_slug), version_queries in queries_by_version.items():
+        _record_version_search_queries(project_slug, version_slug, version_queries)
+
+
+def _record_version_search_queries(project_slug, version_slug, queries):
+    queries.sort(key=lambda version_query: version_query[2])
+    recent_queries = list(SearchQuery.objects.filter(
         project__slug=project_slug,
         version__slug=version_slug,
-        created__gte=before_10_sec,
-    ).order_by('-created')
+        created__gte=queries[0][2] - timezone.timedelta(seconds=10),
+    ))
+    updated_queries = []
+    new_queries = []
+    version = None
+
+    for query, total_results, time in queries:
+        before_10_sec = time - timezone.timedelta(seconds=10)
+        partial_queries = sorted(
+            (
+                partial_query
+                for partial_query in recent_queries + new_queries
+                if partial_query.created >= before_10_sec
+            ),
+            key=lambda partial_query: partial_query.created,
+            reverse=True,
+        )
 
-    # check if partial query exists,
-    # if yes, then just update the object.
-    for partial_query in partial_query_qs.iterator():
-        if query.startswith(partial_query.query):
+        # check if partial query exists,
+        # if yes, then just update the object.
+        partial_query = next(
+            (
+                partial_query
+                for partial_query in partial_queries
+                if query.startswith(partial_query.query)
+            ),
+            None,
+        )
+        if partial_query:
             partial_query.created = time
             partial_query.query = query
-            partial_query.save()
-            return
-
-    # don't record query with zero results.
-    if not total_results:
-        log.debug(
-            'Not recording search query because of zero results. Passed arguments: '
-            'project_slug: %s, version_slug: %s, query: %s, total_results: %s, time: %s' % (
-                project_slug, version_slug, query, total_results, time
-            )
-        )
-        return
-
-    project = Project.objects.filter(slug=project_slug).first()
-    if not project:
-        log.debug(
-            'Not recording the search query because project does not exist. '
-            'project_slug: %s' % (
-                project_slug
+            if partial_query.pk and partial_query not in updated_queries:
+                updated_queries.append(partial_query)
+            continue
+
+        # don't record query with zero results.
+        if not total_results:
+            log.debug(
+                'Not recording search query because of zero results. Passed arguments: '
+                'project_slug: %s, version_slug: %s, query: %s, total_results: %s, time: %s' % (
+                    project_slug, version_slug, query, total_results, time
+                )
             )
-        )
-        return
-
-    version_qs = Version.objects.filter(project=project, slug=version_slug)
-
-    if not version_qs.exists():
-        log.debug(
-            'Not recording the search query because version does not exist. '
-            'project_slug: %s, version_slug: %s' % (
-                project_slug, version_slug
+            continue
+
+        if version is None:
+            version = Version.objects.filter(
+                project__slug=project_slug,
+                slug=version_slug,
+            ).select_related('project').first() or False
+        if not version:
+            log.debug(
+                'Not recording the search query because version does not exist. '
+                'project_slug: %s, version_slug: %s' % (
+                    project_slug, version_slug
+                )
             )
-        )
-        return
-
-    version = version_qs.first()
-
-    # make a new SearchQuery object.
-    obj = SearchQuery.objects.create(
-        project=project,
-        version=version,
-        query=query,
-    )
-    obj.created = time
-    obj.save()
+            continue
+
+        # make a new SearchQuery object.
+        new_queries.append(SearchQuery(
+            project=version.project,
+            version=version,
+            query=query,
+            created=time,
+        ))
+
+    for partial_query in updated_queries:
+        partial_query.save()
+    SearchQuery.objects.bulk_create(new_queries)
+
+
+search_queries_buffer = BatchBuffer(
+    record_search_queries.delay,
+    size=settings.SEARCH_QUERIES_BUFFER_SIZE,
+    timeout=settings.SEARCH_QUERIES_BUFFER_TIME,
+)
+atexit.register(search_queries_buffer.flush)
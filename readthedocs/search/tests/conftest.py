@@ -3,6 +3,7 @@ import os
 from random import shuffle
 
 import pytest
+from django.core.cache import cache
 from django.core.management import call_command
 from django_dynamic_fixture import G
 
@@ -15,6 +16,7 @@ from .dummy_data import ALL_PROJECTS, PROJECT_DATA_FILES
 
 @pytest.fixture()
 def es_index():
+    cache.clear()
     call_command('search_index', '--delete', '-f')
     call_command('search_index', '--create')
 
@@ -106,6 +106,48 @@ class TestSearchTasks:
             SearchQuery.objects.all().count() == 0
         ), 'there should be 0 obj since there were no results.'
 
+    def test_search_queries_recorded_in_batch(self, project):
+        """Test that a batch of queries is recorded with the partial queries merged."""
+        version = project.versions.all().first()
+        time = timezone.now()
+
+        def search(query, total_results, seconds):
+            return (
+                project.slug,
+                version.slug,
+                query,
+                total_results,
+                (time + timezone.timedelta(seconds=seconds)).isoformat(),
+            )
+
+        tasks.record_search_queries([
+            search('stack', 1, 0),
+            search('stack over', 1, 2),
+            search('stack overflow', 1, 4),
+            search('readthedo', 0, 5),
+            search('sphinx', 1, 6),
+            # more than 10 seconds after the last partial query
+            search('stack overflow answers', 1, 20),
+            search('', 1, 21),
+        ])
+
+        assert sorted(SearchQuery.objects.values_list('query', flat=True)) == [
+            'sphinx',
+            'stack overflow',
+            'stack overflow answers',
+        ]
+
+        # a later batch updates the partial queries of the previous one
+        tasks.record_search_queries([search('sphinx domains', 1, 8)])
+        assert sorted(SearchQuery.objects.values_list('query', flat=True)) == [
+            'sphinx domains',
+            'stack overflow',
+            'stack overflow answers',
+        ]
+
+        counts = SearchQuery.generate_queries_count_of_one_month(project.slug)
+        assert sum(counts['int_data']) == 3
+
     def test_delete_old_search_queries_from_db(self, project):
         """Test that the old search queries are being deleted."""
 
@@ -5,6 +5,7 @@ import re
 import pytest
 from django.core.urlresolvers import reverse
 from django_dynamic_fixture import G
+from elasticsearch import Elasticsearch
 from pyquery import PyQuery as pq
 
 from readthedocs.builds.constants import LATEST
@@ -14,6 +15,7 @@ from readthedocs.search.tests.utils import (
     get_search_query_from_project_file,
     DATA_TYPES_VALUES,
 )
+from readthedocs.search.utils import invalidate_search_cache
 
 
 @pytest.mark.django_db
@@ -417,3 +419,58 @@ class TestPageSearch(object):
 
         assert len(results) == 3
 
+    def test_search_results_are_cached(self, client, all_projects, mocker):
+        search = mocker.spy(Elasticsearch, 'search')
+        search_params = {'q': 'are', 'type': 'file'}
+        results, _ = self._get_search_result(
+            url=self.url,
+            client=client,
+            search_params=search_params,
+        )
+        assert len(results) == 3
+        assert search.call_count == 1
+
+        # the same search, normalized, is served by the cache
+        search_params['q'] = '  are '
+        cached_results, _ = self._get_search_result(
+            url=self.url,
+            client=client,
+            search_params=search_params,
+        )
+        assert search.call_count == 1
+        assert (
+            [result.meta.id for result in cached_results] ==
+            [result.meta.id for result in results]
+        )
+
+        invalidate_search_cache()
+        results, _ = self._get_search_result(
+            url=self.url,
+            client=client,
+            search_params=search_params,
+        )
+        assert len(results) == 3
+        assert search.call_count == 2
+
+    def test_search_facets_are_aggregated_once(self, client, all_projects, mocker):
+        search = mocker.spy(Elasticsearch, 'search')
+        search_params = {'q': 'are', 'type': 'file', 'page_size': 2}
+        results, facets = self._get_search_result(
+            url=self.url,
+            client=client,
+            search_params=search_params,
+        )
+        assert len(results) == 2
+        assert 'aggs' in search.call_args[1]['body']
+
+        # another page of the same search reuses the facets
+        search_params['page'] = 2
+        results, page_facets = self._get_search_result(
+            url=self.url,
+            client=client,
+            search_params=search_params,
+        )
+        assert len(results) == 1
+        assert search.call_count == 2
+        assert 'aggs' not in search.call_args[1]['body']
+        assert page_facets == facets
@@ -1,8 +1,10 @@
 """Utilities related to reading and generating indexable search content."""
 
 import logging
+import time
 from operator import attrgetter
 
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
 from django_elasticsearch_dsl.apps import DEDConfig
 from django_elasticsearch_dsl.registries import registry
@@ -14,6 +16,21 @@ from readthedocs.search.documents import PageDocument
 
 log = logging.getLogger(__name__)
 
+SEARCH_CACHE_VERSION_KEY = 'search:version'
+SEARCH_CACHE_KEY = 'search:{}:{}'
+# the search results can lag behind the index for this many seconds
+SEARCH_CACHE_TIME = 60
+
+
+def get_search_cache_version():
+    """Return the version of the cached search results, changed when the indexes change."""
+    return cache.get_or_set(SEARCH_CACHE_VERSION_KEY, time.time, None)
+
+
+def invalidate_search_cache():
+    """Make the cached search results stale."""
+    cache.set(SEARCH_CACHE_VERSION_KEY, time.time(), None)
+
 
 def index_new_files(model, version, build):
     """Index new files from the version into the search index."""
@@ -1,9 +1,11 @@
 """Search views."""
 import collections
+import hashlib
 import itertools
 import logging
 from operator import attrgetter
 
+from django.core.cache import cache
 from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, render
 
@@ -75,6 +77,52 @@ class ESPaginator(Paginator):
         return self._count
 
 
+def get_search_cache_key(search_type, query, filters, user):
+    """Return the cache key of the normalized search, changed when the indexes change."""
+    normalized = sorted(
+        (name, sorted(value) if isinstance(value, list) else value)
+        for name, value in filters.items()
+    )
+    normalized.extend([
+        ('query', ' '.join(query.split())),
+        ('type', search_type),
+        ('user', user.pk),
+    ])
+    return utils.SEARCH_CACHE_KEY.format(
+        utils.get_search_cache_version(),
+        hashlib.sha1(repr(normalized).encode('utf-8')).hexdigest(),
+    )
+
+
+def execute_search(search, start, end, cache_key):
+    """
+    Execute ``search`` from ``start`` to ``end``, sharing the response for some time.
+
+    The raw response of Elasticsearch is cached, the hits and the facets are
+    built from it as if it was just returned. A response cached without the
+    aggregations, because the facets were cached too, is not reused by a
+    search needing them.
+    """
+    key = '{}:{}:{}'.format(cache_key, start, end)
+    search = search[start:end]
+    raw_response = cache.get(key)
+    if raw_response is None or (
+            search.cached_facets is None and 'aggregations' not in raw_response
+    ):
+        results = search.execute()
+        raw_response = {
+            name: value
+            for name, value in results.to_dict().items()
+            if name != '_faceted_search'
+        }
+        cache.set(key, raw_response, utils.SEARCH_CACHE_TIME)
+        return results
+    # pylint: disable=protected-access
+    results = search._s._response_class(search._s, raw_response)
+    results._faceted_search = search
+    return results
+
+
 def elastic_search(request, project_slug=None):
     """
     Global user search on the dashboard.
@@ -143,14 +191,34 @@ def elastic_search(request, project_slug=None):
             if value:
                 kwargs[avail_facet] = value
 
+        # the facets don't depend on the page and on the sort of the results,
+        # they are aggregated just by the first request of the search
+        facets_key = get_search_cache_key(
+            user_input.type,
+            user_input.query,
+            {name: value for name, value in kwargs.items() if name != 'sort'},
+            request.user,
+        ) + ':facets'
+        cached_facets = cache.get(facets_key)
         search = search_facets[user_input.type](
-            query=user_input.query, user=request.user, **kwargs
+            query=user_input.query,
+            user=request.user,
+            cached_facets=cached_facets,
+            **kwargs
+        )
+        cache_key = get_search_cache_key(
+            user_input.type,
+            user_input.query,
+            kwargs,
+            request.user,
         )
-        results = search[page_start:page_end].execute()
+        results = execute_search(search, page_start, page_end, cache_key)
         if not results:
             page_int = 1
-            results = search[0:page_size].execute()
+            results = execute_search(search, 0, page_size, cache_key)
         facets = results.facets
+        if cached_facets is None:
+            cache.set(facets_key, facets.to_dict(), utils.SEARCH_CACHE_TIME)
 
         log.info(
             LOG_TEMPLATE,
@@ -80,6 +80,13 @@ class CommunityBaseSettings(Settings):
     RTD_STABLE = 'stable'
     RTD_STABLE_VERBOSE_NAME = 'stable'
     RTD_CLEAN_AFTER_BUILD = False
+    # Seconds a triggered build waits in the queue, so that newer triggers
+    # of the same version can supersede it
+    RTD_BUILD_COALESCE_DEBOUNCE = 0
+    # Streamed build commands (``stream_build_output`` feature): bytes of
+    # output kept in the database and seconds between batches posted to the API
+    RTD_BUILD_COMMAND_OUTPUT_TAIL = 256 * 1024
+    RTD_BUILD_COMMANDS_FLUSH_INTERVAL = 5
 
     # Database and API hitting settings
     DONT_HIT_API = False
@@ -162,6 +169,7 @@ class CommunityBaseSettings(Settings):
         return 'readthedocsext.donate' in self.INSTALLED_APPS
 
     MIDDLEWARE = (
+        'readthedocs.core.middleware.ResolverMemoMiddleware',
         'readthedocs.core.middleware.FooterNoSessionMiddleware',
         'django.middleware.locale.LocaleMiddleware',
         'django.middleware.common.CommonMiddleware',
@@ -333,7 +341,12 @@ class CommunityBaseSettings(Settings):
             'task': 'readthedocs.search.tasks.delete_old_search_queries_from_db',
             'schedule': crontab(minute=0, hour=0),
             'options': {'queue': 'web'},
-        }
+        },
+        'every-day-prune-git-mirrors': {
+            'task': 'readthedocs.projects.tasks.broadcast_prune_git_mirrors',
+            'schedule': crontab(minute=0, hour=3),
+            'options': {'queue': 'web'},
+        },
     }
     MULTIPLE_APP_SERVERS = [CELERY_DEFAULT_QUEUE]
     MULTIPLE_BUILD_SERVERS = [CELERY_DEFAULT_QUEUE]
@@ -351,6 +364,11 @@ class CommunityBaseSettings(Settings):
     DOCKER_VERSION = 'auto'
     DOCKER_DEFAULT_VERSION = 'latest'
     DOCKER_IMAGE = '{}:{}'.format(DOCKER_DEFAULT_IMAGE, DOCKER_DEFAULT_VERSION)
+    # Idle build containers kept on each builder to be reused by the next
+    # build with the same image, mounts and environment (0 disables the pool)
+    DOCKER_CONTAINER_POOL_SIZE = 0
+    DOCKER_CONTAINER_POOL_LIFETIME = 2 * 60 * 60
+    DOCKER_IMAGE_HASH_CACHE_TIME = 5 * 60
     DOCKER_IMAGE_SETTINGS = {
         'readthedocs/build:1.0': {
             'python': {'supported_versions': [2, 2.7, 3, 3.4]},
@@ -417,6 +435,12 @@ class CommunityBaseSettings(Settings):
 
     # RTD Settings
     REPO_LOCK_SECONDS = 30
+    # Directory of the bare git mirrors shared by the checkouts of a project
+    # (disabled when ``None``), seconds before a mirror is fetched again and
+    # seconds an unused mirror is kept on the builders
+    GIT_MIRROR_ROOT = None
+    GIT_MIRROR_REFRESH_INTERVAL = 60
+    GIT_MIRROR_MAX_AGE = 30 * 24 * 60 * 60
     ALLOW_PRIVATE_REPOS = False
     DEFAULT_PRIVACY_LEVEL = 'public'
     DEFAULT_VERSION_PRIVACY_LEVEL = 'public'
@@ -503,6 +527,14 @@ class CommunityBaseSettings(Settings):
     # Misc application settings
     GLOBAL_ANALYTICS_CODE = None
     DASHBOARD_ANALYTICS_CODE = None  # For the dashboard, not docs
+    # The analytics hits are buffered by each process and sent in batches
+    # when there are this many of them or after this many seconds
+    ANALYTICS_BUFFER_SIZE = 100
+    ANALYTICS_BUFFER_TIME = 10
+    ANALYTICS_BATCH_URL = 'https://www.google-analytics.com/batch'
+    # The search queries are buffered the same way and recorded in batches
+    SEARCH_QUERIES_BUFFER_SIZE = 100
+    SEARCH_QUERIES_BUFFER_TIME = 10
     GRAVATAR_DEFAULT_IMAGE = 'https://assets.readthedocs.org/static/images/silhouette.png'  # NOQA
     OAUTH_AVATAR_USER_DEFAULT_URL = GRAVATAR_DEFAULT_IMAGE
     OAUTH_AVATAR_ORG_DEFAULT_URL = GRAVATAR_DEFAULT_IMAGE
@@ -18,6 +18,8 @@ class CommunityTestSettings(CommunityDevSettings):
     TEMPLATE_DEBUG = False
     ELASTICSEARCH_DSL_AUTOSYNC = False
     ELASTICSEARCH_DSL_AUTO_REFRESH = True
+    # Record every search query as it's made
+    SEARCH_QUERIES_BUFFER_SIZE = 1
 
     @property
     def ES_INDEXES(self):  # noqa - avoid pep8 N802
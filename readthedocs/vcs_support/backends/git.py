@@ -2,11 +2,16 @@
 
 """Git-related utilities."""
 
+import fcntl
 import logging
 import os
 import re
+import subprocess
+import time
+from contextlib import contextmanager
 
 import git
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from git.exc import BadName, InvalidGitRepositoryError
 
@@ -26,6 +31,46 @@ from readthedocs.vcs_support.base import BaseVCS, VCSVersion
 log = logging.getLogger(__name__)
 
 
+@contextmanager
+def mirror_lock(mirror_path):
+    """Serialize the operations on a git mirror between the builds running on this server."""
+    with open('{}.lock'.format(mirror_path), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def borrows_from_mirror(checkout_path, mirror_path):
+    """Whether the checkout was cloned with ``--reference`` to the mirror."""
+    alternates = os.path.join(checkout_path, '.git', 'objects', 'info', 'alternates')
+    try:
+        with open(alternates) as alternates_file:
+            paths = {os.path.normpath(line.strip()) for line in alternates_file}
+    except OSError:
+        return False
+    return os.path.normpath(os.path.join(mirror_path, 'objects')) in paths
+
+
+def detach_from_mirror(checkout_path):
+    """
+    Copy into the checkout the objects it borrows from the mirror.
+
+    :returns: whether the checkout doesn't depend on the mirror anymore
+    """
+    result = subprocess.run(
+        ['git', 'repack', '-a', '-d', '-q'],
+        cwd=checkout_path,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    if result.returncode != 0:
+        return False
+    os.remove(os.path.join(checkout_path, '.git', 'objects', 'info', 'alternates'))
+    return True
+
+
 class Backend(BaseVCS):
 
     """Git VCS backend."""
@@ -57,9 +102,63 @@ class Backend(BaseVCS):
     def set_remote_url(self, url):
         return self.run('git', 'remote', 'set-url', 'origin', url)
 
+    @property
+    def mirror_path(self):
+        """
+        Path of the bare mirror shared by all the versions of this project.
+
+        Mirrors are only used when ``GIT_MIRROR_ROOT`` is set. External
+        versions always fetch from the remote, since pull/merge request refs
+        aren't kept in the mirror.
+        """
+        if not settings.GIT_MIRROR_ROOT or self.version_type == EXTERNAL:
+            return None
+        return os.path.join(
+            settings.GIT_MIRROR_ROOT,
+            '{}.git'.format(self.project.slug),
+        )
+
+    def mirror_is_fresh(self):
+        """Whether the mirror was fetched less than ``GIT_MIRROR_REFRESH_INTERVAL`` ago."""
+        fetch_head = os.path.join(self.mirror_path, 'FETCH_HEAD')
+        try:
+            age = time.time() - os.path.getmtime(fetch_head)
+        except OSError:
+            return False
+        return age < settings.GIT_MIRROR_REFRESH_INTERVAL
+
+    def update_mirror(self):
+        """
+        Create or refresh the bare mirror of the repository.
+
+        The mirror is fetched at most once per ``GIT_MIRROR_REFRESH_INTERVAL``,
+        so all the builds triggered by the same webhook hit the remote once.
+        Automatic garbage collection is disabled on the mirror, as version
+        checkouts borrow its objects through ``--reference``.
+        """
+        os.makedirs(settings.GIT_MIRROR_ROOT, exist_ok=True)
+        git_dir = '--git-dir={}'.format(self.mirror_path)
+        with mirror_lock(self.mirror_path):
+            if not os.path.exists(os.path.join(self.mirror_path, 'HEAD')):
+                self.run('git', git_dir, 'init', '--bare')
+                self.run('git', git_dir, 'config', 'gc.auto', '0')
+            elif self.mirror_is_fresh():
+                return
+
+            code, _, _ = self.run(
+                'git', git_dir, 'fetch', self.repo_url, '--force', '--prune',
+                '+refs/heads/*:refs/heads/*', '+refs/tags/*:refs/tags/*',
+            )
+            if code != 0:
+                raise RepositoryError
+            # Touch the mirror to keep it away from ``prune_git_mirrors``
+            os.utime(self.mirror_path, None)
+
     def update(self):
         """Clone or update the repository."""
         super().update()
+        if self.mirror_path:
+            self.update_mirror()
         if self.repo_exists():
             self.set_remote_url(self.repo_url)
             return self.fetch()
@@ -148,6 +247,9 @@ class Backend(BaseVCS):
         return not self.project.has_feature(Feature.DONT_SHALLOW_CLONE)
 
     def fetch(self):
+        if self.mirror_path:
+            return self.fetch_from_mirror()
+
         # --force lets us checkout branches that are not fast-forwarded
         # https://github.com/readthedocs/readthedocs.org/issues/6097
         cmd = ['git', 'fetch', 'origin',
@@ -173,6 +275,16 @@ class Backend(BaseVCS):
             raise RepositoryError
         return code, stdout, stderr
 
+    def fetch_from_mirror(self):
+        """Update the remote branches and tags of the checkout from the local mirror."""
+        code, stdout, stderr = self.run(
+            'git', 'fetch', self.mirror_path, '--force', '--prune',
+            '+refs/heads/*:refs/remotes/origin/*', '+refs/tags/*:refs/tags/*',
+        )
+        if code != 0:
+            raise RepositoryError
+        return code, stdout, stderr
+
     def checkout_revision(self, revision=None):
         if not revision:
             branch = self.default_branch or self.fallback_branch
@@ -187,6 +299,9 @@ class Backend(BaseVCS):
 
     def clone(self):
         """Clones the repository."""
+        if self.mirror_path:
+            return self.clone_from_mirror()
+
         cmd = ['git', 'clone', '--no-single-branch']
 
         if self.use_shallow_clone():
@@ -199,6 +314,22 @@ class Backend(BaseVCS):
             raise RepositoryError
         return code, stdout, stderr
 
+    def clone_from_mirror(self):
+        """
+        Clone the repository borrowing the objects from the local mirror.
+
+        The checkout doesn't store any object by itself, and ``origin`` is
+        pointed back to the real remote so relative submodule URLs resolve.
+        """
+        code, stdout, stderr = self.run(
+            'git', 'clone', '--no-single-branch',
+            '--reference', self.mirror_path, self.mirror_path, '.',
+        )
+        if code != 0:
+            raise RepositoryError
+        self.set_remote_url(self.repo_url)
+        return code, stdout, stderr
+
     @property
     def tags(self):
         versions = []